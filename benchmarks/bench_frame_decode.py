@@ -0,0 +1,75 @@
+import argparse
+import struct
+import timeit
+
+from vrc_t70.commands import VrcT70Commands
+from vrc_t70.frame import VrcT70Frame
+from vrc_t70.limitations import MAX_SENSORS_PER_TRUNK
+from vrc_t70.response import TemperatureOnTrunkResponse, VrcT70Response
+from vrc_t70.simulator import make_response_frame
+
+
+def make_trunk_temperatures_frame(sensors_count=MAX_SENSORS_PER_TRUNK):
+    data = bytearray([0x01])
+    for index in range(sensors_count):
+        data.append(0x01)
+        data.extend(struct.pack("<f", 20.0 + index))
+
+    return make_response_frame(0x01, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK, 0x2233, data=data)
+
+
+def decode_legacy(raw):
+    # decoding path used before VrcT70Frame: header and data copied into new objects,
+    # typed response copies attributes and slices data for each field
+    header, rest = raw[:7], raw[7:]
+
+    res = VrcT70Response()
+    res.address = header[0]
+    res.id_event = header[1]
+    res.sequence_id = (header[2] << 8) | (header[3])
+    res.processing_result = header[4]
+
+    data = bytearray([header[6]])
+    data.extend(rest[:-1])
+    res.data = data
+    res.crc = rest[-1]
+
+    assert res.is_crc_valid()
+
+    res = TemperatureOnTrunkResponse(res)
+    return [struct.unpack("<f", res.data[1 + index * 5 + 1: 1 + index * 5 + 5])[0] for index in range(10)]
+
+
+def decode_frame(raw):
+    return VrcT70Response.from_frame(VrcT70Frame(raw)).temperatures().tolist()
+
+
+def measure(funcs, raw, repeat, number):
+    # runs of decoders are interleaved, so load changes affect all of them equally
+    timings = [[] for _ in funcs]
+    for _ in range(repeat):
+        for func, func_timings in zip(funcs, timings):
+            func_timings.append(timeit.timeit(lambda: func(raw), number=number))
+
+    return [min(item) / number for item in timings]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", dest="number", type=int, default=20000, help="frames per run")
+    parser.add_argument("-r", "--repeat", dest="repeat", type=int, default=5, help="runs count")
+    args = parser.parse_args()
+
+    raw = make_trunk_temperatures_frame()
+    assert decode_legacy(raw) == decode_frame(raw)
+
+    legacy, frame = measure((decode_legacy, decode_frame), raw, args.repeat, args.number)
+
+    print("frame size: {} bytes".format(len(raw)))
+    print("legacy decoder: {:.2f} us/frame".format(legacy * 1e6))
+    print("VrcT70Frame decoder: {:.2f} us/frame".format(frame * 1e6))
+    print("speedup: {:.2f}x".format(legacy / frame))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import argparse
+import datetime
+import json
+import math
+import platform
+import struct
+import subprocess
+import sys
+import timeit
+
+from vrc_t70 import __version__
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.commands import VrcT70Commands
+from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.crc import crc8
+from vrc_t70.encoder import VrcT70RequestEncoder
+from vrc_t70.limitations import MAX_SENSORS_PER_TRUNK
+from vrc_t70.poller import VrcT70Poller
+from vrc_t70.request import VrcT70Request
+from vrc_t70.response import SensorUniqueAddressOnTrunkResponse, TemperatureOnTrunkResponse, VrcT70Response
+from vrc_t70.simulator import LoopbackSerial, VirtualBus, VirtualController, make_response_frame
+
+RESULTS_FORMAT_VERSION = 1
+
+POLL_CONTROLLERS_COUNTS = (1, 16, 64)
+
+# sensors count on trunks of each simulated controller in poll benchmarks
+POLL_SENSORS_PER_TRUNK = (MAX_SENSORS_PER_TRUNK, 3)
+
+
+class ReplaySerial(object):
+    # serial port stub which returns the same frame over and over again
+    def __init__(self, frame):
+        self.frame = bytes(frame)
+        self.timeout = 1.0
+        self._position = 0
+
+    def write(self, data):
+        return len(data)
+
+    def read(self, size=1):
+        res = bytearray()
+        while len(res) < size:
+            chunk = self.frame[self._position: self._position + size - len(res)]
+            res.extend(chunk)
+            self._position = (self._position + len(chunk)) % len(self.frame)
+
+        return bytes(res)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        pass
+
+
+def make_trunk_temperatures_frame(sensors_count=MAX_SENSORS_PER_TRUNK):
+    data = bytearray([0x01])
+    for index in range(sensors_count):
+        data.append(0x01)
+        data.extend(struct.pack("<f", 20.0 + index))
+
+    return make_response_frame(0x01, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK, 0x0000, data=data)
+
+
+def make_trunk_addresses_frame(sensors_count=MAX_SENSORS_PER_TRUNK):
+    data = bytearray([0x01])
+    for index in range(sensors_count):
+        data.extend(bytes([0x28, 0xff, 0x09, 0x30, 0x90, 0x15, 0x04, index]))
+        data.append(0x00)
+
+    return make_response_frame(0x01, VrcT70Commands.GET_SENSORS_UNIQUE_ADDRESSES_ON_TRUNK, 0x0000, data=data)
+
+
+def read_response(communicator):
+    return VrcT70Response.from_frame(communicator._read_frame())
+
+
+def encode_benchmarks():
+    ping = VrcT70Request(0x01, VrcT70Commands.PING, 0x1234)
+    session = VrcT70Request(0x01, VrcT70Commands.SET_SESSION_ID, 0x1234, bytearray(b"\x01\x02\x03\x04"))
+
+    encoder = VrcT70RequestEncoder()
+    buffer = bytearray(64)
+    trunk_number = bytearray([0x01])
+
+    return [
+        ("encode.ping.to_bytearray", ping.to_bytearray),
+        ("encode.ping.bytes", lambda: bytes(ping)),
+        ("encode.set_session_id.to_bytearray", session.to_bytearray),
+        ("encode.set_session_id.bytes", lambda: bytes(session)),
+        ("encode.encoder.ping", lambda: encoder.encode(0x01, VrcT70Commands.PING, 0x1234)),
+        (
+            "encode.encoder.temperatures_on_trunk",
+            lambda: encoder.encode(0x01, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK, 0x1234, trunk_number)
+        ),
+        (
+            "encode.encoder.temperatures_on_trunk_into",
+            lambda: encoder.encode_into(buffer, 0, 0x01, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK, 0x1234, trunk_number)
+        ),
+        ("encode.encoder.request", lambda: encoder.encode_request(session)),
+    ]
+
+
+def decode_benchmarks():
+    temperatures_frame = make_trunk_temperatures_frame()
+    addresses_frame = make_trunk_addresses_frame()
+
+    temperatures_communicator = VrcT70Communicator(ReplaySerial(temperatures_frame))
+    addresses_communicator = VrcT70Communicator(ReplaySerial(addresses_frame))
+
+    response = read_response(temperatures_communicator)
+
+    return [
+        (
+            "decode.read_response.temperatures_on_trunk",
+            lambda: read_response(temperatures_communicator)
+        ),
+        (
+            "decode.read_response.addresses_on_trunk",
+            lambda: read_response(addresses_communicator)
+        ),
+        ("decode.is_crc_valid.temperatures_on_trunk", response.is_crc_valid),
+        ("decode.crc8.temperatures_on_trunk", lambda: crc8(temperatures_frame)),
+    ]
+
+
+def accessors_benchmarks():
+    temperatures = TemperatureOnTrunkResponse(
+        read_response(VrcT70Communicator(ReplaySerial(make_trunk_temperatures_frame())))
+    )
+
+    addresses = SensorUniqueAddressOnTrunkResponse(
+        read_response(VrcT70Communicator(ReplaySerial(make_trunk_addresses_frame())))
+    )
+
+    count = temperatures.temperatures_count()
+
+    return [
+        (
+            "accessors.temperature_on_trunk.temperature_all",
+            lambda: [temperatures.temperature(index) for index in range(count)]
+        ),
+        (
+            "accessors.temperature_on_trunk.is_connected_all",
+            lambda: [temperatures.is_connected(index) for index in range(count)]
+        ),
+        ("accessors.temperature_on_trunk.temperatures", temperatures.temperatures),
+        ("accessors.temperature_on_trunk.connected_mask", temperatures.connected_mask),
+        (
+            "accessors.addresses_on_trunk.sensor_unique_address_all",
+            lambda: [addresses.sensor_unique_address(index) for index in range(addresses.sensors_count())]
+        ),
+        ("accessors.addresses_on_trunk.unique_addresses", addresses.unique_addresses),
+    ]
+
+
+def make_poller(controllers_count):
+    virtual_bus = VirtualBus(
+        [VirtualController(address, POLL_SENSORS_PER_TRUNK) for address in range(1, controllers_count + 1)]
+    )
+
+    bus = VrcT70Bus(LoopbackSerial(virtual_bus))
+    # measuring library overhead only, so no delays between requests
+    bus.make_delay_before_request = lambda: None
+
+    poller = VrcT70Poller(bus, range(1, controllers_count + 1), refresh_period=0.0)
+    poller.discover_trunks()
+
+    return poller
+
+
+def poll_benchmarks():
+    res = []
+    for controllers_count in POLL_CONTROLLERS_COUNTS:
+        poller = make_poller(controllers_count)
+        res.append(("poll.cycle.{}_controllers".format(controllers_count), poller.poll_once))
+
+    return res
+
+
+BENCHMARK_GROUPS = {
+    "encode": encode_benchmarks,
+    "decode": decode_benchmarks,
+    "accessors": accessors_benchmarks,
+    "poll": poll_benchmarks,
+}
+
+
+def measure(func, repeat, min_time):
+    # calibrates loops count, so every run takes at least min_time seconds
+    timer = timeit.Timer(func)
+    number, time_taken = timer.autorange()
+    number = max(1, math.ceil(number * min_time / time_taken))
+
+    timings = [item / number for item in timer.repeat(repeat=repeat, number=number)]
+
+    return {
+        "seconds_per_op": min(timings),
+        "median_seconds_per_op": sorted(timings)[len(timings) // 2],
+        "ops_per_second": 1.0 / min(timings),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def git_revision():
+    try:
+        res = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return res.stdout.strip()
+
+
+def environment():
+    return {
+        "package_version": __version__,
+        "git_revision": git_revision(),
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def run(groups, repeat, min_time, name_filter=None):
+    results = dict()
+
+    for group in groups:
+        for name, func in BENCHMARK_GROUPS[group]():
+            if name_filter and (name_filter not in name):
+                continue
+
+            results[name] = measure(func, repeat, min_time)
+            print("{:<60} {:>12.3f} us/op".format(name, results[name]["seconds_per_op"] * 1e6))
+
+    return {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "environment": environment(),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-g",
+        "--group",
+        dest="groups",
+        action="append",
+        choices=sorted(BENCHMARK_GROUPS),
+        help="benchmarks group to run, can be repeated (default: all groups)"
+    )
+    parser.add_argument("-k", "--filter", dest="name_filter", default=None, help="run benchmarks with name part")
+    parser.add_argument("-r", "--repeat", dest="repeat", type=int, default=5, help="runs count")
+    parser.add_argument("-t", "--min-time", dest="min_time", type=float, default=0.2, help="min seconds per run")
+    parser.add_argument("-j", "--json", dest="json_path", default=None, help="write results to JSON file")
+    args = parser.parse_args()
+
+    groups = args.groups or list(BENCHMARK_GROUPS)
+    report = run(groups, args.repeat, args.min_time, args.name_filter)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=4, sort_keys=True)
+
+        print("results saved to {}".format(args.json_path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(baseline, current, threshold):
+    # returns list of (name, baseline seconds, current seconds, change ratio, is regression)
+    res = []
+    for name in sorted(set(baseline) & set(current)):
+        before = baseline[name]["seconds_per_op"]
+        after = current[name]["seconds_per_op"]
+        change = after / before - 1.0
+
+        res.append((name, before, after, change, change > threshold))
+
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline", help="JSON results of baseline run")
+    parser.add_argument("current", help="JSON results of current run")
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        dest="threshold",
+        type=float,
+        default=0.1,
+        help="slowdown ratio treated as regression"
+    )
+    args = parser.parse_args()
+
+    rows = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+
+    regressions_count = 0
+    for name, before, after, change, is_regression in rows:
+        regressions_count += int(is_regression)
+        print(
+            "{:<60} {:>12.3f} {:>12.3f} us/op {:>+8.1%}{}".format(
+                name,
+                before * 1e6,
+                after * 1e6,
+                change,
+                "  REGRESSION" if is_regression else ""
+            )
+        )
+
+    return 1 if regressions_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
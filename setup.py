@@ -48,6 +48,9 @@ if __name__ == "__main__":
         classifiers=[],
         packages=packages,
         install_requires=requirements,
+        extras_require={
+            "numpy": ["numpy"],
+        },
         zip_safe=False,
         entry_points={
             "console_scripts": [
@@ -0,0 +1,215 @@
+import time
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.bus_owner import VrcT70BusOwner
+from vrc_t70.daemon.collector import Collector, PortCollector, ReadingsStore, TrunkState
+from vrc_t70.recorder import TimeSeriesReader, TimeSeriesRecorder
+from vrc_t70.sensor_index import SensorIndex, SensorLocation
+from vrc_t70.simulator import LoopbackSerial, VirtualBus, VirtualController
+from vrc_t70.topology_cache import TopologyCache
+
+
+def make_port_collector(
+        tmp_path,
+        store,
+        virtual_bus,
+        addresses,
+        port_name="sim0",
+        recorder=None,
+        sensor_index=None,
+        session_check_period=60.0
+):
+    bus = VrcT70Bus(LoopbackSerial(virtual_bus, timeout=0.02))
+    bus.make_delay_before_request = lambda: None
+
+    return PortCollector(
+        port_name,
+        bus,
+        addresses,
+        store,
+        refresh_period=0.01,
+        topology_cache=TopologyCache(str(tmp_path / "topology.json")),
+        recorder=recorder,
+        sensor_index=sensor_index,
+        session_check_period=session_check_period
+    )
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while (time.monotonic() < deadline) and not condition():
+        time.sleep(0.01)
+
+    return condition()
+
+
+def test_store_filters_and_keeps_values_on_error():
+    store = ReadingsStore()
+    state = TrunkState("sim0", 1, 2, 100.0, (20.0, 21.0), (1, 0), ("28aa", "28bb"), None)
+    store.update_trunk(state)
+    store.update_trunk(state._replace(controller_address=3))
+
+    assert len(store.trunks()) == 2
+    assert [item.controller_address for item in store.trunks(controller_address=3)] == [3]
+    assert store.trunks(port_name="sim1") == []
+
+    store.update_trunk(TrunkState("sim0", 1, 2, 101.0, (), (), (), "no answer"))
+    state = store.trunks(controller_address=1)[0]
+    assert state.temperatures == (20.0, 21.0)
+    assert state.error == "no answer"
+
+    readings = store.readings(controller_address=1)
+    assert [(item["index"], item["address"], item["temperature"], item["connected"]) for item in readings] == [
+        (0, "28aa", 20.0, True),
+        (1, "28bb", None, False),
+    ]
+
+
+def test_port_collector_discovers_and_polls(tmp_path):
+    store = ReadingsStore()
+    controller = VirtualController(0x02, [0, 2, 1])
+    sensor_index = SensorIndex()
+    collector = make_port_collector(
+        tmp_path,
+        store,
+        VirtualBus([controller]),
+        [0x02, 0x03],
+        sensor_index=sensor_index
+    )
+
+    assert collector.discover() == [(0x02, 2), (0x02, 3)]
+    assert len(sensor_index) == 3
+    assert sensor_index.location(controller.sensor_address(3, 0)) == SensorLocation("sim0", 0x02, 3, 0)
+    assert collector.online_addresses == [0x02]
+    assert "controller 0x03" in collector.last_error
+
+    collector.poll_once()
+
+    readings = store.readings(trunk_number=2)
+    assert len(readings) == 2
+    assert readings[1]["address"] == controller.sensor_address(2, 1).hex()
+    assert all(item["connected"] for item in readings)
+
+    health = collector.health()
+    assert health.cycles_count == 1
+    assert health.trunks_count == 2
+    assert health.controllers == [0x02]
+
+
+def test_port_collector_records_snapshots(tmp_path):
+    store = ReadingsStore()
+    with TimeSeriesRecorder(str(tmp_path / "readings")) as recorder:
+        collector = make_port_collector(
+            tmp_path,
+            store,
+            VirtualBus([VirtualController(0x01, [3])]),
+            [0x01],
+            recorder=recorder
+        )
+        collector.poll_once()
+        collector.poll_once()
+
+    assert len(list(TimeSeriesReader(str(tmp_path / "readings")).read())) == 6
+
+
+def test_port_collector_shares_port_through_bus_owner(tmp_path):
+    store = ReadingsStore()
+    bus = VrcT70Bus(LoopbackSerial(VirtualBus([VirtualController(0x01, [1, 2])]), timeout=0.02))
+    bus.make_delay_before_request = lambda: None
+
+    with VrcT70BusOwner(bus) as owner:
+        collector = PortCollector(
+            "sim0",
+            owner,
+            [0x01],
+            store,
+            topology_cache=TopologyCache(str(tmp_path / "topology.json"))
+        )
+        collector.poll_once()
+
+        # the same port is used by other client between poller cycles
+        assert owner.communicator(0x01).get_sensors_count_on_trunk(2).result(timeout=5.0).sensors_count() == 2
+
+    assert len(store.readings()) == 3
+
+
+def test_collector_runs_in_background(tmp_path):
+    store = ReadingsStore()
+    port_collectors = [
+        make_port_collector(tmp_path, store, VirtualBus([VirtualController(0x01, [1])]), [0x01], "sim0"),
+        make_port_collector(tmp_path, store, VirtualBus([VirtualController(0x01, [2])]), [0x01], "sim1"),
+    ]
+    collector = Collector(port_collectors, store)
+
+    assert collector.health()[0] == "down"
+
+    collector.start()
+    try:
+        deadline = time.monotonic() + 5.0
+        while (time.monotonic() < deadline) and any(not item.cycles_count for item in port_collectors):
+            time.sleep(0.01)
+
+        status, ports = collector.health()
+    finally:
+        collector.stop()
+
+    assert status == "ok"
+    assert [item.port_name for item in ports] == ["sim0", "sim1"]
+    assert len(store.readings(port_name="sim1")) == 2
+    assert not any(item.is_running for item in port_collectors)
+
+
+def test_port_collector_rediscovers_when_no_controllers_answered(tmp_path, monkeypatch):
+    monkeypatch.setattr("vrc_t70.daemon.collector.RESTART_DELAY", 0.01)
+    virtual_bus = VirtualBus()
+    collector = make_port_collector(tmp_path, ReadingsStore(), virtual_bus, [0x01])
+
+    collector.start()
+    try:
+        assert wait_for(lambda: collector.discoveries_count >= 2)
+        assert collector.health().trunks_count == 0
+
+        virtual_bus.add_controller(VirtualController(0x01, [2]))
+        assert wait_for(lambda: collector.cycles_count > 0)
+    finally:
+        collector.stop()
+
+    assert collector.online_addresses == [0x01]
+    assert collector.health().trunks_count == 1
+
+
+def test_port_collector_rediscovers_when_all_trunks_failed(tmp_path):
+    virtual_bus = VirtualBus([VirtualController(0x01, [2])])
+    collector = make_port_collector(tmp_path, ReadingsStore(), virtual_bus, [0x01])
+
+    collector.discover()
+    collector.poll_once()
+    virtual_bus.drop_rate = 1.0
+    snapshot = collector.poll_once()
+
+    assert snapshot.errors and not snapshot.trunks
+    assert collector._is_rediscovery_needed(snapshot)
+
+
+def test_port_collector_reloads_topology_after_controller_restart(tmp_path):
+    store = ReadingsStore()
+    controller = VirtualController(0x01, [1])
+    collector = make_port_collector(tmp_path, store, VirtualBus([controller]), [0x01], session_check_period=0.0)
+
+    collector.discover()
+    assert not collector.is_session_changed()
+
+    # controller was restarted with new sensors on the trunk
+    controller.sensors_per_trunk[0] = 3
+    controller.session_id = bytes(4)
+    assert collector.is_session_changed()
+
+    collector.start()
+    try:
+        assert wait_for(lambda: len(store.readings()) == 3)
+    finally:
+        collector.stop()
+
+    assert collector.discoveries_count >= 2
+    assert collector.session_ids[0x01] == controller.session_id
+    assert collector.sensors_addresses[(0x01, 1)][2] == controller.sensor_address(1, 2).hex()
@@ -0,0 +1,176 @@
+import http.client
+import json
+import socket
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.bus_owner import VrcT70BusOwner
+from vrc_t70.daemon.collector import Collector, PortCollector, ReadingsStore, TrunkState
+from vrc_t70.daemon.server import QueryHTTPServer, QueryUnixServer
+from vrc_t70.metrics import MetricsRegistry
+from vrc_t70.scheduler import ClassScheduler
+from vrc_t70.sensor_index import SensorIndex
+from vrc_t70.simulator import LoopbackSerial, VirtualBus, VirtualController
+
+
+@pytest.fixture
+def collector():
+    store = ReadingsStore()
+    store.update_trunk(TrunkState("sim0", 1, 1, 100.0, (20.5, 0.0), (1, 0), ("28aa", "28bb"), None))
+    store.update_trunk(TrunkState("sim0", 2, 3, 100.0, (25.0,), (1,), ("28cc",), None))
+
+    sensor_index = SensorIndex()
+    sensor_index.update_trunk("sim0", 2, 3, [0x28ff0930901504cc])
+
+    return Collector([], store, sensor_index)
+
+
+@pytest.fixture
+def http_server(collector):
+    server = QueryHTTPServer(("127.0.0.1", 0), collector, MetricsRegistry())
+    thread = threading.Thread(target=server.serve_forever, args=(0.05, ), daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def get_json(server, path):
+    url = "http://127.0.0.1:{}{}".format(server.server_address[1], path)
+    with urllib.request.urlopen(url) as response:
+        return response.status, json.load(response)
+
+
+def test_readings(http_server):
+    status, data = get_json(http_server, "/readings")
+    assert status == 200
+    assert len(data["readings"]) == 3
+
+    _, data = get_json(http_server, "/readings?controller=0x01")
+    assert [(item["index"], item["temperature"]) for item in data["readings"]] == [(0, 20.5), (1, None)]
+
+
+def test_trunks(http_server):
+    _, data = get_json(http_server, "/trunks?port=sim0&trunk=3")
+
+    assert data["trunks"] == [
+        {
+            "port": "sim0",
+            "controller": 2,
+            "trunk": 3,
+            "timestamp": 100.0,
+            "temperatures": [25.0],
+            "connected": [True],
+            "addresses": ["28cc"],
+            "error": None,
+        }
+    ]
+
+
+def test_sensors(http_server):
+    expected = {"address": "28ff0930901504cc", "port": "sim0", "controller": 2, "trunk": 3, "index": 0}
+
+    _, data = get_json(http_server, "/sensors")
+    assert data["sensors"] == [expected]
+
+    _, data = get_json(http_server, "/sensors?address=28FF0930901504CC")
+    assert data["sensors"] == [expected]
+
+    _, data = get_json(http_server, "/sensors?address=28ff0930901504aa")
+    assert data["sensors"] == []
+
+
+def test_live_read(tmp_path):
+    bus = VrcT70Bus(LoopbackSerial(VirtualBus([VirtualController(0x01, [0, 2])]), timeout=0.02))
+    owner = VrcT70BusOwner(bus, scheduler=ClassScheduler())
+    store = ReadingsStore()
+    collector = Collector([PortCollector("sim0", owner, [0x01], store)], store)
+
+    server = QueryHTTPServer(("127.0.0.1", 0), collector)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05, ), daemon=True)
+    thread.start()
+
+    try:
+        with owner:
+            _, data = get_json(server, "/live?port=sim0&controller=1&trunk=2")
+
+            with pytest.raises(urllib.error.HTTPError) as e:
+                get_json(server, "/live?port=sim1&controller=1&trunk=2")
+
+            assert e.value.code == 404
+
+            with pytest.raises(urllib.error.HTTPError) as e:
+                get_json(server, "/live?port=sim0")
+
+            assert e.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert data["connected"] == [True, True]
+    assert len(data["temperatures"]) == 2
+
+
+def test_health_and_errors(http_server):
+    # no ports are running
+    with pytest.raises(urllib.error.HTTPError) as e:
+        get_json(http_server, "/health")
+
+    assert e.value.code == 503
+    assert json.load(e.value)["status"] == "down"
+
+    with pytest.raises(urllib.error.HTTPError) as e:
+        get_json(http_server, "/readings?trunk=first")
+
+    assert e.value.code == 400
+
+    with pytest.raises(urllib.error.HTTPError) as e:
+        get_json(http_server, "/unknown")
+
+    assert e.value.code == 404
+
+
+def test_metrics(http_server):
+    url = "http://127.0.0.1:{}/metrics".format(http_server.server_address[1])
+    with urllib.request.urlopen(url) as response:
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert "# TYPE vrc_t70_calls_total counter" in response.read().decode("utf-8")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix sockets support required")
+def test_unix_socket(collector, tmp_path):
+    path = str(tmp_path / "daemon.sock")
+    server = QueryUnixServer(path, collector)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05, ), daemon=True)
+    thread.start()
+
+    try:
+        connection = UnixHTTPConnection(path)
+        connection.request("GET", "/readings?trunk=3")
+        response = connection.getresponse()
+
+        assert response.status == 200
+        assert [item["temperature"] for item in json.load(response)["readings"]] == [25.0]
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert not (tmp_path / "daemon.sock").exists()
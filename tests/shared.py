@@ -1,9 +1,11 @@
 import binascii
 
 
-import crcmod
-
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.crc import crc8
 from vrc_t70.response import VrcT70Response
+from vrc_t70.simulator import LoopbackSerial
 
 
 def bytearray_to_response(data, contains_crc=True):
@@ -28,8 +30,64 @@ def bytearray_to_response(data, contains_crc=True):
     if contains_crc:
         res.crc = data[-1]
     else:
-        crc_func = crcmod.mkCrcFun(poly=0x1d5, initCrc=0, rev=False, xorOut=0)
-        res.crc = crc_func(data)
+        res.crc = crc8(data)
 
     assert res.is_crc_valid()
     return res
+
+
+class FakeSerial(object):
+    # Serial port stub: each written request is passed to responder, which returns bytes
+    # that would be available for reading (or None when controller is silent)
+    def __init__(self, responder=None):
+        self.responder = responder
+        self.written = []
+        self.input_buffer = bytearray()
+        self.timeout = 0.0
+
+    def write(self, data):
+        data = bytes(data)
+        self.written.append(data)
+
+        if self.responder:
+            answer = self.responder(data)
+            if answer:
+                self.input_buffer.extend(answer)
+
+        return len(data)
+
+    def read(self, size=1):
+        res = bytes(self.input_buffer[:size])
+        del self.input_buffer[:size]
+        return res
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        self.input_buffer.clear()
+
+    def close(self):
+        pass
+
+
+class FakeClock(object):
+    # clock for time dependent code, time is moved by tests
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_loopback_bus(virtual_bus, timeout=0.05, metrics=None):
+    # bus connected to virtual controllers, without delays between requests
+    bus = VrcT70Bus(LoopbackSerial(virtual_bus, timeout=timeout), metrics=metrics)
+    bus.make_delay_before_request = lambda: None
+
+    return bus
+
+
+def make_communicator(virtual_bus, address=0x01, retry_policy=None, timeout=0.05, metrics=None):
+    bus = make_loopback_bus(virtual_bus, timeout=timeout, metrics=metrics)
+    return VrcT70Communicator(bus, address, retry_policy=retry_policy)
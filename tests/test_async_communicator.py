@@ -0,0 +1,201 @@
+import asyncio
+import os
+import socket
+import struct
+import sys
+import tty
+
+import pytest
+
+from vrc_t70.async_communicator import AsyncVrcT70Bus, AsyncVrcT70Communicator
+from vrc_t70.commands import VrcT70Commands
+from vrc_t70.exceptions import NoAnswerFromController
+from vrc_t70.simulator import make_response_frame
+
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="pty support required")
+
+
+class PtyResponder(object):
+    # answers on master side of pty pair for requests sent by communicator to slave side
+    def __init__(self, master_fd, online_addresses):
+        self.master_fd = master_fd
+        self.online_addresses = online_addresses
+        self.requests = []
+        self._buffer = bytearray()
+
+    def on_data_available(self):
+        self._buffer.extend(os.read(self.master_fd, 4096))
+
+        while len(self._buffer) >= 6:
+            request_length = 6 + self._buffer[4]
+            if len(self._buffer) < request_length:
+                break
+
+            request = bytes(self._buffer[:request_length])
+            del self._buffer[:request_length]
+
+            self.requests.append(request)
+            answer = self.make_answer(request)
+            if answer:
+                os.write(self.master_fd, answer)
+
+    def make_answer(self, request):
+        address, command = request[0], request[1]
+        sequence_id = (request[2] << 8) | request[3]
+
+        if address not in self.online_addresses:
+            return None
+
+        if command == VrcT70Commands.GET_TEMPERATURES_ON_TRUNK:
+            trunk_number = request[5]
+            data = bytearray([trunk_number])
+            for index in range(3):
+                data.append(0x01)
+                data.extend(struct.pack("<f", 20.0 + index + address))
+
+            return make_response_frame(address, command, sequence_id, data=data)
+
+        return make_response_frame(address, command, sequence_id)
+
+
+def run_with_pty(coro_factory, online_addresses):
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(slave_fd)
+
+    responder = PtyResponder(master_fd, online_addresses)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.add_reader(master_fd, responder.on_data_available)
+        try:
+            return await coro_factory(slave_fd)
+        finally:
+            loop.remove_reader(master_fd)
+
+    try:
+        return asyncio.run(main()), responder
+    finally:
+        os.close(master_fd)
+        os.close(slave_fd)
+
+
+def test_async_ping_over_pty():
+    async def scenario(fd):
+        communicator = AsyncVrcT70Communicator(fd, controller_address=0x03)
+        res = await communicator.ping()
+        communicator.bus.close()
+        return res
+
+    res, responder = run_with_pty(scenario, {0x03})
+
+    assert res.address == 0x03
+    assert res.id_event == VrcT70Commands.PING
+    assert len(responder.requests) == 1
+
+
+def test_async_temperatures_on_trunk_over_pty():
+    async def scenario(fd):
+        communicator = AsyncVrcT70Communicator(fd, controller_address=0x02)
+        res = await communicator.get_temperature_on_trunk(4)
+        communicator.bus.close()
+        return res
+
+    res, _ = run_with_pty(scenario, {0x02})
+
+    assert res.trunk_number() == 4
+    assert res.temperatures_count() == 3
+    assert res.temperature(1) == 23.0
+
+
+def test_async_communicators_share_bus_concurrently():
+    async def scenario(fd):
+        bus = AsyncVrcT70Bus(fd)
+        communicators = [AsyncVrcT70Communicator(bus, address) for address in (1, 2, 3)]
+
+        res = await asyncio.gather(*[item.get_temperature_on_trunk(1) for item in communicators])
+        bus.close()
+        return res
+
+    res, responder = run_with_pty(scenario, {1, 2, 3})
+
+    assert [item.address for item in res] == [1, 2, 3]
+    assert sorted(item.sequence_id for item in res) == [1, 2, 3]
+    assert len(responder.requests) == 3
+
+
+def test_async_communicator_raises_when_no_answer():
+    async def scenario(fd):
+        bus = AsyncVrcT70Bus(fd, timeout=0.05)
+        communicator = AsyncVrcT70Communicator(bus, controller_address=0x09)
+        try:
+            await communicator.ping()
+        finally:
+            bus.close()
+
+    with pytest.raises(NoAnswerFromController):
+        run_with_pty(scenario, set())
+
+
+def test_async_probe_over_pty():
+    async def scenario(fd):
+        bus = AsyncVrcT70Bus(fd, initial_probe_timeout=0.05)
+        res = [await AsyncVrcT70Communicator(bus, address).probe() for address in (0x01, 0x02)]
+        bus.close()
+        return res
+
+    res, responder = run_with_pty(scenario, {0x02})
+
+    assert res == [False, True]
+    assert len(responder.requests) == 2
+
+
+def test_async_communicator_learns_response_timeouts():
+    async def scenario(fd):
+        bus = AsyncVrcT70Bus(fd, timeout=1.0)
+        communicator = AsyncVrcT70Communicator(bus, controller_address=0x01)
+        for _ in range(3):
+            await communicator.ping()
+
+        bus.close()
+        return bus
+
+    bus, _ = run_with_pty(scenario, {0x01})
+
+    assert VrcT70Commands.PING in bus.rtt_estimators
+    assert bus.response_timeout(VrcT70Commands.PING, 6) < bus.max_timeout
+    assert bus.metrics.command(bus.port_name, 0x01, VrcT70Commands.PING).calls_count == 3
+
+
+@pytest.mark.parametrize("close_peer", ["pty", "socket"])
+def test_async_bus_raises_when_port_is_closed(close_peer):
+    # closed pty master gives EIO on read, closed socket peer gives end of file
+    if close_peer == "pty":
+        peer_fd, fd = os.openpty()
+        tty.setraw(fd)
+    else:
+        peer, port = socket.socketpair()
+        peer_fd, fd = peer.detach(), port.detach()
+
+    async def scenario():
+        bus = AsyncVrcT70Bus(fd, timeout=5.0)
+        communicator = AsyncVrcT70Communicator(bus, controller_address=0x01)
+        loop = asyncio.get_running_loop()
+
+        loop.call_later(0.05, os.close, peer_fd)
+        begin = loop.time()
+        with pytest.raises(OSError):
+            await communicator.ping()
+        elapsed = loop.time() - begin
+
+        # next reads fail immediately too
+        with pytest.raises(OSError):
+            await bus.read_frame(loop.time() + 5.0)
+
+        bus.close()
+        return elapsed
+
+    try:
+        assert asyncio.run(scenario()) < 1.0
+    finally:
+        os.close(fd)
@@ -0,0 +1,128 @@
+from vrc_t70.baudrate import BaudrateCache, detect_baudrate, probe_baudrates
+from vrc_t70.commands import VrcT70Commands
+from vrc_t70.simulator import make_response_frame
+
+from .shared import FakeSerial
+
+
+class FakeSerialWithSpeed(FakeSerial):
+    # controller answers only when port speed matches controller speed
+    def __init__(self, controller_address, controller_baudrate):
+        super().__init__(self._respond)
+        self.controller_address = controller_address
+        self.controller_baudrate = controller_baudrate
+        self.baudrate = None
+        self.closed = False
+
+    def _respond(self, request):
+        if request[0] != self.controller_address:
+            return None
+
+        if self.baudrate != self.controller_baudrate:
+            return b"\xfe\x13"
+
+        return make_response_frame(request[0], request[1], (request[2] << 8) | request[3])
+
+    def close(self):
+        self.closed = True
+
+
+def make_serial_factory(controller_baudrate, created):
+    def factory(port_name, baudrate, timeout):
+        serial = FakeSerialWithSpeed(0x01, controller_baudrate)
+        serial.baudrate = baudrate
+        serial.timeout = timeout
+        created.append(serial)
+        return serial
+
+    return factory
+
+
+def test_probe_baudrates_stops_on_first_valid_answer():
+    serial = FakeSerialWithSpeed(0x01, 38400)
+    serial.timeout = 0.01
+
+    assert probe_baudrates(serial, candidates=(115200, 57600, 38400, 9600)) == 38400
+    assert len(serial.written) == 3
+
+
+def test_probe_baudrates_returns_none_when_nobody_answers():
+    serial = FakeSerialWithSpeed(0x05, 9600)
+    serial.timeout = 0.01
+
+    assert probe_baudrates(serial, candidates=(115200, 9600), addresses=(0x01, 0x02)) is None
+    assert len(serial.written) == 4
+
+
+def test_probe_baudrates_drops_noise_received_at_previous_speed():
+    serial = FakeSerialWithSpeed(0x01, 9600)
+    serial.timeout = 0.01
+
+    # noise looks like header of long frame, parser would wait for its rest at next speed
+    noise = bytes([0x01, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK, 0x00, 0x00, 0x00, 41])
+    serial.responder = lambda request: noise if serial.baudrate != 9600 else serial._respond(request)
+
+    assert probe_baudrates(serial, candidates=(115200, 9600)) == 9600
+
+
+def test_detect_baudrate_uses_and_fills_cache(tmp_path):
+    cache = BaudrateCache(str(tmp_path / "cache" / "baudrates.json"))
+    created = []
+
+    res = detect_baudrate("/dev/ttyUSB3", cache=cache, serial_factory=make_serial_factory(19200, created))
+
+    assert res == 19200
+    assert len(created) == 1
+    assert created[0].closed
+    assert cache.get("/dev/ttyUSB3") == 19200
+
+    res = detect_baudrate("/dev/ttyUSB3", cache=cache, serial_factory=make_serial_factory(19200, created))
+
+    # cached speed is checked with single probe
+    assert res == 19200
+    assert len(created) == 2
+    assert len(created[1].written) == 1
+
+
+def test_detect_baudrate_reprobes_stale_cached_speed(tmp_path):
+    cache = BaudrateCache(str(tmp_path / "baudrates.json"))
+    cache.set("/dev/ttyUSB0", 115200)
+
+    res = detect_baudrate("/dev/ttyUSB0", cache=cache, serial_factory=make_serial_factory(9600, []))
+
+    assert res == 9600
+    assert cache.get("/dev/ttyUSB0") == 9600
+
+    res = detect_baudrate(
+        "/dev/ttyUSB0",
+        candidates=(115200, ),
+        cache=cache,
+        serial_factory=make_serial_factory(1200, [])
+    )
+
+    assert res is None
+    assert cache.get("/dev/ttyUSB0") is None
+
+
+def test_detect_baudrate_does_not_cache_failures(tmp_path):
+    cache = BaudrateCache(str(tmp_path / "baudrates.json"))
+
+    res = detect_baudrate("COM7", candidates=(9600, ), cache=cache, serial_factory=make_serial_factory(1200, []))
+
+    assert res is None
+    assert cache.get("COM7") is None
+
+
+def test_baudrate_cache_ignores_broken_file(tmp_path):
+    path = tmp_path / "baudrates.json"
+    path.write_text("not a json")
+
+    cache = BaudrateCache(str(path))
+    assert cache.get("COM1") is None
+
+    cache.set("COM1", 9600)
+    cache.set("COM2", 115200)
+    cache.remove("COM1")
+
+    assert BaudrateCache(str(path)).get("COM1") is None
+    assert BaudrateCache(str(path)).get("COM2") == 115200
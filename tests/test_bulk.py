@@ -0,0 +1,96 @@
+import math
+import struct
+
+import pytest
+
+from vrc_t70.bulk import stack_trunks_temperatures
+from vrc_t70.response import SensorUniqueAddressOnTrunkResponse, TemperatureOnTrunkResponse
+from vrc_t70.simulator import make_response_frame
+
+from .shared import bytearray_to_response
+
+
+def make_trunk_temperatures_response(address, trunk_number, temperatures):
+    data = bytearray([trunk_number])
+    for temperature in temperatures:
+        data.append(0x00 if temperature is None else 0x01)
+        data.extend(struct.pack("<f", temperature or 0.0))
+
+    return TemperatureOnTrunkResponse(bytearray_to_response(make_response_frame(address, 0x03, 0x0000, data=data)))
+
+
+def make_trunk_addresses_response(addresses, errors):
+    data = bytearray([0x02])
+    for address, error in zip(addresses, errors):
+        data.extend(address.to_bytes(8, "big"))
+        data.append(error)
+
+    return SensorUniqueAddressOnTrunkResponse(bytearray_to_response(make_response_frame(0x01, 0x05, 0x0000, data=data)))
+
+
+def test_trunk_temperatures_bulk_accessors():
+    res = make_trunk_temperatures_response(0x01, 3, [1.5, None, -10.25])
+
+    assert res.temperatures().typecode == "f"
+    assert list(res.temperatures()) == [1.5, 0.0, -10.25]
+    assert list(res.connected_mask()) == [1, 0, 1]
+
+    for index in range(res.temperatures_count()):
+        assert res.temperatures()[index] == res.temperature(index)
+
+
+def test_trunk_addresses_bulk_accessors():
+    addresses = [0x28ff0930901504a9, 0x28aabbccddeeff01]
+    res = make_trunk_addresses_response(addresses, [0x00, 0x01])
+
+    assert res.unique_addresses().typecode == "Q"
+    assert list(res.unique_addresses()) == addresses
+    assert list(res.errors_mask()) == [0, 1]
+    assert int.from_bytes(res.sensor_unique_address(0), "big") == addresses[0]
+
+    # only flag equal to 1 is set
+    res = make_trunk_addresses_response(addresses * 2, [0x02, 0x01, 0xff, 0x00])
+    assert list(res.errors_mask()) == [res.is_error_detected(index) for index in range(4)] == [0, 1, 0, 0]
+
+
+def test_trunk_responses_to_numpy():
+    np = pytest.importorskip("numpy")
+
+    temperatures = make_trunk_temperatures_response(0x01, 3, [1.5, None, -10.25]).to_numpy()
+    assert list(temperatures["connected"]) == [1, 0, 1]
+    assert temperatures["temperature"][2] == np.float32(-10.25)
+
+    addresses = make_trunk_addresses_response([0x28ff0930901504a9], [0x00]).to_numpy()
+    assert addresses["address"].astype(np.uint64)[0] == np.uint64(0x28ff0930901504a9)
+
+
+def test_stack_trunks_temperatures_with_numpy():
+    np = pytest.importorskip("numpy")
+
+    responses = [
+        make_trunk_temperatures_response(0x01, 1, [1.0, 2.0]),
+        make_trunk_temperatures_response(0x02, 7, [3.0, None, 5.0]),
+    ]
+
+    res = stack_trunks_temperatures(responses, width=4)
+
+    assert res.rows == [(0x01, 1), (0x02, 7)]
+    assert res.temperatures.shape == (2, 4)
+    assert res.connected.tolist() == [[True, True, False, False], [True, False, True, False]]
+    assert np.nanmax(res.temperatures) == 5.0
+    assert np.isnan(res.temperatures[1, 1])
+
+
+def test_stack_trunks_temperatures_without_numpy():
+    responses = [
+        make_trunk_temperatures_response(0x01, 1, [1.0, 2.0]),
+        make_trunk_temperatures_response(0x02, 7, [3.0, None, 5.0]),
+    ]
+
+    res = stack_trunks_temperatures(responses, width=3, use_numpy=False)
+
+    assert list(res.connected) == [1, 1, 0, 1, 0, 1]
+    assert res.temperatures[:2].tolist() == [1.0, 2.0]
+    assert math.isnan(res.temperatures[2])
+    assert math.isnan(res.temperatures[4])
+    assert res.temperatures[5] == 5.0
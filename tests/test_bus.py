@@ -0,0 +1,100 @@
+import pytest
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.commands import VrcT70Commands
+from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.exceptions import NoAnswerFromController
+from vrc_t70.simulator import make_response_frame
+
+from .shared import FakeSerial
+
+
+def request_sequence_id(request):
+    return (request[2] << 8) | request[3]
+
+
+def echo_ping_responder(request):
+    return make_response_frame(request[0], request[1], request_sequence_id(request))
+
+
+def test_communicator_without_bus_uses_zero_sequence_id():
+    serial = FakeSerial(echo_ping_responder)
+    communicator = VrcT70Communicator(serial, controller_address=0x05)
+
+    res = communicator.ping()
+
+    assert res.sequence_id == 0x0000
+    assert request_sequence_id(serial.written[0]) == 0x0000
+
+
+def test_bus_assigns_incrementing_sequence_ids():
+    serial = FakeSerial(echo_ping_responder)
+    bus = VrcT70Bus(serial)
+    bus.make_delay_before_request = lambda: None
+
+    first = VrcT70Communicator(bus, controller_address=0x01)
+    second = VrcT70Communicator(bus, controller_address=0x02)
+
+    assert first.ping().sequence_id == 0x0001
+    assert second.ping().sequence_id == 0x0002
+    assert first.ping().sequence_id == 0x0003
+
+    assert [request_sequence_id(item) for item in serial.written] == [1, 2, 3]
+
+
+def test_bus_sequence_ids_skip_zero_on_wrap():
+    bus = VrcT70Bus(FakeSerial())
+    bus._sequence_id = 0xfffe
+
+    assert bus.next_sequence_id() == 0xffff
+    assert bus.next_sequence_id() == 0x0001
+
+
+def test_bus_drops_stale_frames_without_retry():
+    def responder(request):
+        stale = make_response_frame(0x07, VrcT70Commands.PING, 0x1234)
+        other_controller = make_response_frame(0x08, request[1], request_sequence_id(request))
+        return stale + other_controller + echo_ping_responder(request)
+
+    serial = FakeSerial(responder)
+    bus = VrcT70Bus(serial)
+    communicator = VrcT70Communicator(bus, controller_address=0x07)
+
+    res = communicator.ping()
+
+    assert res.address == 0x07
+    assert res.sequence_id == 0x0001
+    assert bus.stale_frames_count == 2
+    assert len(serial.written) == 1
+
+
+def test_bus_retries_with_new_sequence_id_when_no_answer():
+    def responder(request):
+        if request_sequence_id(request) < 3:
+            return None
+
+        return echo_ping_responder(request)
+
+    serial = FakeSerial(responder)
+    bus = VrcT70Bus(serial)
+    bus.make_delay_before_request = lambda: None
+    communicator = VrcT70Communicator(bus, controller_address=0x01)
+
+    res = communicator.ping()
+
+    assert res.sequence_id == 0x0003
+    assert [request_sequence_id(item) for item in serial.written] == [1, 2, 3]
+
+
+def test_bus_raises_when_only_stale_frames_received():
+    def responder(request):
+        return make_response_frame(request[0], request[1], 0x7777)
+
+    bus = VrcT70Bus(FakeSerial(responder))
+    bus.make_delay_before_request = lambda: None
+    communicator = VrcT70Communicator(bus, controller_address=0x01)
+
+    with pytest.raises(NoAnswerFromController):
+        communicator.ping()
+
+    assert bus.stale_frames_count == 3
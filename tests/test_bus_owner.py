@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.bus_owner import VrcT70BusOwner
+from vrc_t70.exceptions import ProcessingError
+from vrc_t70.poller import VrcT70Poller
+from vrc_t70.response import TemperatureOnTrunkResponse
+from vrc_t70.scheduler import PRIORITY_HIGH, PRIORITY_LOW
+from vrc_t70.simulator import LoopbackSerial, VirtualBus, VirtualController
+
+
+def make_owner(controllers):
+    bus = VrcT70Bus(LoopbackSerial(VirtualBus(controllers), timeout=0.05))
+    bus.make_delay_before_request = lambda: None
+
+    return VrcT70BusOwner(bus)
+
+
+def block_worker(owner):
+    # worker waits for event, so following requests stay queued
+    started = threading.Event()
+    release = threading.Event()
+
+    owner.run(lambda: (started.set(), release.wait(1.0)))
+    started.wait(1.0)
+
+    return release
+
+
+def test_requests_from_many_threads_are_serialized():
+    controllers = [VirtualController(address, [2, 1]) for address in range(1, 5)]
+    errors = []
+
+    with make_owner(controllers) as owner:
+        def worker(address):
+            communicator = owner.communicator(address)
+            futures = [communicator.get_temperature_on_trunk(1 + index % 2) for index in range(10)]
+
+            for index, future in enumerate(futures):
+                r = future.result(timeout=5.0)
+                if (r.address != address) or (r.trunk_number() != 1 + index % 2):
+                    errors.append((address, index))
+
+        threads = [threading.Thread(target=worker, args=(address, )) for address in range(1, 5)]
+        for item in threads:
+            item.start()
+
+        for item in threads:
+            item.join()
+
+    assert errors == []
+    assert owner.bus.stale_frames_count == 0
+
+
+def test_higher_priority_is_served_first():
+    order = []
+
+    with make_owner([VirtualController(0x01, [1])]) as owner:
+        release = block_worker(owner)
+
+        owner.run(order.append, "low", priority=PRIORITY_LOW)
+        owner.run(order.append, "normal")
+        owner.run(order.append, "high", priority=PRIORITY_HIGH)
+        owner.run(order.append, "normal-2")
+
+        release.set()
+
+    assert order == ["high", "normal", "normal-2", "low"]
+
+
+def test_blocking_communicator_and_nested_calls():
+    controller = VirtualController(0x03, [0, 2])
+
+    with make_owner([controller]) as owner:
+        communicator = owner.communicator(0x03, blocking=True)
+
+        r = communicator.get_temperature_on_trunk(2)
+        assert isinstance(r, TemperatureOnTrunkResponse)
+        assert r.temperatures_count() == 2
+
+        assert communicator.probe()
+        assert not owner.communicator(0x04, blocking=True).probe()
+
+        # commands inside run() are executed by worker immediately
+        def scan():
+            return [communicator.get_sensors_count_on_trunk(trunk).sensors_count() for trunk in (1, 2)]
+
+        assert owner.run(scan).result(timeout=5.0) == [0, 2]
+
+
+def test_errors_are_delivered_through_futures():
+    with make_owner([VirtualController(0x01, [1])]) as owner:
+        future = owner.communicator(0x01).get_temperature_on_trunk(9)
+
+        with pytest.raises(ProcessingError):
+            future.result(timeout=5.0)
+
+
+def test_stop_cancels_pending_requests():
+    owner = make_owner([VirtualController(0x01, [1])])
+    owner.start()
+
+    release = block_worker(owner)
+    pending = owner.communicator(0x01).ping()
+
+    stopper = threading.Thread(target=owner.stop, kwargs=dict(cancel_pending=True))
+    stopper.start()
+
+    deadline = time.monotonic() + 1.0
+    while (not pending.cancelled()) and (time.monotonic() < deadline):
+        time.sleep(0.001)
+
+    release.set()
+    stopper.join()
+
+    assert pending.cancelled()
+    assert not owner.is_running
+
+    with pytest.raises(RuntimeError):
+        owner.communicator(0x01).ping()
+
+
+def test_poller_over_owner():
+    controllers = [VirtualController(address, [1, 0, 2]) for address in (1, 2)]
+
+    with make_owner(controllers) as owner:
+        poller = VrcT70Poller(owner, [1, 2], refresh_period=0.01)
+        snapshot = poller.poll_once()
+
+    assert sorted(snapshot.trunks) == [(1, 1), (1, 3), (2, 1), (2, 3)]
+    assert snapshot.errors == {}
@@ -0,0 +1,59 @@
+import subprocess
+import sys
+
+from click.testing import CliRunner
+
+import pytest
+
+from vrc_t70.cli_tools.cli import COMMANDS, cli
+
+
+def test_help_lists_commands_without_importing_them():
+    code = (
+        "import sys\n"
+        "from vrc_t70.cli_tools.cli import cli\n"
+        "try:\n"
+        "    cli(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(' '.join(sorted(sys.modules)))\n"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    help_text, modules = output.rsplit("\n", 2)[:2]
+    modules = modules.split()
+
+    for name, (module_name, _, _) in COMMANDS.items():
+        assert name in help_text
+        assert module_name not in modules
+
+    for module_name in ("numpy", "loguru", "serial", "vrc_t70.bus"):
+        assert module_name not in modules
+
+
+def test_find_devices_command_passes_arguments_to_tool(monkeypatch):
+    calls = []
+    monkeypatch.setattr("vrc_t70.cli_tools.find_devices.main", lambda *args, **kwargs: calls.append((args, kwargs)))
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["--import-time", "find-devices", "--uart", "/dev/ttyUSB0", "-d", "0.1"])
+
+    assert result.exit_code == 0, result.output
+    assert calls == [((["--uart", "/dev/ttyUSB0", "-d", "0.1"], ), {"prog": "vrc-t70 find-devices"})]
+    assert "find-devices imported in" in result.output
+
+
+def test_find_devices_detects_speed_by_first_addresses_of_range(monkeypatch):
+    from vrc_t70.command_line import find_devices
+
+    detection_addresses = []
+
+    def resolve_uart_speed(uart_name, uart_speed, addresses, logger):
+        detection_addresses.extend(addresses)
+        raise StopIteration
+
+    monkeypatch.setattr(find_devices, "resolve_uart_speed", resolve_uart_speed)
+
+    with pytest.raises(StopIteration):
+        find_devices.main(["--uart", "/dev/ttyUSB0", "--min", "3", "--max", "200"])
+
+    assert detection_addresses == [3, 4, 5, 6]
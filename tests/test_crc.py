@@ -0,0 +1,36 @@
+import pytest
+
+from vrc_t70.crc import CRC8_TABLE, crc8
+
+
+def test_crc8_check_value():
+    assert crc8(b"123456789") == 0xbc
+
+
+def test_crc8_table_size():
+    assert len(CRC8_TABLE) == 256
+    assert CRC8_TABLE[0] == 0x00
+    assert CRC8_TABLE[1] == 0xd5
+
+
+def test_crc8_supports_memoryview_and_incremental_calculation():
+    data = bytearray(b"\x01\x01\x22\x33\x00")
+    view = memoryview(data)
+
+    assert crc8(view) == 0x0a
+    assert crc8(view[2:], crc8(view[:2])) == 0x0a
+
+
+def test_crc8_of_data_with_crc_appended_is_zero():
+    data = bytearray(b"\x07\x01\x22\x33\x03\x01\x02\x03")
+    data.append(crc8(data))
+
+    assert crc8(data) == 0x00
+
+
+def test_crc8_matches_reference_implementation():
+    crcmod = pytest.importorskip("crcmod")
+    reference = crcmod.mkCrcFun(poly=0x1d5, initCrc=0, rev=False, xorOut=0)
+
+    data = bytes(range(256)) * 3
+    assert crc8(data) == reference(data)
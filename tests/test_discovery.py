@@ -0,0 +1,119 @@
+import json
+
+from click.testing import CliRunner
+
+from vrc_t70.cli_tools.cli import cli
+from vrc_t70.discovery import make_inventory, scan_port, scan_ports
+from vrc_t70.error_codes import VrcT70ErrorCodes
+from vrc_t70.exceptions import ProcessingError
+from vrc_t70.simulator import make_response_frame
+
+from .shared import FakeSerial
+
+
+ONLINE_DEVICES = {
+    ("/dev/ttyUSB0", 115200): {0x01, 0x05},
+    ("/dev/ttyUSB1", 115200): {0x02},
+    ("/dev/ttyUSB1", 9600): {0x10},
+    ("/dev/ttyUSB2", 115200): {0x01, 0x03, 0x04},
+}
+
+# controllers which answer with processing error
+FAILING_DEVICES = {
+    ("/dev/ttyUSB2", 115200): {0x03},
+}
+
+
+def fake_serial_factory(port_name, baudrate, timeout):
+    if port_name == "/dev/missing":
+        raise OSError("no such port")
+
+    online_addresses = ONLINE_DEVICES.get((port_name, baudrate), set())
+
+    def responder(request):
+        if request[0] not in online_addresses:
+            return None
+
+        processing_result = VrcT70ErrorCodes.NO_ERROR
+        if request[0] in FAILING_DEVICES.get((port_name, baudrate), set()):
+            processing_result = VrcT70ErrorCodes.ACCESS_DENIED
+
+        return make_response_frame(request[0], request[1], (request[2] << 8) | request[3], processing_result)
+
+    serial = FakeSerial(responder)
+    serial.timeout = timeout
+    serial.baudrate = baudrate
+
+    return serial
+
+
+def test_scan_port_finds_online_devices():
+    res = scan_port("/dev/ttyUSB0", 115200, min_address=1, max_address=10, serial_factory=fake_serial_factory)
+
+    assert res.port_name == "/dev/ttyUSB0"
+    assert res.addresses == [0x01, 0x05]
+    assert res.error is None
+
+
+def test_scan_port_reports_open_error():
+    res = scan_port("/dev/missing", 115200, serial_factory=fake_serial_factory)
+
+    assert res.addresses == []
+    assert isinstance(res.error, OSError)
+
+
+def test_scan_ports_merges_results_for_all_ports_and_speeds():
+    results = scan_ports(
+        ["/dev/ttyUSB0", "/dev/ttyUSB1"],
+        baudrates=(115200, 9600),
+        min_address=1,
+        max_address=0x10,
+        serial_factory=fake_serial_factory
+    )
+
+    assert [(item.port_name, item.baudrate) for item in results] == [
+        ("/dev/ttyUSB0", 115200),
+        ("/dev/ttyUSB0", 9600),
+        ("/dev/ttyUSB1", 115200),
+        ("/dev/ttyUSB1", 9600),
+    ]
+
+    assert make_inventory(results) == {
+        "/dev/ttyUSB0": {"115200": [0x01, 0x05], "9600": []},
+        "/dev/ttyUSB1": {"115200": [0x02], "9600": [0x10]},
+    }
+
+
+def test_discover_command_writes_json_inventory(monkeypatch):
+    monkeypatch.setattr("vrc_t70.discovery.open_serial", fake_serial_factory)
+
+    runner = CliRunner(mix_stderr=False)
+    result = runner.invoke(cli, ["discover", "-p", "/dev/ttyUSB0", "-p", "/dev/ttyUSB1", "-x", "8", "-j", "-"])
+
+    assert result.exit_code == 0, result.stderr
+    assert json.loads(result.stdout) == {
+        "/dev/ttyUSB0": {"115200": [0x01, 0x05]},
+        "/dev/ttyUSB1": {"115200": [0x02]},
+    }
+
+
+def test_scan_port_continues_after_controller_failure():
+    res = scan_port("/dev/ttyUSB2", 115200, min_address=1, max_address=8, serial_factory=fake_serial_factory)
+
+    assert res.error is None
+    assert res.addresses == [0x01, 0x04]
+    assert list(res.failures) == [0x03]
+    assert isinstance(res.failures[0x03], ProcessingError)
+
+
+def test_discover_command_reports_failures(monkeypatch):
+    monkeypatch.setattr("vrc_t70.discovery.open_serial", fake_serial_factory)
+
+    runner = CliRunner(mix_stderr=False)
+    result = runner.invoke(cli, ["discover", "-p", "/dev/ttyUSB2", "-p", "/dev/missing", "-x", "8", "-j", "-"])
+
+    assert result.exit_code == 1
+    assert json.loads(result.stdout) == {
+        "/dev/missing": {"115200": []},
+        "/dev/ttyUSB2": {"115200": [0x01, 0x04]},
+    }
@@ -0,0 +1,68 @@
+import random
+
+from vrc_t70.commands import VrcT70Commands
+from vrc_t70.encoder import VrcT70RequestEncoder
+from vrc_t70.request import VrcT70Request
+
+
+def test_encoded_frames_match_requests():
+    encoder = VrcT70RequestEncoder()
+    rnd = random.Random(1)
+
+    for _ in range(500):
+        address = rnd.randrange(256)
+        command = rnd.choice([VrcT70Commands.PING, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK, 0x06])
+        sequence_id = rnd.randrange(0x10000)
+        data = bytearray(rnd.randrange(256) for _ in range(rnd.randrange(6))) or None
+
+        expected = VrcT70Request(address, command, sequence_id, data).to_bytearray()
+
+        assert encoder.encode(address, command, sequence_id, data) == expected
+        assert encoder.encode_request(VrcT70Request(address, command, sequence_id, data)) == expected
+
+
+def test_frames_are_cached_and_patched():
+    encoder = VrcT70RequestEncoder()
+
+    first = encoder.encode(0x01, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK, 0x0001, bytearray([0x02]))
+    second = encoder.encode(0x01, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK, 0x1234, bytearray([0x02]))
+
+    assert second is first
+    assert len(encoder) == 1
+    expected = VrcT70Request(0x01, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK, 0x1234, bytearray([0x02]))
+    assert second == expected.to_bytearray()
+
+    encoder.encode(0x01, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK, 0x1234, bytearray([0x03]))
+    assert len(encoder) == 2
+
+
+def test_request_without_sequence_id():
+    encoder = VrcT70RequestEncoder()
+    expected = VrcT70Request(0x01, VrcT70Commands.PING, 0x0000).to_bytearray()
+
+    assert encoder.encode_request(VrcT70Request(0x01, VrcT70Commands.PING, None)) == expected
+
+
+def test_encode_into_buffer():
+    encoder = VrcT70RequestEncoder()
+    buffer = bytearray(32)
+
+    size = encoder.encode_into(buffer, 4, 0x05, VrcT70Commands.GET_SENSORS_COUNT_ON_TRUNK, 0x0102, bytearray([0x07]))
+
+    expected = VrcT70Request(0x05, VrcT70Commands.GET_SENSORS_COUNT_ON_TRUNK, 0x0102, bytearray([0x07])).to_bytearray()
+    assert size == len(expected)
+    assert buffer[4: 4 + size] == expected
+    assert buffer[:4] == bytes(4)
+
+
+def test_least_recently_used_frames_are_evicted():
+    encoder = VrcT70RequestEncoder(max_cached_frames=2)
+
+    ping = encoder.frame(0x01, VrcT70Commands.PING)
+    encoder.frame(0x02, VrcT70Commands.PING)
+    assert encoder.frame(0x01, VrcT70Commands.PING) is ping
+
+    encoder.frame(0x03, VrcT70Commands.PING)
+
+    assert len(encoder) == 2
+    assert encoder.frame(0x01, VrcT70Commands.PING) is ping
@@ -0,0 +1,139 @@
+import io
+import json
+import math
+
+import pytest
+
+from vrc_t70.fleet_snapshot import FleetSnapshot, SensorReading
+from vrc_t70.poller import PollSnapshot
+from vrc_t70.recorder import STATUS_DISCONNECTED, STATUS_ERROR, STATUS_OK
+
+from .test_bulk import make_trunk_temperatures_response
+
+SENSOR_A = 0x28ff0930901504a9
+SENSOR_B = 0x28ff0930901504b0
+SENSOR_C = 0x28ff0930901504c7
+
+
+def make_poll_snapshot(trunks, errors=None, timestamp=100.0):
+    return PollSnapshot(
+        timestamp=timestamp,
+        cycle_number=1,
+        trunks=trunks,
+        errors=errors or dict(),
+        cycle_duration=0.1,
+        cycle_period=1.0,
+        bus_utilization=0.1,
+        wire_utilization=0.05
+    )
+
+
+def make_snapshot():
+    snapshot = FleetSnapshot(100.0, "sim0")
+    snapshot.append(2, 1, 0, SENSOR_C, 30.5)
+    snapshot.append(1, 3, 1, SENSOR_B, -5.25)
+    snapshot.append(1, 3, 0, SENSOR_A, 20.0)
+    snapshot.append(1, 4, 0, None, math.nan, STATUS_DISCONNECTED)
+
+    return snapshot
+
+
+def test_columns_and_rows():
+    snapshot = make_snapshot()
+
+    assert len(snapshot) == 4
+    assert snapshot.addresses.typecode == "Q"
+    assert snapshot.temperatures.typecode == "f"
+    assert snapshot.nbytes == 4 * 16
+
+    assert snapshot[1] == SensorReading(1, 3, 1, SENSOR_B, -5.25, STATUS_OK)
+    assert [item.address for item in snapshot] == [SENSOR_C, SENSOR_B, SENSOR_A, 0]
+
+
+def test_from_poll_snapshot():
+    poll_snapshot = make_poll_snapshot(
+        {(0x01, 3): make_trunk_temperatures_response(0x01, 3, [1.5, None])},
+        errors={(0x01, 4): "no answer"}
+    )
+    addresses = {(0x01, 3): ["28ff0930901504a9"], (0x01, 4): [SENSOR_C]}
+
+    snapshot = FleetSnapshot.from_poll_snapshot(poll_snapshot, addresses, port_name="sim0")
+
+    assert snapshot.timestamp == 100.0
+    assert list(snapshot.addresses) == [SENSOR_A, 0, SENSOR_C]
+    assert list(snapshot.statuses) == [STATUS_OK, STATUS_DISCONNECTED, STATUS_ERROR]
+    assert snapshot.temperatures[0] == 1.5
+    assert math.isnan(snapshot.temperatures[1])
+
+
+def test_select_where_and_sort():
+    snapshot = make_snapshot()
+
+    assert [item.index for item in snapshot.select(controller=1, trunk=3)] == [1, 0]
+    assert len(snapshot.select(status=STATUS_DISCONNECTED)) == 1
+    assert len(snapshot.select(controller=7)) == 0
+
+    assert [item.address for item in snapshot.where(lambda item: item.temperature > 0)] == [SENSOR_C, SENSOR_A]
+
+    ordered = snapshot.sorted_by()
+    assert [(item.controller, item.trunk, item.index) for item in ordered] == [
+        (1, 3, 0),
+        (1, 3, 1),
+        (1, 4, 0),
+        (2, 1, 0),
+    ]
+
+    ordered = snapshot.sorted_by("temperature", reverse=True)
+    assert [item.address for item in ordered][:3] == [SENSOR_C, SENSOR_A, SENSOR_B]
+
+
+def test_diff():
+    previous = make_snapshot()
+
+    current = FleetSnapshot(101.0, "sim0")
+    # sensor A moved to other index, but its temperature is the same
+    current.append(1, 3, 1, SENSOR_A, 20.0)
+    current.append(1, 3, 0, SENSOR_B, -4.0)
+    current.append(1, 4, 0, None, 18.0)
+
+    diff = current.diff(previous, threshold=0.1)
+
+    assert len(diff.added) == 0
+    assert [item.address for item in diff.vanished] == [SENSOR_C]
+    assert [(item.address, item.status) for item in diff.changed] == [(SENSOR_B, STATUS_OK), (0, STATUS_OK)]
+    assert diff.deltas[0] == pytest.approx(1.25)
+    assert math.isnan(diff.deltas[1])
+
+
+def test_export():
+    snapshot = make_snapshot().sorted_by()
+
+    data = json.loads(snapshot.to_json())
+    assert data["port"] == "sim0"
+    assert data["readings"][0] == {
+        "controller": 1,
+        "trunk": 3,
+        "index": 0,
+        "address": "28ff0930901504a9",
+        "temperature": 20.0,
+        "status": STATUS_OK,
+    }
+    assert data["readings"][2]["address"] is None
+    assert data["readings"][2]["temperature"] is None
+
+    stream = io.StringIO()
+    snapshot.to_csv(stream)
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "timestamp,controller,trunk,index,address,temperature,status"
+    assert lines[1] == "100.0,1,3,0,28ff0930901504a9,20.0,0"
+    assert lines[3] == "100.0,1,4,0,,,1"
+
+
+def test_to_numpy():
+    np = pytest.importorskip("numpy")
+
+    records = make_snapshot().to_numpy()
+
+    assert records.dtype.names == ("controller", "trunk", "index", "address", "temperature", "status")
+    assert records["address"][0] == SENSOR_C
+    assert np.array_equal(records["trunk"], [1, 3, 3, 4])
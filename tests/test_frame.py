@@ -0,0 +1,75 @@
+import struct
+
+import pytest
+
+from vrc_t70.exceptions import BadCrc, WrongBytesCount
+from vrc_t70.frame import FLOAT, VrcT70Frame, frame_size
+from vrc_t70.response import TemperatureOnTrunkResponse, VrcT70Response
+from vrc_t70.simulator import make_response_frame
+
+
+def test_frame_decodes_header_and_data():
+    raw = make_response_frame(0x01, 0x09, 0x2233, 0x00, bytearray([0xaa, 0xbb]))
+    frame = VrcT70Frame(raw)
+
+    assert frame.address == 0x01
+    assert frame.id_event == 0x09
+    assert frame.sequence_id == 0x2233
+    assert frame.processing_result == 0x00
+    assert frame.data_length == 2
+    assert frame.data == bytearray([0xaa, 0xbb])
+    assert frame.crc == 0x72
+    assert bytes(frame) == raw
+
+
+def test_frame_keeps_buffer():
+    raw = bytes(make_response_frame(0x01, 0x01, 0x0000, 0x00, bytearray([0x01])))
+    frame = VrcT70Frame(raw)
+
+    assert frame.buffer is raw
+    assert frame.data == b"\x01"
+
+
+def test_frame_size_by_header():
+    raw = make_response_frame(0x01, 0x03, 0x0001, 0x00, bytearray(51))
+
+    assert frame_size(raw[:6]) == len(raw) == 58
+
+
+def test_frame_rejects_bad_crc():
+    raw = bytearray(make_response_frame(0x01, 0x01, 0x2233))
+    raw[-1] ^= 0xff
+
+    with pytest.raises(BadCrc):
+        VrcT70Frame(raw)
+
+
+def test_frame_rejects_wrong_length():
+    raw = make_response_frame(0x01, 0x01, 0x2233, 0x00, bytearray([0x01, 0x02]))
+
+    with pytest.raises(WrongBytesCount):
+        VrcT70Frame(raw[:-1])
+
+    with pytest.raises(WrongBytesCount):
+        VrcT70Frame(raw[:4])
+
+
+def test_frame_typed_fields_unpacked_by_offset():
+    data = bytearray([0x02, 0x01]) + struct.pack("<f", 12.5)
+    frame = VrcT70Frame(make_response_frame(0x01, 0x03, 0x0001, 0x00, data))
+
+    assert frame.unpack_from(FLOAT, 2) == (12.5,)
+
+
+def test_response_from_frame():
+    data = bytearray([0x02, 0x01]) + struct.pack("<f", 12.5)
+    frame = VrcT70Frame(make_response_frame(0x01, 0x03, 0x0001, 0x00, data))
+
+    res = VrcT70Response.from_frame(frame)
+
+    assert isinstance(res, TemperatureOnTrunkResponse)
+    assert res.is_crc_valid()
+    assert res.data == bytes(data)
+    assert res.trunk_number() == 2
+    assert res.is_connected(0)
+    assert res.temperature(0) == 12.5
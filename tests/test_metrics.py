@@ -0,0 +1,127 @@
+import pytest
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.commands import VrcT70Commands
+from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.exceptions import BadCrc, NoAnswerFromController, ProcessingError, WrongBytesCount
+from vrc_t70.metrics import ErrorKind, Histogram, MetricsRegistry, error_kind
+from vrc_t70.retry_policy import RetryPolicy
+from vrc_t70.simulator import VirtualBus, VirtualController, make_response_frame
+
+from .shared import FakeSerial, make_communicator
+
+
+def test_histogram_buckets():
+    histogram = Histogram((0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 0.5):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(0.565)
+
+
+def test_error_kind():
+    assert error_kind(WrongBytesCount()) == ErrorKind.TIMEOUT
+    assert error_kind(WrongBytesCount(), received_bytes_count=3) == ErrorKind.FRAMING
+    assert error_kind(BadCrc()) == ErrorKind.CRC
+    assert error_kind(ProcessingError("", 0x01)) == ErrorKind.PROCESSING
+    assert error_kind(ValueError()) is None
+
+
+def test_successful_calls_metrics():
+    communicator = make_communicator(VirtualBus([VirtualController(0x01, [2])]))
+
+    for _ in range(3):
+        communicator.get_temperature_on_trunk(1)
+
+    stats = communicator.bus.metrics.snapshot()[("", 0x01, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK)]
+
+    assert stats.calls_count == 3
+    assert stats.attempts_count == 3
+    assert stats.retries_count == 0
+    assert stats.failed_calls_count == 0
+    assert stats.bytes_sent == 3 * 7
+    assert stats.bytes_received == 3 * (7 + 1 + 2 * 5)
+    assert stats.latency_count == 3
+    assert sum(stats.latency_counts) == 3
+
+
+def test_retries_and_errors_are_counted():
+    virtual_bus = VirtualBus([VirtualController(0x01, [2])], drop_rate=0.3, crc_error_rate=0.3, seed=3)
+    communicator = make_communicator(virtual_bus, retry_policy=RetryPolicy(transport_retries=30))
+
+    for _ in range(20):
+        communicator.get_sensors_count_on_trunk(1)
+
+    stats = communicator.bus.metrics.snapshot()[("", 0x01, VrcT70Commands.GET_SENSORS_COUNT_ON_TRUNK)]
+
+    assert stats.calls_count == 20
+    assert stats.attempts_count == virtual_bus.requests_count
+    assert stats.retries_count == virtual_bus.requests_count - 20
+    assert stats.errors[ErrorKind.TIMEOUT] == virtual_bus.dropped_count
+    assert stats.errors[ErrorKind.CRC] == virtual_bus.corrupted_count
+
+
+def test_failed_calls_are_counted():
+    virtual_bus = VirtualBus([VirtualController(0x01, [1])])
+    communicator = make_communicator(virtual_bus, address=0x02, retry_policy=RetryPolicy(transport_retries=1))
+
+    with pytest.raises(NoAnswerFromController):
+        communicator.ping()
+
+    communicator.controller_address = 0x01
+    with pytest.raises(ProcessingError):
+        communicator.get_temperature_on_sensor_on_trunk(1, 7)
+
+    snapshot = communicator.bus.metrics.snapshot()
+
+    stats = snapshot[("", 0x02, VrcT70Commands.PING)]
+    assert (stats.calls_count, stats.attempts_count, stats.failed_calls_count, stats.timeouts_count) == (1, 2, 1, 1)
+    assert stats.errors[ErrorKind.TIMEOUT] == 2
+
+    stats = snapshot[("", 0x01, VrcT70Commands.GET_TEMPERATURE_OF_SENSOR_ON_TRUNK)]
+    assert (stats.failed_calls_count, stats.timeouts_count) == (1, 0)
+    assert stats.errors[ErrorKind.PROCESSING] == 1
+
+
+def test_shared_registry_and_prometheus_dump():
+    registry = MetricsRegistry()
+
+    first = make_communicator(VirtualBus([VirtualController(0x01)]), metrics=registry)
+    first.bus.port_name = "COM1"
+    second = make_communicator(VirtualBus([VirtualController(0x05)]), address=0x05, metrics=registry)
+    second.bus.port_name = "COM2"
+
+    first.ping()
+    second.get_sensors_count_on_trunk(1)
+
+    assert set(registry.snapshot()) == {
+        ("COM1", 0x01, VrcT70Commands.PING),
+        ("COM2", 0x05, VrcT70Commands.GET_SENSORS_COUNT_ON_TRUNK),
+    }
+
+    text = registry.to_prometheus()
+
+    assert "# TYPE vrc_t70_calls_total counter" in text
+    assert 'vrc_t70_calls_total{port="COM1",controller="0x01",command="ping"} 1' in text
+    assert 'vrc_t70_errors_total{port="COM1",controller="0x01",command="ping",kind="crc"} 0' in text
+    assert 'vrc_t70_call_latency_seconds_bucket{port="COM1",controller="0x01",command="ping",le="+Inf"} 1' in text
+    assert 'vrc_t70_call_latency_seconds_count{port="COM1",controller="0x01",command="ping"} 1' in text
+    assert 'vrc_t70_attempts_total{port="COM2",controller="0x05",command="get_sensors_count_on_trunk"} 1' in text
+    assert text.endswith("\n")
+
+
+def test_line_counters_are_exported():
+    garbage = b"\xff\x00"
+
+    def responder(request):
+        sequence_id = (request[2] << 8) | request[3]
+        return garbage + make_response_frame(0x01, VrcT70Commands.PING, sequence_id)
+
+    bus = VrcT70Bus(FakeSerial(responder))
+    bus.make_delay_before_request = lambda: None
+    VrcT70Communicator(bus, 0x01).ping()
+
+    assert bus.metrics.lines_snapshot()[""].discarded_bytes_count == len(garbage)
+    assert 'vrc_t70_discarded_bytes_total{port=""} 2' in bus.metrics.to_prometheus()
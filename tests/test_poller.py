@@ -0,0 +1,134 @@
+import struct
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.commands import VrcT70Commands
+from vrc_t70.error_codes import VrcT70ErrorCodes
+from vrc_t70.frame import MIN_FRAME_SIZE
+from vrc_t70.poller import VrcT70Poller
+from vrc_t70.simulator import make_response_frame
+
+from .shared import FakeSerial
+
+
+def make_responder(sensors_per_trunk):
+    # sensors_per_trunk - {(address, trunk_number): sensors_count}
+    requests = []
+
+    def responder(request):
+        address, command = request[0], request[1]
+        sequence_id = (request[2] << 8) | request[3]
+        requests.append((address, command))
+
+        if address not in {item[0] for item in sensors_per_trunk}:
+            return None
+
+        trunk_number = request[5]
+        sensors_count = sensors_per_trunk.get((address, trunk_number), 0)
+
+        if command == VrcT70Commands.GET_SENSORS_COUNT_ON_TRUNK:
+            data = bytearray([trunk_number, sensors_count])
+        elif command == VrcT70Commands.GET_TEMPERATURES_ON_TRUNK:
+            data = bytearray([trunk_number])
+            for index in range(sensors_count):
+                data.append(0x01)
+                data.extend(struct.pack("<f", address * 10.0 + index))
+        else:
+            data = None
+
+        return make_response_frame(address, command, sequence_id, data=data)
+
+    return responder, requests
+
+
+def make_poller(sensors_per_trunk, addresses):
+    responder, requests = make_responder(sensors_per_trunk)
+    serial = FakeSerial(responder)
+    serial.baudrate = 115200
+
+    bus = VrcT70Bus(serial)
+    bus.make_delay_before_request = lambda: None
+
+    return VrcT70Poller(bus, addresses, refresh_period=0.001), requests
+
+
+def test_poller_discovers_only_non_empty_trunks():
+    poller, _ = make_poller({(1, 2): 3, (1, 7): 1, (5, 1): 10}, [5, 1])
+
+    assert poller.discover_trunks() == [(1, 2), (1, 7), (5, 1)]
+
+
+def test_poller_skips_offline_controllers():
+    poller, requests = make_poller({(1, 2): 3}, [1, 9])
+
+    assert poller.discover_trunks() == [(1, 2)]
+    # offline controller is not asked for each trunk
+    assert len([item for item in requests if item[0] == 9]) == 3
+
+
+def test_poller_skips_trunk_with_processing_error():
+    responder, _ = make_responder({(1, 2): 3, (1, 5): 1})
+
+    def failing_responder(request):
+        if (request[1] == VrcT70Commands.GET_SENSORS_COUNT_ON_TRUNK) and (request[5] == 3):
+            sequence_id = (request[2] << 8) | request[3]
+            return make_response_frame(0x01, request[1], sequence_id, VrcT70ErrorCodes.INCORRECT_VALUE)
+
+        return responder(request)
+
+    serial = FakeSerial(failing_responder)
+    bus = VrcT70Bus(serial)
+    bus.make_delay_before_request = lambda: None
+
+    assert VrcT70Poller(bus, [1]).discover_trunks() == [(1, 2), (1, 5)]
+
+
+def test_poller_counts_wire_bytes_of_sent_and_received_frames():
+    poller, _ = make_poller({(1, 2): 3}, [1])
+    poller.refresh_period = 1.0
+    poller.discover_trunks()
+
+    snapshot = poller.poll_once()
+
+    # request: header, trunk number and crc; response: header, trunk number, 3 records and crc
+    wire_bytes_count = 7 + MIN_FRAME_SIZE + 1 + 3 * 5
+    assert snapshot.wire_utilization == wire_bytes_count * 10 / 115200 / 1.0
+
+
+def test_poller_requests_only_non_empty_trunks():
+    poller, requests = make_poller({(1, 2): 3, (5, 1): 10}, [1, 5])
+    poller.discover_trunks()
+    del requests[:]
+
+    snapshot = poller.poll_once()
+
+    assert requests == [(1, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK), (5, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK)]
+    assert sorted(snapshot.trunks.keys()) == [(1, 2), (5, 1)]
+    assert snapshot.trunks[(5, 1)].temperature(3) == 53.0
+    assert not snapshot.errors
+    assert snapshot.cycle_number == 1
+    assert snapshot.bus_utilization > 0
+    assert 0 < snapshot.wire_utilization
+
+
+def test_poller_cycle_period_respects_refresh_period_and_bus_load():
+    poller, _ = make_poller({(1, 1): 1}, [1])
+    poller.refresh_period = 0.1
+    poller.discover_trunks()
+
+    poller.round_trip_time = 0.005
+    assert poller.cycle_period() == 0.1
+
+    poller.trunks = [(1, trunk_number) for trunk_number in range(1, 8)] * 3
+    assert poller.cycle_period() == 21 * (0.02 + 0.005)
+
+
+def test_poller_generator_and_callback():
+    poller, _ = make_poller({(1, 1): 2}, [1])
+
+    snapshots = list(poller.snapshots(cycles_count=3))
+    assert [item.cycle_number for item in snapshots] == [1, 2, 3]
+
+    received = []
+    poller.run(received.append, cycles_count=2)
+    assert [item.cycle_number for item in received] == [4, 5]
+    assert poller.round_trip_time is not None
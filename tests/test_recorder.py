@@ -0,0 +1,119 @@
+import math
+import os
+import struct
+
+import numpy
+
+from vrc_t70.recorder import (RECORD_SIZE, SEGMENT_HEADER_SIZE, STATUS_DISCONNECTED, STATUS_OK, TimeSeriesReader,
+                              TimeSeriesRecorder)
+from vrc_t70.response import TemperatureOnTrunkResponse
+from vrc_t70.simulator import make_response_frame
+
+from .shared import bytearray_to_response
+
+
+def make_readings(begin, seconds_count, controllers=(1, 2), trunks=(1, 2), sensors_count=3):
+    res = []
+    for second in range(seconds_count):
+        for controller in controllers:
+            for trunk in trunks:
+                for index in range(sensors_count):
+                    res.append((begin + second, controller, trunk, index, 20.0 + second, STATUS_OK))
+
+    return res
+
+
+def test_recorder_appends_fixed_width_records(tmp_path):
+    with TimeSeriesRecorder(str(tmp_path)) as recorder:
+        recorder.append_many(make_readings(1000.0, 10))
+        segment_path = recorder.segment_path
+
+    assert recorder.records_count == 10 * 2 * 2 * 3
+    assert os.path.getsize(segment_path) == SEGMENT_HEADER_SIZE + recorder.records_count * RECORD_SIZE
+
+
+def test_reader_slices_by_time_and_sensor(tmp_path):
+    with TimeSeriesRecorder(str(tmp_path)) as recorder:
+        recorder.append_many(make_readings(1000.0, 100))
+
+    reader = TimeSeriesReader(str(tmp_path))
+
+    readings = list(reader.read(begin=1010.0, end=1020.0, controller=2, trunk=1, index=1))
+    assert [item.timestamp for item in readings] == [1000.0 + second for second in range(10, 20)]
+    assert all((item.controller, item.trunk, item.index) == (2, 1, 1) for item in readings)
+    assert readings[0].temperature == 30.0
+
+    assert len(list(reader.read())) == 100 * 12
+    assert list(reader.read(begin=2000.0)) == []
+    assert list(reader.read(end=1000.0)) == []
+
+
+def test_reader_numpy_matches_plain_reader(tmp_path):
+    with TimeSeriesRecorder(str(tmp_path), max_segment_size=SEGMENT_HEADER_SIZE + RECORD_SIZE * 100) as recorder:
+        recorder.append_many(make_readings(1000.0, 50))
+
+    reader = TimeSeriesReader(str(tmp_path))
+    assert len(reader.segments()) > 1
+
+    plain = list(reader.read(begin=1005.5, end=1040.0, trunk=2))
+    records = reader.read_numpy(begin=1005.5, end=1040.0, trunk=2)
+
+    assert len(records) == len(plain)
+    assert numpy.array_equal(records["timestamp"], [item.timestamp for item in plain])
+    assert numpy.array_equal(records["controller"], [item.controller for item in plain])
+    assert numpy.array_equal(records["temperature"], [item.temperature for item in plain])
+
+
+def test_segments_rotation(tmp_path):
+    with TimeSeriesRecorder(str(tmp_path), segment_duration=10) as recorder:
+        recorder.append_many(make_readings(1000.0, 25, controllers=(1,), trunks=(1,), sensors_count=1))
+
+        # clock went back, new segment is started so every segment stays sorted
+        recorder.append(1005.0, 1, 1, 0, 1.0)
+
+    segments = TimeSeriesReader(str(tmp_path)).segments()
+    assert [item.records_count for item in segments] == [10, 1, 10, 5]
+    assert all(item.first_timestamp <= item.last_timestamp for item in segments)
+
+
+def test_retention_by_age_and_size(tmp_path):
+    recorder = TimeSeriesRecorder(str(tmp_path), segment_duration=10)
+    recorder.append_many(make_readings(1000.0, 50, controllers=(1,), trunks=(1,), sensors_count=1))
+    recorder.flush()
+    assert len(TimeSeriesReader(str(tmp_path)).segments()) == 5
+
+    recorder.retention = 20
+    recorder.apply_retention(now=1050.0)
+    assert [item.first_timestamp for item in TimeSeriesReader(str(tmp_path)).segments()] == [1030.0, 1040.0]
+
+    recorder.max_total_size = 1
+    recorder.apply_retention(now=1050.0)
+    assert [item.first_timestamp for item in TimeSeriesReader(str(tmp_path)).segments()] == [1040.0]
+
+    recorder.close()
+
+
+def test_reader_ignores_incomplete_record(tmp_path):
+    with TimeSeriesRecorder(str(tmp_path)) as recorder:
+        recorder.append_many(make_readings(1000.0, 2))
+        segment_path = recorder.segment_path
+
+    with open(segment_path, "ab") as f:
+        f.write(b"\x00" * (RECORD_SIZE // 2))
+
+    assert len(list(TimeSeriesReader(str(tmp_path)).read())) == 2 * 12
+
+
+def test_record_trunk_response(tmp_path):
+    data = bytearray([0x02]) + struct.pack("<BfBf", 1, 22.0, 0, 31.0)
+    response = TemperatureOnTrunkResponse(bytearray_to_response(make_response_frame(0x01, 0x03, 0x0000, data=data)))
+
+    with TimeSeriesRecorder(str(tmp_path)) as recorder:
+        recorder.record_trunk(1000.0, response)
+
+    readings = list(TimeSeriesReader(str(tmp_path)).read())
+    assert [(item.controller, item.trunk, item.index) for item in readings] == [(1, 2, 0), (1, 2, 1)]
+    assert readings[0].status == STATUS_OK
+    assert readings[0].temperature == 22.0
+    assert readings[1].status == STATUS_DISCONNECTED
+    assert math.isnan(readings[1].temperature)
@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.bus_owner import VrcT70BusOwner
+from vrc_t70.exceptions import NoAnswerFromController
+from vrc_t70.response import TemperatureOnTrunkResponse
+from vrc_t70.response_cache import VrcT70CachingCommunicator
+from vrc_t70.simulator import LoopbackSerial, VirtualBus, VirtualController
+
+from .shared import FakeClock, make_communicator, make_loopback_bus
+
+
+def test_fresh_responses_are_served_from_cache():
+    virtual_bus = VirtualBus([VirtualController(0x01, [2, 1])])
+    clock = FakeClock()
+    communicator = VrcT70CachingCommunicator(make_communicator(virtual_bus), clock=clock)
+
+    first = communicator.get_temperature_on_trunk(1)
+    clock.now = 0.09
+    assert communicator.get_temperature_on_trunk(1) is first
+    assert isinstance(first, TemperatureOnTrunkResponse)
+    assert virtual_bus.requests_count == 1
+
+    communicator.get_temperature_on_trunk(2)
+    communicator.get_temperature_on_sensor_on_trunk(1, 1)
+    communicator.get_temperature_on_sensor_on_trunk(1, 1)
+    assert virtual_bus.requests_count == 3
+
+    clock.now = 0.2
+    assert communicator.get_temperature_on_trunk(1) is not first
+    assert virtual_bus.requests_count == 4
+
+    # not temperatures commands are never cached
+    communicator.ping()
+    communicator.ping()
+    assert virtual_bus.requests_count == 6
+    assert (communicator.hits_count, communicator.misses_count) == (2, 4)
+
+
+def test_concurrent_requests_are_coalesced():
+    virtual_bus = VirtualBus([VirtualController(0x01, [2])], latency=0.05)
+    bus = make_loopback_bus(virtual_bus, timeout=0.2)
+
+    results = []
+    with VrcT70BusOwner(bus) as owner:
+        communicator = VrcT70CachingCommunicator(owner.communicator(0x01, blocking=True))
+        barrier = threading.Barrier(10)
+
+        def consumer():
+            barrier.wait()
+            results.append(communicator.get_temperature_on_trunk(1))
+
+        threads = [threading.Thread(target=consumer) for _ in range(10)]
+        for item in threads:
+            item.start()
+
+        for item in threads:
+            item.join()
+
+    assert len(results) == 10
+    assert all(item is results[0] for item in results)
+    assert virtual_bus.requests_count == 1
+    assert communicator.misses_count == 1
+    assert communicator.hits_count + communicator.coalesced_count == 9
+
+
+def test_least_recently_used_responses_are_evicted():
+    virtual_bus = VirtualBus([VirtualController(0x01, [1, 1, 1])])
+    communicator = VrcT70CachingCommunicator(make_communicator(virtual_bus), max_cached_responses=2, clock=FakeClock())
+
+    communicator.get_temperature_on_trunk(1)
+    communicator.get_temperature_on_trunk(2)
+    communicator.get_temperature_on_trunk(1)
+    communicator.get_temperature_on_trunk(3)
+    assert len(communicator) == 2
+
+    communicator.get_temperature_on_trunk(1)
+    assert virtual_bus.requests_count == 3
+
+    communicator.get_temperature_on_trunk(2)
+    assert virtual_bus.requests_count == 4
+
+
+def test_failures_are_not_cached_and_rescan_invalidates():
+    virtual_bus = VirtualBus([VirtualController(0x01, [1])])
+    communicator = VrcT70CachingCommunicator(make_communicator(virtual_bus, 0x02), clock=FakeClock())
+
+    for _ in range(2):
+        with pytest.raises(NoAnswerFromController):
+            communicator.get_temperature_on_trunk(1)
+
+    assert len(communicator) == 0
+
+    communicator = VrcT70CachingCommunicator(make_communicator(virtual_bus), clock=FakeClock())
+    communicator.get_temperature_on_trunk(1)
+    communicator.rescan_sensors_on_trunk(1)
+    assert len(communicator) == 0
+
+    requests_count = virtual_bus.requests_count
+    communicator.get_temperature_on_trunk(1)
+    assert virtual_bus.requests_count == requests_count + 1
+
+
+def test_requests_to_plain_communicator_are_serialized():
+    virtual_bus = VirtualBus([VirtualController(0x01, [1, 2, 3, 4])], latency=0.005)
+    communicator = VrcT70CachingCommunicator(make_communicator(virtual_bus))
+    errors = []
+
+    def consumer(trunk_number):
+        try:
+            for _ in range(5):
+                r = communicator.get_temperature_on_trunk(trunk_number)
+                assert (r.trunk_number(), r.temperatures_count()) == (trunk_number, trunk_number)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=consumer, args=(trunk_number, )) for trunk_number in range(1, 5)]
+    for item in threads:
+        item.start()
+
+    for item in threads:
+        item.join()
+
+    assert errors == []
+    assert communicator.bus.stale_frames_count == 0
+
+
+def test_non_blocking_shared_communicator_is_rejected():
+    owner = VrcT70BusOwner(VrcT70Bus(LoopbackSerial(VirtualBus())))
+
+    with pytest.raises(ValueError):
+        VrcT70CachingCommunicator(owner.communicator(0x01))
@@ -1,10 +1,13 @@
 import binascii
 import struct
 
+from vrc_t70.commands import VrcT70Commands
+from vrc_t70.frame import VrcT70Frame
 from vrc_t70.limitations import MAX_SENSORS_PER_TRUNK
 from vrc_t70.response import ControllerNewAddressResponse, SensorUniqueAddressOnTrunkResponse, SensorUniqueIdResponse, \
     SessionIdResponse, TemperatureOnSensorResponse, TemperatureOnTrunkResponse, TrunkSensortsCountResponse, \
     VrcT70Response
+from vrc_t70.simulator import make_response_frame
 
 from .shared import bytearray_to_response
 
@@ -136,3 +139,40 @@ def test_trunk_unique_addresses_parseer_successfully_parses_valid_data():
     for index in range(MAX_SENSORS_PER_TRUNK):
         assert not res.is_error_detected(index)
         assert res.sensor_unique_address(index) == binascii.unhexlify(expected_sensor_address)
+
+
+def test_responses_have_no_instance_dict():
+    res = TrunkSensortsCountResponse(bytearray_to_response("0102223300020103", False))
+
+    assert not hasattr(VrcT70Response(), "__dict__")
+    assert not hasattr(res, "__dict__")
+
+
+def test_response_from_frame_is_typed_by_event_id():
+    frame = VrcT70Frame(
+        make_response_frame(0x01, VrcT70Commands.GET_SESSION_ID, 0x2233, data=b"\xaa\xbb\xcc\xdd")
+    )
+    res = VrcT70Response.from_frame(frame)
+
+    assert type(res) is SessionIdResponse
+    assert res.typed is res
+    assert res.session_id() == bytearray([0xaa, 0xbb, 0xcc, 0xdd])
+    assert res.data == b"\xaa\xbb\xcc\xdd"
+    assert res.is_crc_valid()
+
+
+def test_typed_view_is_created_once_and_shares_data():
+    res = bytearray_to_response("01032233000207ff", False)
+
+    typed = res.typed
+
+    assert type(typed) is TemperatureOnTrunkResponse
+    assert res.typed is typed
+    assert typed.data is res.data
+    assert typed.trunk_number() == 7
+
+
+def test_unknown_event_id_has_no_typed_view():
+    res = bytearray_to_response("01ee22330000", False)
+
+    assert type(res.typed) is VrcT70Response
@@ -0,0 +1,139 @@
+import pytest
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.error_codes import VrcT70ErrorCodes
+from vrc_t70.exceptions import (BadCrc, NoAnswerFromController, ProcessingError, SensorBusy, SensorError,
+                                WrongBytesCount, WrongEventId)
+from vrc_t70.retry_policy import FailureClass, RetryPolicy, classify_failure
+from vrc_t70.simulator import make_response_frame
+
+from .shared import FakeSerial
+
+
+def make_communicator(processing_results, policy=None):
+    # controller answers with processing results from list, last one is repeated
+    processing_results = list(processing_results)
+
+    def responder(request):
+        processing_result = processing_results.pop(0) if len(processing_results) > 1 else processing_results[0]
+        if processing_result is None:
+            return None
+
+        sequence_id = (request[2] << 8) | request[3]
+        return make_response_frame(request[0], request[1], sequence_id, processing_result)
+
+    serial = FakeSerial(responder)
+    bus = VrcT70Bus(serial, adaptive_timeouts=False)
+    bus.make_delay_before_request = lambda: None
+
+    return VrcT70Communicator(bus, 0x01, retry_policy=policy), serial
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    res = []
+    monkeypatch.setattr("vrc_t70.base_communicator.time.sleep", res.append)
+    return res
+
+
+def test_failures_classification():
+    assert classify_failure(BadCrc()) == FailureClass.TRANSPORT
+    assert classify_failure(WrongBytesCount()) == FailureClass.TRANSPORT
+    assert classify_failure(WrongEventId()) == FailureClass.PROTOCOL
+    assert classify_failure(SensorBusy("busy", VrcT70ErrorCodes.DS18B20_BUSY)) == FailureClass.DEVICE
+    assert classify_failure(SensorError("error", VrcT70ErrorCodes.DS18B20_ERROR)) == FailureClass.DEVICE
+    assert classify_failure(ProcessingError("error", VrcT70ErrorCodes.INCORRECT_VALUE)) is None
+
+
+def test_backoff_grows_and_is_limited():
+    policy = RetryPolicy(device_backoff=0.1, multiplier=2.0, max_backoff=0.3, jitter=0.0)
+
+    assert policy.backoff_delay(FailureClass.DEVICE, 1) == 0.1
+    assert policy.backoff_delay(FailureClass.DEVICE, 2) == 0.2
+    assert policy.backoff_delay(FailureClass.DEVICE, 3) == 0.3
+    assert policy.backoff_delay(FailureClass.TRANSPORT, 3) == 0.0
+
+
+def test_backoff_jitter():
+    policy = RetryPolicy(device_backoff=0.1, jitter=0.2)
+
+    for _ in range(100):
+        assert 0.08 <= policy.backoff_delay(FailureClass.DEVICE, 1) <= 0.12
+
+
+def test_busy_sensor_retried_after_backoff(sleeps):
+    communicator, serial = make_communicator([VrcT70ErrorCodes.DS18B20_BUSY, VrcT70ErrorCodes.NO_ERROR])
+
+    res = communicator.ping()
+
+    assert res.processing_result == VrcT70ErrorCodes.NO_ERROR
+    assert len(serial.written) == 2
+    assert len(sleeps) == 1
+    assert 0.08 <= sleeps[0] <= 0.12
+
+
+def test_busy_sensor_raises_when_budget_exhausted(sleeps):
+    communicator, serial = make_communicator([VrcT70ErrorCodes.DS18B20_BUSY], RetryPolicy(device_retries=3))
+
+    with pytest.raises(SensorBusy) as e:
+        communicator.ping()
+
+    assert e.value.processing_result == VrcT70ErrorCodes.DS18B20_BUSY
+    assert len(serial.written) == 4
+    assert len(sleeps) == 3
+
+
+def test_processing_error_is_not_retried(sleeps):
+    communicator, serial = make_communicator([VrcT70ErrorCodes.INCORRECT_VALUE])
+
+    with pytest.raises(ProcessingError):
+        communicator.get_temperature_on_trunk(9)
+
+    assert len(serial.written) == 1
+
+
+def test_transport_budget_keeps_default_attempts_count(sleeps):
+    communicator, serial = make_communicator([None])
+
+    with pytest.raises(NoAnswerFromController):
+        communicator.ping()
+
+    assert len(serial.written) == 3
+    assert not sleeps
+
+
+def test_deadline_stops_retries(sleeps):
+    policy = RetryPolicy(device_retries=10, device_backoff=0.5, jitter=0.0, deadline=0.3)
+    communicator, serial = make_communicator([VrcT70ErrorCodes.DS18B20_BUSY], policy)
+
+    with pytest.raises(SensorBusy):
+        communicator.ping()
+
+    assert len(serial.written) == 1
+    assert not sleeps
+
+
+def test_deadline_limits_read_timeout():
+    policy = RetryPolicy(deadline=0.05)
+    communicator, serial = make_communicator([VrcT70ErrorCodes.NO_ERROR], policy)
+    serial.timeout = 1.0
+
+    timeouts = []
+    responder = serial.responder
+
+    def recording_responder(request):
+        timeouts.append(serial.timeout)
+        return responder(request)
+
+    serial.responder = recording_responder
+    communicator.ping()
+
+    assert timeouts[0] <= 0.05
+    assert serial.timeout == 1.0
+
+    # next call without deadline waits for full port timeout
+    communicator.retry_policy = RetryPolicy()
+    communicator.ping()
+
+    assert timeouts[1] == 1.0
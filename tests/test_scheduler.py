@@ -0,0 +1,197 @@
+import time
+
+import pytest
+
+from vrc_t70.bus_owner import VrcT70BusOwner
+from vrc_t70.exceptions import DeadlineExceeded
+from vrc_t70.scheduler import (ClassPolicy, ClassScheduler, PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL,
+                               PriorityScheduler, TrafficClass, traffic_class_for_priority)
+from vrc_t70.simulator import VirtualBus, VirtualController
+
+from .shared import FakeClock, make_loopback_bus
+
+
+def serve(scheduler, clock, durations):
+    # serves jobs until scheduler is empty, returns served jobs in order
+    res = []
+    while len(scheduler):
+        job = scheduler.get()
+        clock.now += durations.get(job[0], 0.01)
+        scheduler.complete(job, durations.get(job[0], 0.01))
+        res.append(job)
+
+    return res
+
+
+def test_priority_scheduler_accepts_traffic_classes():
+    scheduler = PriorityScheduler()
+    scheduler.put("rescan", TrafficClass.RESCAN)
+    scheduler.put("poll", TrafficClass.POLL)
+    scheduler.put("interactive", TrafficClass.INTERACTIVE)
+    scheduler.put("high", 0)
+
+    assert [scheduler.get() for _ in range(4)] == ["interactive", "high", "poll", "rescan"]
+
+    scheduler.close()
+    assert scheduler.get() is None
+
+
+def test_bus_time_is_shared_by_classes():
+    clock = FakeClock()
+    policies = {
+        TrafficClass.POLL: ClassPolicy(share=0.6, deadline=None),
+        TrafficClass.BACKGROUND: ClassPolicy(share=0.3, deadline=None),
+        TrafficClass.RESCAN: ClassPolicy(share=0.1, deadline=None),
+    }
+    scheduler = ClassScheduler(policies, clock=clock)
+
+    for index in range(200):
+        for name in policies:
+            scheduler.put((name, index), name)
+
+    # rescan frames are ten times longer
+    durations = {TrafficClass.RESCAN: 0.1}
+    busy_time = dict.fromkeys(policies, 0.0)
+    for _ in range(300):
+        job = scheduler.get()
+        duration = durations.get(job[0], 0.01)
+        scheduler.complete(job, duration)
+        busy_time[job[0]] += duration
+
+    total = sum(busy_time.values())
+    assert abs(busy_time[TrafficClass.POLL] / total - 0.6) < 0.05
+    assert abs(busy_time[TrafficClass.BACKGROUND] / total - 0.3) < 0.05
+    assert abs(busy_time[TrafficClass.RESCAN] / total - 0.1) < 0.05
+
+
+def test_idle_class_is_served_next_without_banked_bandwidth():
+    clock = FakeClock()
+    scheduler = ClassScheduler(clock=clock)
+
+    for index in range(100):
+        scheduler.put(("poll", index), TrafficClass.POLL)
+
+    for _ in range(50):
+        job = scheduler.get()
+        scheduler.complete(job, 0.02)
+
+    for index in range(20):
+        scheduler.put(("interactive", index), TrafficClass.INTERACTIVE)
+
+    order = [job[0] for job in serve(scheduler, clock, dict())]
+    assert order[0] == "interactive"
+    # interactive and poll have the same shares, so after first request they are interleaved
+    # instead of serving all interactive requests for time when interactive class was idle
+    assert 5 <= order[:10].count("interactive") <= 7
+
+
+def test_rescan_is_preempted_at_frame_boundaries_and_deadlines_are_kept():
+    clock = FakeClock()
+    scheduler = ClassScheduler(clock=clock)
+
+    for index in range(50):
+        scheduler.put(("rescan", index), TrafficClass.RESCAN)
+
+    # first rescan frame is on the line when operator asks for data
+    job = scheduler.get()
+    scheduler.put(("interactive", 0), TrafficClass.INTERACTIVE)
+    clock.now += 0.7
+    scheduler.complete(job, 0.7)
+
+    assert scheduler.get() == ("interactive", 0)
+    clock.now += 0.02
+    scheduler.complete(("interactive", 0), 0.02)
+
+    stats = scheduler.stats()[TrafficClass.INTERACTIVE]
+    assert stats.served_count == 1
+    assert stats.expired_count == 0
+    assert stats.max_wait_time == 0.7
+    assert scheduler.stats()[TrafficClass.RESCAN].pending_count == 49
+
+
+def test_urgent_request_is_served_before_fair_order():
+    clock = FakeClock()
+    scheduler = ClassScheduler(urgency_margin=0.5, clock=clock)
+
+    scheduler.put("background", TrafficClass.BACKGROUND)
+    clock.now = 9.6
+    for index in range(100):
+        scheduler.put(("poll", index), TrafficClass.POLL)
+
+    # background request deadline (10 seconds) is in 0.4 seconds
+    assert scheduler.get() == "background"
+
+
+def test_bus_owner_serves_interactive_read_between_rescan_frames():
+    bus = make_loopback_bus(VirtualBus([VirtualController(0x01, [3])]))
+
+    with VrcT70BusOwner(bus, scheduler=ClassScheduler()) as owner:
+        rescans = [owner.run(time.sleep, 0.03, priority=TrafficClass.RESCAN) for _ in range(10)]
+        time.sleep(0.05)
+
+        begin = time.monotonic()
+        r = owner.communicator(0x01, TrafficClass.INTERACTIVE).get_temperature_on_trunk(1).result(timeout=5.0)
+        latency = time.monotonic() - begin
+
+        assert r.temperatures_count() == 3
+        assert not all(item.done() for item in rescans)
+
+    # waited for one rescan frame at most
+    assert latency < 0.2
+    assert all(item.done() for item in rescans)
+
+
+def test_requests_after_deadline_are_expired():
+    clock = FakeClock()
+    scheduler = ClassScheduler({TrafficClass.POLL: ClassPolicy(share=0.4, deadline=1.0)}, clock=clock)
+    expired = []
+
+    scheduler.put(("poll", 0), TrafficClass.POLL)
+    scheduler.put(("rescan", 0), TrafficClass.RESCAN)
+    clock.now = 1.5
+    scheduler.put(("poll", 1), TrafficClass.POLL)
+
+    assert scheduler.get(expired.append) == ("poll", 1)
+    assert expired == [("poll", 0)]
+    assert scheduler.stats()[TrafficClass.POLL].expired_count == 1
+    assert scheduler.get(expired.append) == ("rescan", 0)
+
+
+def test_integer_priorities_are_mapped_to_classes():
+    assert traffic_class_for_priority(PRIORITY_HIGH) == TrafficClass.INTERACTIVE
+    assert traffic_class_for_priority(PRIORITY_NORMAL) == TrafficClass.POLL
+    assert traffic_class_for_priority(PRIORITY_NORMAL + 1) == TrafficClass.BACKGROUND
+    assert traffic_class_for_priority(PRIORITY_LOW) == TrafficClass.RESCAN
+    assert traffic_class_for_priority(PRIORITY_LOW + 100) == TrafficClass.RESCAN
+
+    with pytest.raises(ValueError):
+        ClassScheduler().put("job", "unknown")
+
+
+def test_bus_owner_default_priorities_with_class_scheduler():
+    bus = make_loopback_bus(VirtualBus([VirtualController(0x01, [2])]))
+    scheduler = ClassScheduler()
+
+    with VrcT70BusOwner(bus, scheduler=scheduler) as owner:
+        assert owner.communicator(0x01).get_temperature_on_trunk(1).result(timeout=5.0).temperatures_count() == 2
+        assert owner.communicator(0x01, blocking=True).probe()
+        assert owner.run(lambda: 42).result(timeout=5.0) == 42
+
+    assert scheduler.stats()[TrafficClass.POLL].served_count == 3
+
+
+def test_bus_owner_fails_expired_requests():
+    bus = make_loopback_bus(VirtualBus([VirtualController(0x01, [2])]))
+    scheduler = ClassScheduler({TrafficClass.POLL: ClassPolicy(share=0.4, deadline=0.05)})
+
+    with VrcT70BusOwner(bus, scheduler=scheduler) as owner:
+        blocker = owner.run(time.sleep, 0.1, priority=TrafficClass.RESCAN)
+        time.sleep(0.02)
+        future = owner.communicator(0x01).get_temperature_on_trunk(1)
+
+        with pytest.raises(DeadlineExceeded):
+            future.result(timeout=5.0)
+
+        blocker.result(timeout=5.0)
+
+    assert bus.serial.virtual_bus.requests_count == 0
@@ -0,0 +1,135 @@
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.response import SensorUniqueAddressOnTrunkResponse
+from vrc_t70.sensor_index import SensorIndex, SensorLocation, SensorMove, rom_address_to_int
+from vrc_t70.simulator import LoopbackSerial, VirtualBus, VirtualController
+from vrc_t70.topology_cache import ControllerTopology
+
+from .shared import bytearray_to_response
+
+SENSOR_A = 0x28ff0930901504a9
+SENSOR_B = 0x28ff0930901504b0
+SENSOR_C = 0x28ff0930901504c7
+
+
+def test_rom_address_conversions():
+    assert rom_address_to_int(bytes.fromhex("28ff0930901504a9")) == SENSOR_A
+    assert rom_address_to_int("28ff0930901504a9") == SENSOR_A
+    assert rom_address_to_int(SENSOR_A) == SENSOR_A
+
+
+def test_lookups_in_both_directions():
+    index = SensorIndex()
+    changes = index.update_trunk("sim0", 1, 2, [SENSOR_A, bytes.fromhex("28ff0930901504b0")])
+
+    assert [address for address, _ in changes.added] == [SENSOR_A, SENSOR_B]
+    assert not changes.moved and not changes.vanished
+
+    assert len(index) == 2
+    assert "28ff0930901504b0" in index
+    assert index.location(SENSOR_B) == SensorLocation("sim0", 1, 2, 1)
+    assert index.address("sim0", 1, 2, 0) == SENSOR_A
+    assert index.address("sim0", 1, 2, 5) is None
+    assert index.address("sim1", 1, 2, 0) is None
+
+
+def test_rescan_reports_moved_added_and_vanished_sensors():
+    index = SensorIndex()
+    index.update_trunk("sim0", 1, 1, [SENSOR_A, SENSOR_B])
+
+    # rescan changed order of sensors, B was disconnected and C was connected
+    changes = index.update_trunk("sim0", 1, 1, [SENSOR_C, SENSOR_A])
+
+    assert changes.added == [(SENSOR_C, SensorLocation("sim0", 1, 1, 0))]
+    assert changes.moved == [SensorMove(SENSOR_A, SensorLocation("sim0", 1, 1, 0), SensorLocation("sim0", 1, 1, 1))]
+    assert changes.vanished == [(SENSOR_B, SensorLocation("sim0", 1, 1, 1))]
+    assert SENSOR_B not in index
+
+    assert not index.update_trunk("sim0", 1, 1, [SENSOR_C, SENSOR_A])
+
+
+def test_sensor_moved_to_other_controller():
+    index = SensorIndex()
+    index.update_trunk("sim0", 1, 1, [SENSOR_A, SENSOR_B])
+
+    changes = index.update_trunk("sim1", 7, 3, [SENSOR_B])
+    assert changes.moved == [SensorMove(SENSOR_B, SensorLocation("sim0", 1, 1, 1), SensorLocation("sim1", 7, 3, 0))]
+
+    # old position is released, so sensor isn't reported as vanished from old trunk
+    assert index.trunk_addresses("sim0", 1, 1) == (SENSOR_A, None)
+    changes = index.update_trunk("sim0", 1, 1, [SENSOR_A])
+    assert not changes
+    assert index.location(SENSOR_B) == SensorLocation("sim1", 7, 3, 0)
+
+
+def test_update_from_response_skips_sensors_with_errors():
+    response = SensorUniqueAddressOnTrunkResponse(
+        bytearray_to_response("010622330013" + "04" + "28ff0930901504a9" + "00" + "28ff0930901504b0" + "01", False)
+    )
+
+    index = SensorIndex()
+    index.update_from_response("sim0", 1, response)
+
+    assert index.trunk_addresses("sim0", 1, 4) == (SENSOR_A, None)
+    assert SENSOR_B not in index
+
+
+def test_update_topology_and_remove_controller():
+    index = SensorIndex()
+    topology = ControllerTopology(
+        session_id=b"\x01\x02\x03\x04",
+        sensors_addresses=[[], [bytes.fromhex("28ff0930901504a9")], [], [bytes.fromhex("28ff0930901504b0")]]
+    )
+
+    changes = index.update_topology("sim0", 2, topology)
+    assert [location.trunk_number for _, location in changes.added] == [2, 4]
+
+    changes = index.remove_controller("sim0", 2)
+    assert sorted(address for address, _ in changes.vanished) == [SENSOR_A, SENSOR_B]
+    assert len(index) == 0
+
+
+def test_invalidated_trunk_keeps_locations_for_moves_detection():
+    reports = []
+    index = SensorIndex(on_changes=reports.append)
+    index.update_trunk("sim0", 1, 1, [SENSOR_A, SENSOR_B])
+    index.invalidate_trunk("sim0", 1, 1)
+
+    assert index.trunk_addresses("sim0", 1, 1) == ()
+    assert index.address("sim0", 1, 1, 0) is None
+    assert index.location(SENSOR_A) is None
+    assert list(index) == []
+
+    index.update_trunk("sim0", 1, 1, [SENSOR_B])
+
+    assert index.location(SENSOR_B) == SensorLocation("sim0", 1, 1, 0)
+    assert [len(item.added) for item in reports] == [2, 0]
+    assert reports[1].moved == [SensorMove(SENSOR_B, SensorLocation("sim0", 1, 1, 1), SensorLocation("sim0", 1, 1, 0))]
+    assert reports[1].vanished == [(SENSOR_A, SensorLocation("sim0", 1, 1, 0))]
+
+
+def test_bus_updates_index_from_traffic():
+    reports = []
+    index = SensorIndex(on_changes=reports.append)
+    controller = VirtualController(0x01, [3, 1])
+    bus = VrcT70Bus(LoopbackSerial(VirtualBus([controller]), timeout=0.05), sensor_index=index)
+    bus.make_delay_before_request = lambda: None
+    communicator = VrcT70Communicator(bus, 0x01)
+
+    communicator.get_sensors_unique_addresses_on_trunk(1)
+    communicator.get_sensors_unique_addresses_on_trunk(2)
+    assert len(index) == 4
+    assert index.location(controller.sensor_address(1, 2)) == SensorLocation("", 0x01, 1, 2)
+
+    # sensors disconnected from both trunks
+    controller.sensors_per_trunk[:2] = [1, 0]
+    communicator.rescan_sensors_on_trunk(1)
+    communicator.rescan_sensors_on_trunk(2)
+
+    assert index.trunk_addresses("", 0x01, 1) == ()
+    vanished_address = rom_address_to_int(controller.sensor_address(2, 0))
+    assert reports[-1].vanished == [(vanished_address, SensorLocation("", 0x01, 2, 0))]
+
+    communicator.get_sensors_unique_addresses_on_trunk(1)
+    assert sorted(location.sensor_index for _, location in reports[-1].vanished) == [1, 2]
+    assert list(index) == [(rom_address_to_int(controller.sensor_address(1, 0)), SensorLocation("", 0x01, 1, 0))]
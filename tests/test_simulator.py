@@ -0,0 +1,157 @@
+import sys
+
+import pytest
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.error_codes import VrcT70ErrorCodes
+from vrc_t70.exceptions import NoAnswerFromController, ProcessingError, SensorBusy
+from vrc_t70.poller import VrcT70Poller
+from vrc_t70.retry_policy import RetryPolicy
+from vrc_t70.sensor_index import SensorIndex
+from vrc_t70.serial_port import open_serial
+from vrc_t70.simulator import LoopbackSerial, PtySimulator, VirtualBus, VirtualController
+from vrc_t70.topology_cache import TopologyCache, load_topology
+
+from .shared import make_communicator
+
+
+def test_all_commands_over_loopback():
+    controller = VirtualController(0x07, [2, 0, 1])
+    communicator = make_communicator(VirtualBus([controller]), 0x07)
+
+    assert communicator.ping().processing_result == VrcT70ErrorCodes.NO_ERROR
+
+    assert communicator.get_sensors_count_on_trunk(1).sensors_count() == 2
+    assert communicator.rescan_sensors_on_trunk(3).sensors_count() == 1
+    assert communicator.rescan_sensors_on_trunk(2).sensors_count() == 0
+
+    r = communicator.get_temperature_on_trunk(1)
+    assert r.temperatures_count() == 2
+    assert list(r.connected_mask()) == [1, 1]
+
+    r = communicator.get_temperature_on_sensor_on_trunk(1, 1)
+    assert r.is_connected()
+    assert 26.0 < r.temperature() < 29.0
+
+    r = communicator.get_sensor_unique_address_on_trunk(3, 0)
+    assert bytes(r.unique_address()) == controller.sensor_address(3, 0)
+
+    r = communicator.get_sensors_unique_addresses_on_trunk(1)
+    assert r.sensors_count() == 2
+    assert bytes(r.sensor_unique_address(1)) == controller.sensor_address(1, 1)
+
+    assert bytes(communicator.get_session_id().session_id()) == bytes(4)
+    communicator.set_session_id(bytearray(b"\x01\x02\x03\x04"))
+    assert bytes(communicator.get_session_id().session_id()) == b"\x01\x02\x03\x04"
+
+    assert communicator.set_new_controller_address(0x08).new_address() == 0x08
+    communicator.controller_address = 0x08
+    assert communicator.get_sensors_count_on_trunk(1).sensors_count() == 2
+
+
+def test_incorrect_values_are_reported():
+    communicator = make_communicator(VirtualBus([VirtualController(0x01, [1])]))
+
+    with pytest.raises(ProcessingError) as e:
+        communicator.get_temperature_on_sensor_on_trunk(1, 5)
+
+    assert e.value.processing_result == VrcT70ErrorCodes.INCORRECT_VALUE
+
+
+def test_many_controllers_on_one_bus():
+    virtual_bus = VirtualBus([VirtualController(address, [address % 3 + 1]) for address in range(1, 5)])
+    poller = VrcT70Poller(VrcT70Bus(LoopbackSerial(virtual_bus, timeout=0.05)), range(1, 6))
+    poller.refresh_period = 0.0
+
+    snapshot = poller.poll_once()
+
+    assert len(poller.trunks) == 4
+    assert not snapshot.errors
+    assert snapshot.trunks[(2, 1)].temperatures_count() == 3
+
+
+def test_topology_load_on_simulated_controller(tmp_path):
+    cache = TopologyCache(str(tmp_path / "topology.json"))
+    virtual_bus = VirtualBus([VirtualController(0x01, [0, 3])])
+
+    topology, is_cached = load_topology(make_communicator(virtual_bus), "sim", cache)
+    assert not is_cached
+    assert topology.sensors_count_per_trunk() == [0, 3, 0, 0, 0, 0, 0]
+
+    _, is_cached = load_topology(make_communicator(virtual_bus), "sim", cache)
+    assert is_cached
+
+
+def test_topology_load_keeps_sensor_index_updated(tmp_path):
+    cache = TopologyCache(str(tmp_path / "topology.json"))
+    controller = VirtualController(0x01, [0, 3])
+    communicator = make_communicator(VirtualBus([controller]))
+    index = SensorIndex()
+
+    load_topology(communicator, "sim", cache, sensor_index=index)
+    assert index.trunk_addresses("sim", 0x01, 2) == tuple(
+        int.from_bytes(controller.sensor_address(2, sensor_index), "big") for sensor_index in range(3)
+    )
+
+    # two sensors disconnected from trunk, rescan must drop them from index
+    controller.sensors_per_trunk[1] = 1
+    _, is_cached = load_topology(communicator, "sim", cache, force_rescan=True, sensor_index=index)
+
+    assert not is_cached
+    assert len(index) == 1
+    assert index.location(controller.sensor_address(2, 0)).trunk_number == 2
+    assert index.location(controller.sensor_address(2, 2)) is None
+
+
+def test_faults_injection_is_handled_by_retries():
+    virtual_bus = VirtualBus([VirtualController(0x01, [2])], drop_rate=0.2, crc_error_rate=0.2, seed=1)
+    communicator = make_communicator(virtual_bus, retry_policy=RetryPolicy(transport_retries=20))
+
+    for _ in range(20):
+        assert communicator.get_temperature_on_trunk(1).temperatures_count() == 2
+
+    assert virtual_bus.dropped_count > 0
+    assert virtual_bus.corrupted_count > 0
+
+
+def test_busy_injection():
+    virtual_bus = VirtualBus([VirtualController(0x01, [2])], busy_rate=1.0)
+    communicator = make_communicator(virtual_bus, retry_policy=RetryPolicy(device_retries=0))
+
+    with pytest.raises(SensorBusy):
+        communicator.get_temperature_on_trunk(1)
+
+    # only sensors reading commands are affected
+    assert communicator.get_sensors_count_on_trunk(1).sensors_count() == 2
+
+
+def test_unknown_address_is_silent():
+    communicator = make_communicator(VirtualBus([VirtualController(0x01)]), 0x02)
+    assert not communicator.probe()
+
+    with pytest.raises(NoAnswerFromController):
+        communicator.ping()
+
+
+def test_baudrate_pacing():
+    virtual_bus = VirtualBus([VirtualController(0x01)], baudrate=9600, latency=0.001)
+
+    # ping: 6 bytes request + 7 bytes response, 10 bits per byte
+    assert virtual_bus.response_delay(6, 7) == pytest.approx(0.001 + 130 / 9600)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="pty support required")
+def test_pty_simulator_with_serial_port():
+    virtual_bus = VirtualBus([VirtualController(0x01, [1, 2]), VirtualController(0x02, [0, 0, 1])])
+
+    with PtySimulator(virtual_bus) as simulator:
+        uart = open_serial(simulator.port_name, timeout=0.5)
+        try:
+            bus = VrcT70Bus(uart)
+            assert VrcT70Communicator(bus, 0x01).get_temperature_on_trunk(2).temperatures_count() == 2
+            assert VrcT70Communicator(bus, 0x02).get_sensors_count_on_trunk(3).sensors_count() == 1
+        finally:
+            uart.close()
+
+    assert virtual_bus.requests_count == 2
@@ -0,0 +1,104 @@
+import struct
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.simulator import make_response_frame
+from vrc_t70.stream_parser import VrcT70FrameParser
+
+from .shared import FakeSerial
+
+
+def make_temperatures_frame(sequence_id):
+    data = bytearray([0x01, 0x01]) + struct.pack("<f", 21.5)
+    return make_response_frame(0x01, 0x03, sequence_id, data=data)
+
+
+def test_parser_decodes_frames_fed_byte_by_byte():
+    parser = VrcT70FrameParser()
+    stream = make_temperatures_frame(1) + make_response_frame(0x01, 0x01, 2)
+
+    frames = []
+    for byte in stream:
+        parser.feed(bytes([byte]))
+        frames.extend(parser.frames())
+
+    assert [item.sequence_id for item in frames] == [1, 2]
+    assert parser.discarded_bytes_count == 0
+    assert len(parser) == 0
+
+
+def test_parser_skips_garbage_before_frame():
+    parser = VrcT70FrameParser()
+    parser.feed(b"\x00\xff\x13\x37" + make_response_frame(0x01, 0x01, 0x2233))
+
+    frame = parser.next_frame()
+
+    assert frame.sequence_id == 0x2233
+    assert parser.discarded_bytes_count == 4
+    assert parser.next_frame() is None
+
+
+def test_parser_glitch_costs_only_damaged_frame():
+    damaged = bytearray(make_temperatures_frame(1))
+    damaged[8] ^= 0x10
+
+    parser = VrcT70FrameParser()
+    parser.feed(bytes(damaged) + make_temperatures_frame(2))
+
+    frames = list(parser.frames())
+
+    assert [item.sequence_id for item in frames] == [2]
+    assert parser.discarded_bytes_count == len(damaged)
+
+
+def test_parser_waits_for_rest_of_frame():
+    frame = make_temperatures_frame(7)
+
+    parser = VrcT70FrameParser()
+    assert parser.bytes_needed() == 7
+
+    parser.feed(frame[:3])
+    assert parser.bytes_needed() == 4
+
+    parser.feed(frame[3:8])
+    assert parser.next_frame() is None
+    assert parser.bytes_needed() == len(frame) - 8
+
+    parser.feed(frame[8:])
+    assert parser.next_frame().sequence_id == 7
+
+
+def test_parser_reset_discards_buffered_bytes():
+    parser = VrcT70FrameParser()
+    parser.feed(b"\x01\x03\x00")
+    parser.reset()
+
+    assert len(parser) == 0
+    assert parser.discarded_bytes_count == 3
+
+
+def test_parser_compacts_buffer():
+    parser = VrcT70FrameParser()
+    frame = make_response_frame(0x01, 0x01, 0x0001)
+
+    for _ in range(2000):
+        parser.feed(frame + b"\x00")
+        assert parser.next_frame() is not None
+
+    assert len(parser._buffer) < 4096 + len(frame) + 1
+    assert parser.frames_count == 2000
+    assert parser.discarded_bytes_count == 1999
+
+
+def test_communicator_resynchronizes_without_retry():
+    def responder(request):
+        sequence_id = (request[2] << 8) | request[3]
+        return b"\x01\x03\x00" + make_response_frame(request[0], request[1], sequence_id)
+
+    serial = FakeSerial(responder)
+    bus = VrcT70Bus(serial)
+
+    VrcT70Communicator(bus, 0x01).ping()
+
+    assert len(serial.written) == 1
+    assert bus.parser.discarded_bytes_count == 3
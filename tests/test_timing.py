@@ -0,0 +1,148 @@
+import pytest
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.commands import VrcT70Commands
+from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.defaults import MIN_RESPONSE_TIMEOUT
+from vrc_t70.simulator import make_response_frame
+from vrc_t70.timing import RttEstimator, wire_time
+
+from .shared import FakeSerial
+
+
+def ping_responder(online_addresses):
+    def responder(request):
+        if request[0] not in online_addresses:
+            return None
+
+        return make_response_frame(request[0], request[1], (request[2] << 8) | request[3])
+
+    return responder
+
+
+def make_bus(responder, timeout=0.5, baudrate=115200, **kwargs):
+    serial = FakeSerial(responder)
+    serial.timeout = timeout
+    serial.baudrate = baudrate
+
+    bus = VrcT70Bus(serial, **kwargs)
+    bus.make_delay_before_request = lambda: None
+
+    return bus
+
+
+def test_wire_time():
+    assert wire_time(7, 9600) == pytest.approx(7 * 10 / 9600)
+
+
+def test_rtt_estimator():
+    estimator = RttEstimator()
+    assert estimator.timeout() is None
+
+    estimator.update(0.010)
+    assert estimator.smoothed_rtt == 0.010
+    assert estimator.timeout() == pytest.approx(0.010 + 4 * 0.005)
+
+    for _ in range(50):
+        estimator.update(0.010)
+
+    assert estimator.samples_count == 51
+    assert estimator.timeout() == pytest.approx(0.010, abs=1e-4)
+
+
+def test_bus_uses_serial_timeout_until_round_trip_time_learned():
+    bus = make_bus(ping_responder({0x01}))
+
+    assert bus.response_timeout(VrcT70Commands.RESCAN_SENSORS_ON_TRUNK, 7) == 0.5
+    assert bus.probe_timeout(6) == bus.initial_probe_timeout
+
+
+def test_bus_learns_timeout_from_successful_requests():
+    timeouts = []
+
+    def responder(request):
+        timeouts.append(bus.serial.timeout)
+        return ping_responder({0x01})(request)
+
+    bus = make_bus(responder)
+    communicator = VrcT70Communicator(bus, 0x01)
+
+    communicator.ping()
+    communicator.ping()
+
+    timeout = bus.response_timeout(VrcT70Commands.PING, 6)
+    assert MIN_RESPONSE_TIMEOUT <= timeout < 0.5
+
+    # learned timeout is applied to the port only during the call
+    communicator.ping()
+    assert timeouts[-1] == timeout
+    assert bus.serial.timeout == 0.5
+
+    # commands without measurements are still limited by serial port timeout only
+    assert bus.response_timeout(VrcT70Commands.RESCAN_SENSORS_ON_TRUNK, 7) == 0.5
+
+
+def test_learned_timeout_is_limited_by_serial_timeout():
+    bus = make_bus(None, timeout=0.02)
+    bus.register_round_trip(VrcT70Commands.PING, 1.0, 6, 7)
+
+    assert bus.response_timeout(VrcT70Commands.PING, 6) == 0.02
+
+
+def test_learned_timeout_is_not_lower_than_turnaround_floor():
+    bus = make_bus(None)
+    for _ in range(100):
+        bus.register_round_trip(VrcT70Commands.PING, 0.001, 6, 7)
+
+    assert bus.response_timeout(VrcT70Commands.PING, 6) == MIN_RESPONSE_TIMEOUT
+
+
+def test_legacy_communicator_does_not_change_serial_timeout():
+    serial = FakeSerial(ping_responder({0x01}))
+    serial.timeout = 0.5
+
+    communicator = VrcT70Communicator(serial, 0x01)
+    communicator.ping()
+
+    assert serial.timeout == 0.5
+    assert not communicator.bus.adaptive_timeouts
+
+
+def test_adaptive_timeouts_require_sequence_ids_tracking():
+    assert not make_bus(None, track_sequence_ids=False).adaptive_timeouts
+    assert not make_bus(None, adaptive_timeouts=False).adaptive_timeouts
+    assert make_bus(None).adaptive_timeouts
+
+
+def test_probe_does_not_retry():
+    bus = make_bus(ping_responder({0x02}))
+    communicator = VrcT70Communicator(bus, 0x01)
+
+    assert not communicator.probe()
+    assert len(bus.serial.written) == 1
+    assert bus.serial.timeout == 0.5
+
+    communicator.controller_address = 0x02
+    assert communicator.probe()
+    assert VrcT70Commands.PING in bus.rtt_estimators
+
+
+def test_probe_timeout_is_not_kept_on_port():
+    serial = FakeSerial()
+    serial.timeout = 0.5
+    timeouts = []
+
+    def responder(request):
+        timeouts.append(serial.timeout)
+        return ping_responder({0x02})(request)
+
+    serial.responder = responder
+    communicator = VrcT70Communicator(serial, 0x01)
+    communicator.bus.make_delay_before_request = lambda: None
+
+    assert not communicator.probe()
+    communicator.controller_address = 0x02
+    communicator.ping()
+
+    assert timeouts == [communicator.bus.initial_probe_timeout, 0.5]
+    assert serial.timeout == 0.5
@@ -0,0 +1,154 @@
+import os
+import threading
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.commands import VrcT70Commands
+from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.simulator import make_response_frame
+from vrc_t70.topology_cache import ControllerTopology, TopologyCache, load_topology, random_session_id
+
+from .shared import FakeSerial
+
+
+class FakeController(object):
+    def __init__(self, address, sensors_addresses):
+        self.address = address
+        self.sensors_addresses = sensors_addresses
+        self.session_id = bytes(4)
+        self.commands = []
+
+    def __call__(self, request):
+        command = request[1]
+        sequence_id = (request[2] << 8) | request[3]
+        data = request[5:-1]
+        self.commands.append(command)
+
+        if command == VrcT70Commands.SET_SESSION_ID:
+            self.session_id = bytes(data)
+            answer = data
+        elif command == VrcT70Commands.GET_SESSION_ID:
+            answer = self.session_id
+        elif command == VrcT70Commands.RESCAN_SENSORS_ON_TRUNK:
+            answer = bytes([data[0], len(self.sensors_addresses[data[0] - 1])])
+        elif command == VrcT70Commands.GET_SENSORS_UNIQUE_ADDRESSES_ON_TRUNK:
+            answer = bytearray([data[0]])
+            for address in self.sensors_addresses[data[0] - 1]:
+                answer.extend(address)
+                answer.append(0x00)
+        else:
+            answer = None
+
+        return make_response_frame(self.address, command, sequence_id, data=answer)
+
+
+SENSORS_ADDRESSES = [[], [bytes.fromhex("28ff0930901504a9"), bytes.fromhex("28ff0930901504aa")], [], [], [], [], []]
+
+
+def make_communicator(controller):
+    bus = VrcT70Bus(FakeSerial(controller))
+    bus.make_delay_before_request = lambda: None
+
+    return VrcT70Communicator(bus, controller.address)
+
+
+def test_random_session_id_is_never_zero():
+    for _ in range(100):
+        session_id = random_session_id()
+        assert len(session_id) == 4
+        assert any(session_id)
+
+
+def test_topology_cache_round_trip(tmp_path):
+    cache = TopologyCache(str(tmp_path / "topology.json"))
+    topology = ControllerTopology(session_id=b"\x01\x02\x03\x04", sensors_addresses=SENSORS_ADDRESSES)
+
+    assert cache.get("COM3", 0x01) is None
+
+    cache.set("COM3", 0x01, topology)
+
+    assert cache.get("COM3", 0x01) == topology
+    assert cache.get("COM3", 0x02) is None
+    assert cache.get("COM4", 0x01) is None
+    assert cache.get("COM3", 0x01).sensors_count_per_trunk() == [0, 2, 0, 0, 0, 0, 0]
+
+    cache.remove("COM3", 0x01)
+    assert cache.get("COM3", 0x01) is None
+
+
+def test_load_topology_scans_and_caches_on_first_run(tmp_path):
+    cache = TopologyCache(str(tmp_path / "topology.json"))
+    controller = FakeController(0x05, SENSORS_ADDRESSES)
+
+    topology, is_cached = load_topology(make_communicator(controller), "COM3", cache)
+
+    assert not is_cached
+    assert topology.sensors_addresses == SENSORS_ADDRESSES
+    assert topology.session_id == controller.session_id
+    assert controller.commands.count(VrcT70Commands.RESCAN_SENSORS_ON_TRUNK) == 7
+    assert cache.get("COM3", 0x05) == topology
+
+
+def test_load_topology_uses_cache_when_session_matches(tmp_path):
+    cache = TopologyCache(str(tmp_path / "topology.json"))
+    controller = FakeController(0x05, SENSORS_ADDRESSES)
+    load_topology(make_communicator(controller), "COM3", cache)
+
+    controller.commands = []
+    topology, is_cached = load_topology(make_communicator(controller), "COM3", cache)
+
+    assert is_cached
+    assert topology.sensors_addresses == SENSORS_ADDRESSES
+    assert controller.commands == [VrcT70Commands.GET_SESSION_ID]
+
+
+def test_load_topology_rescans_after_controller_restart(tmp_path):
+    cache = TopologyCache(str(tmp_path / "topology.json"))
+    controller = FakeController(0x05, SENSORS_ADDRESSES)
+    load_topology(make_communicator(controller), "COM3", cache)
+
+    controller.session_id = bytes(4)
+    controller.commands = []
+    topology, is_cached = load_topology(make_communicator(controller), "COM3", cache)
+
+    assert not is_cached
+    assert any(topology.session_id)
+    assert VrcT70Commands.RESCAN_SENSORS_ON_TRUNK in controller.commands
+
+
+def test_load_topology_force_rescan(tmp_path):
+    cache = TopologyCache(str(tmp_path / "topology.json"))
+    controller = FakeController(0x05, SENSORS_ADDRESSES)
+    load_topology(make_communicator(controller), "COM3", cache)
+
+    controller.commands = []
+    _, is_cached = load_topology(make_communicator(controller), "COM3", cache, force_rescan=True)
+
+    assert not is_cached
+    assert VrcT70Commands.GET_SESSION_ID not in controller.commands
+
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    path = str(tmp_path / "topology.json")
+    topology = ControllerTopology(session_id=bytes([1, 2, 3, 4]), sensors_addresses=SENSORS_ADDRESSES)
+    errors = []
+
+    def worker(port_name):
+        # each thread uses own cache object of the same file
+        cache = TopologyCache(path)
+        try:
+            for address in range(1, 11):
+                cache.set(port_name, address, topology)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=("port{}".format(index), )) for index in range(4)]
+    for item in threads:
+        item.start()
+
+    for item in threads:
+        item.join()
+
+    assert errors == []
+    assert sorted(TopologyCache(path).load()) == ["port0", "port1", "port2", "port3"]
+    assert all(len(item) == 10 for item in TopologyCache(path).load().values())
+    assert os.listdir(str(tmp_path)) == ["topology.json"]
@@ -1,8 +1,10 @@
 import argparse
 
+from vrc_t70.defaults import DEFAULT_PROBE_TIMEOUT
 
-def get_args():
-    parser = argparse.ArgumentParser()
+
+def get_args(args=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog)
 
     parser.add_argument(
         "-u",
@@ -19,9 +21,9 @@ def get_args():
         "--speed",
         action="store",
         dest="uart_speed",
-        help="uart speed",
+        help="uart speed (detected automatically when not specified)",
         type=int,
-        default=115200
+        default=None
     )
 
     parser.add_argument(
@@ -34,11 +36,19 @@ def get_args():
         default=0x01
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "-r",
+        "--rescan",
+        action="store_true",
+        dest="force_rescan",
+        help="rescan trunks even when cached topology matches session id on device"
+    )
+
+    return parser.parse_args(args)
 
 
-def get_scaner_args():
-    parser = argparse.ArgumentParser()
+def get_scaner_args(args=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog)
 
     parser.add_argument(
         "-u",
@@ -55,9 +65,9 @@ def get_scaner_args():
         "--speed",
         action="store",
         dest="uart_speed",
-        help="uart speed",
+        help="uart speed (detected automatically when not specified)",
         type=int,
-        default=115200
+        default=None
     )
 
     parser.add_argument(
@@ -65,9 +75,9 @@ def get_scaner_args():
         "--delay",
         action="store",
         dest="wait_delay",
-        help="wait delay",
+        help="max wait delay for response, shortened automatically after first device found",
         type=float,
-        default=0.15
+        default=DEFAULT_PROBE_TIMEOUT
     )
 
     parser.add_argument(
@@ -90,4 +100,4 @@ def get_scaner_args():
         default=0xff - 1
     )
 
-    return parser.parse_args()
+    return parser.parse_args(args)
@@ -1,4 +1,24 @@
-from .communicator import VrcT70Communicator
+import importlib
+
 from .limitations import MAX_TRUNKS_COUNT, MAX_SENSORS_PER_TRUNK
 
 __version__ = "0.0.1.5"
+
+# communication classes are imported on first access, so command line tools importing
+# only small part of the package start fast. {name: module}
+_LAZY_EXPORTS = {
+    "VrcT70Bus": ".bus",
+    "VrcT70Communicator": ".communicator",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    return getattr(importlib.import_module(module_name, __name__), name)
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_EXPORTS))
@@ -0,0 +1,3 @@
+from vrc_t70.cli_tools.cli import cli
+
+cli(prog_name="vrc-t70")
@@ -0,0 +1,214 @@
+import asyncio
+import os
+
+from .base_bus import VrcT70BusBase
+from .command_call import ATTEMPT_ERRORS, CommandCall, no_response_error
+from .command_set import VrcT70CommandSet
+from .commands import VrcT70Commands
+from .defaults import DEFAULT_CONTROLLER_ADDRESS, DEFAULT_PROBE_TIMEOUT, DEFAULT_RESPONSE_TIMEOUT
+from .exceptions import NoAnswerFromController
+from .request import VrcT70Request
+from .retry_policy import RetryPolicy
+
+
+class AsyncVrcT70Bus(VrcT70BusBase):
+    # asyncio counterpart of VrcT70Bus. Works on top of non-blocking file descriptor (serial port
+    # opened with pyserial, tty device or pty), incoming bytes are collected by event loop reader
+    # callback, so many buses can be served by one event loop without threads. timeout is used
+    # as max response timeout. When port fails (read error or end of file, e.g. device was
+    # unplugged) reader is removed and error is raised from pending and all next reads.
+    def __init__(
+            self,
+            port,
+            track_sequence_ids=True,
+            timeout=DEFAULT_RESPONSE_TIMEOUT,
+            metrics=None,
+            adaptive_timeouts=True,
+            initial_probe_timeout=DEFAULT_PROBE_TIMEOUT,
+            sensor_index=None
+    ):
+        self._fd = port if isinstance(port, int) else port.fileno()
+        self._baudrate = getattr(port, "baudrate", None)
+        os.set_blocking(self._fd, False)
+
+        super().__init__(
+            port_name=getattr(port, "port", None) or "",
+            track_sequence_ids=track_sequence_ids,
+            adaptive_timeouts=adaptive_timeouts,
+            initial_probe_timeout=initial_probe_timeout,
+            max_timeout=timeout,
+            metrics=metrics,
+            sensor_index=sensor_index
+        )
+
+        self._loop = None
+        self._lock = None
+        self._data_available = None
+        self._error = None
+
+    @property
+    def baudrate(self):
+        return self._baudrate
+
+    @property
+    def timeout(self):
+        return self.max_timeout
+
+    def fileno(self):
+        return self._fd
+
+    def open(self):
+        if self._loop is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._lock = asyncio.Lock()
+        self._data_available = asyncio.Event()
+        self._loop.add_reader(self._fd, self._on_data_available)
+
+    def close(self):
+        if self._loop is None:
+            return
+
+        self._loop.remove_reader(self._fd)
+        self._loop = None
+
+    def transaction(self):
+        self.open()
+        return self._lock
+
+    async def make_delay_before_request(self):
+        delay = self.delay_before_request()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def write(self, data):
+        self.open()
+
+        view = memoryview(data)
+        while view:
+            try:
+                sent_bytes = os.write(self._fd, view)
+            except BlockingIOError:
+                await self._wait_writable()
+                continue
+
+            view = view[sent_bytes:]
+
+    async def read_frame(self, deadline):
+        self.open()
+
+        while True:
+            frame = self.parser.next_frame()
+            if frame is not None:
+                return frame
+
+            if self._error is not None:
+                raise self._error
+
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                return None
+
+            self._data_available.clear()
+            try:
+                await asyncio.wait_for(self._data_available.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+    def _on_data_available(self):
+        try:
+            data = os.read(self._fd, 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._fail(e)
+            return
+
+        if not data:
+            self._fail(OSError("end of file on port {}".format(self.port_name or self._fd)))
+            return
+
+        self.parser.feed(data)
+        self._data_available.set()
+
+    def _fail(self, error):
+        # no more data can be read, waiting reader is woken up to raise error
+        self._loop.remove_reader(self._fd)
+        self._error = error
+        self._data_available.set()
+
+    async def _wait_writable(self):
+        ready = self._loop.create_future()
+        self._loop.add_writer(self._fd, ready.set_result, None)
+        try:
+            await ready
+        finally:
+            self._loop.remove_writer(self._fd)
+
+
+class AsyncVrcT70Communicator(VrcT70CommandSet):
+    def __init__(self, port, controller_address=DEFAULT_CONTROLLER_ADDRESS, retry_policy=None):
+        if isinstance(port, AsyncVrcT70Bus):
+            self._bus = port
+        else:
+            self._bus = AsyncVrcT70Bus(port, track_sequence_ids=False)
+
+        self.controller_address = controller_address
+        self.retry_policy = retry_policy or RetryPolicy()
+
+    @property
+    def bus(self):
+        return self._bus
+
+    async def send_command(self, cmd, retries_count=None, timeout=None):
+        call = CommandCall(self._bus, self.controller_address, cmd, self.retry_policy, retries_count, timeout)
+
+        # half-duplex line, so only one request/response cycle can be active on the bus
+        async with self._bus.transaction():
+            while True:
+                await self._bus.make_delay_before_request()
+                frame, timeout = call.begin_attempt()
+
+                try:
+                    await self._bus.write(frame)
+
+                    deadline = asyncio.get_running_loop().time() + (timeout or self._bus.max_timeout)
+                    res = None
+                    while res is None:
+                        res = call.response(await self._read_frame(deadline))
+
+                    return call.complete(res)
+
+                except ATTEMPT_ERRORS as e:
+                    delay = call.attempt_failed(e)
+                    if delay:
+                        await asyncio.sleep(delay)
+
+    async def probe(self):
+        # fast check that controller is online (used for devices discovery): single ping attempt
+        # without retries and with short timeout
+        request = VrcT70Request(self.controller_address, VrcT70Commands.PING, None)
+
+        try:
+            await self.send_command(request, retries_count=1, timeout=self._bus.probe_timeout(len(request)))
+        except NoAnswerFromController:
+            return False
+
+        return True
+
+    async def _execute(self, request, response_type=None):
+        res = await self.send_command(request)
+
+        if (response_type is None) or isinstance(res, response_type):
+            return res
+
+        return response_type(res)
+
+    async def _read_frame(self, deadline):
+        frame = await self._bus.read_frame(deadline)
+
+        if frame is None:
+            raise no_response_error(self._bus.parser)
+
+        return frame
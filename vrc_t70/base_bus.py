@@ -0,0 +1,138 @@
+import time
+
+from .commands import VrcT70Commands
+from .defaults import DEFAULT_PROBE_TIMEOUT, DEFAULT_RESPONSE_TIMEOUT, MIN_DELAY_BETWEEN_REQUESTS, MIN_RESPONSE_TIMEOUT
+from .encoder import VrcT70RequestEncoder
+from .frame import MIN_FRAME_SIZE
+from .limitations import MAX_DATA_LENGTH, MAX_RESPONSE_DATA_LENGTH
+from .metrics import MetricsRegistry
+from .stream_parser import VrcT70FrameParser
+from .timing import RttEstimator, wire_time
+
+
+class VrcT70BusBase(object):
+    # Shared state of one RS-485 line, used by sync and asyncio buses: all communicators created
+    # on top of the same bus share delay between requests and sequence ids counter. With sequence
+    # ids tracking enabled responses are matched by (address, event id, sequence id), so late
+    # responses for previous requests are dropped instead of being treated as errors.
+    #
+    # With adaptive timeouts enabled round trip time is learned for each command and read timeout
+    # for each request is calculated from port baudrate, expected response length and observed
+    # jitter. max_timeout is used as upper limit and for commands without round trip time
+    # measurements (for example first rescan). Adaptive timeouts are used only together with
+    # sequence ids tracking: without it late response for timed out request would be taken
+    # as response for the next one.
+    #
+    # Communication metrics of all communicators on the bus are collected into metrics registry,
+    # one registry can be shared by many buses (labels include port name).
+    #
+    # Sensor index (SensorIndex, can be shared by many buses) is updated from responses of all
+    # communicators on the bus: read sensors addresses update trunk, rescan invalidates it.
+    def __init__(
+            self,
+            port_name="",
+            track_sequence_ids=True,
+            adaptive_timeouts=True,
+            initial_probe_timeout=DEFAULT_PROBE_TIMEOUT,
+            max_timeout=DEFAULT_RESPONSE_TIMEOUT,
+            metrics=None,
+            sensor_index=None
+    ):
+        self.port_name = port_name
+        self.track_sequence_ids = track_sequence_ids
+        self.adaptive_timeouts = adaptive_timeouts and track_sequence_ids
+        self.initial_probe_timeout = initial_probe_timeout
+        self.max_timeout = max_timeout
+
+        self.rtt_estimators = dict()
+        self.parser = VrcT70FrameParser()
+        self.encoder = VrcT70RequestEncoder()
+
+        self.last_request_time = None
+        self.stale_frames_count = 0
+
+        self._sequence_id = 0x0000
+
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.metrics.register_line(self.port_name, self)
+
+        self.sensor_index = sensor_index
+
+    @property
+    def baudrate(self):
+        return None
+
+    def next_sequence_id(self):
+        # 0x0000 used by requests without sequence tracking, so counter wraps to 0x0001
+        self._sequence_id = (self._sequence_id % 0xffff) + 1
+        return self._sequence_id
+
+    def delay_before_request(self):
+        # time left until next request can be sent
+        if self.last_request_time is None:
+            return 0.0
+
+        return max(MIN_DELAY_BETWEEN_REQUESTS - (time.time() - self.last_request_time), 0.0)
+
+    def is_expected_response(self, response, expected_address, expected_event_id, expected_sequence_id):
+        return (
+            (response.address == expected_address) and
+            (response.id_event == expected_event_id) and
+            (response.sequence_id == expected_sequence_id)
+        )
+
+    def response_timeout(self, command, request_size):
+        estimator = self.rtt_estimators.get(command)
+        if (not self.adaptive_timeouts) or (estimator is None):
+            return self.max_timeout
+
+        timeout = estimator.timeout() + self._wire_time(command, request_size)
+        return min(max(timeout, MIN_RESPONSE_TIMEOUT), self.max_timeout)
+
+    def probe_timeout(self, request_size):
+        estimator = self.rtt_estimators.get(VrcT70Commands.PING)
+        if estimator is None:
+            return self.initial_probe_timeout
+
+        timeout = estimator.timeout() + self._wire_time(VrcT70Commands.PING, request_size)
+        return min(max(timeout, MIN_RESPONSE_TIMEOUT), self.initial_probe_timeout)
+
+    def register_round_trip(self, command, elapsed, request_size, response_size):
+        if not self.adaptive_timeouts:
+            return
+
+        estimator = self.rtt_estimators.get(command)
+        if estimator is None:
+            estimator = RttEstimator()
+            self.rtt_estimators[command] = estimator
+
+        baudrate = self.baudrate
+        if baudrate:
+            elapsed -= wire_time(request_size + response_size, baudrate)
+
+        estimator.update(elapsed)
+
+    def update_sensor_index(self, controller_address, response):
+        if self.sensor_index is None:
+            return
+
+        if response.id_event == VrcT70Commands.GET_SENSORS_UNIQUE_ADDRESSES_ON_TRUNK:
+            self.sensor_index.update_from_response(self.port_name, controller_address, response.typed)
+            return
+
+        if response.id_event != VrcT70Commands.RESCAN_SENSORS_ON_TRUNK:
+            return
+
+        res = response.typed
+        if res.sensors_count():
+            self.sensor_index.invalidate_trunk(self.port_name, controller_address, res.trunk_number())
+        else:
+            self.sensor_index.update_trunk(self.port_name, controller_address, res.trunk_number(), [])
+
+    def _wire_time(self, command, request_size):
+        baudrate = self.baudrate
+        if not baudrate:
+            return 0.0
+
+        response_size = MIN_FRAME_SIZE + MAX_RESPONSE_DATA_LENGTH.get(command, MAX_DATA_LENGTH)
+        return wire_time(request_size + response_size, baudrate)
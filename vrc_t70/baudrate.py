@@ -0,0 +1,82 @@
+import os
+
+from .bus import VrcT70Bus
+from .communicator import VrcT70Communicator
+from .defaults import CANDIDATE_BAUDRATES, DEFAULT_CONTROLLER_ADDRESS, DEFAULT_PROBE_TIMEOUT
+from .json_cache import DEFAULT_CACHE_DIRECTORY, JsonCacheFile
+from .serial_port import open_serial
+
+
+DEFAULT_BAUDRATES_CACHE_PATH = os.path.join(DEFAULT_CACHE_DIRECTORY, "baudrates.json")
+
+
+class BaudrateCache(JsonCacheFile):
+    # detected baudrates per port name
+    def __init__(self, path=DEFAULT_BAUDRATES_CACHE_PATH):
+        super().__init__(path)
+
+    def get(self, port_name):
+        return self.load().get(port_name)
+
+    def set(self, port_name, baudrate):
+        with self.lock:
+            data = self.load()
+            data[port_name] = baudrate
+            self.save(data)
+
+    def remove(self, port_name):
+        with self.lock:
+            data = self.load()
+            if data.pop(port_name, None) is not None:
+                self.save(data)
+
+
+def probe_baudrates(uart, candidates=CANDIDATE_BAUDRATES, addresses=(DEFAULT_CONTROLLER_ADDRESS, )):
+    # returns first speed at which any of controllers answered with valid frame or None
+    bus = VrcT70Bus(uart, adaptive_timeouts=False, initial_probe_timeout=uart.timeout or DEFAULT_PROBE_TIMEOUT)
+    communicator = VrcT70Communicator(bus)
+
+    for baudrate in candidates:
+        # bytes received at previous speed are noise, parser must not wait for rest of their frame
+        uart.baudrate = baudrate
+        uart.reset_input_buffer()
+        bus.parser.reset()
+
+        for address in addresses:
+            communicator.controller_address = address
+            if communicator.probe():
+                return baudrate
+
+    return None
+
+
+def detect_baudrate(
+        port_name,
+        candidates=CANDIDATE_BAUDRATES,
+        addresses=(DEFAULT_CONTROLLER_ADDRESS, ),
+        timeout=DEFAULT_PROBE_TIMEOUT,
+        cache=None,
+        serial_factory=None
+):
+    # with cache specified previously detected speed is probed first, so usually single probe
+    # is enough. Stale speed (controller was reconfigured) is replaced with detected one or removed
+    cached = cache.get(port_name) if cache is not None else None
+    if cached is not None:
+        candidates = [cached] + [item for item in candidates if item != cached]
+
+    serial_factory = serial_factory or open_serial
+    uart = serial_factory(port_name, baudrate=candidates[0], timeout=timeout)
+
+    try:
+        baudrate = probe_baudrates(uart, candidates, addresses)
+    finally:
+        uart.close()
+
+    if cache is not None:
+        if baudrate is None:
+            if cached is not None:
+                cache.remove(port_name)
+        elif baudrate != cached:
+            cache.set(port_name, baudrate)
+
+    return baudrate
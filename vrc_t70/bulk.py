@@ -0,0 +1,125 @@
+import math
+import struct
+from array import array
+from collections import namedtuple
+
+from .limitations import MAX_SENSORS_PER_TRUNK
+
+# GET_TEMPERATURES_ON_TRUNK data: trunk number followed by 5 bytes records
+# (1 byte - is connected, 4 bytes - temperature)
+TRUNK_TEMPERATURE_RECORD_SIZE = 5
+
+# GET_SENSORS_UNIQUE_ADDRESSES_ON_TRUNK data: trunk number followed by 9 bytes records
+# (8 bytes - ROM address, 1 byte - is error detected)
+TRUNK_ADDRESS_RECORD_SIZE = 9
+
+TRUNK_TEMPERATURES_FIELDS = (("connected", "u1"), ("temperature", "<f4"))
+TRUNK_ADDRESSES_FIELDS = (("address", ">u8"), ("error", "u1"))
+
+# numpy is slow to import, so it's imported and dtypes are created only on first use.
+# {module attribute: dtype fields}
+_LAZY_DTYPES = {
+    "TRUNK_TEMPERATURES_DTYPE": TRUNK_TEMPERATURES_FIELDS,
+    "TRUNK_ADDRESSES_DTYPE": TRUNK_ADDRESSES_FIELDS,
+}
+
+FleetTemperatures = namedtuple("FleetTemperatures", ["rows", "temperatures", "connected"])
+
+# structs for each records count, pad bytes skip flags, so only values are unpacked
+_temperatures_structs = tuple(struct.Struct("<" + "xf" * count) for count in range(MAX_SENSORS_PER_TRUNK + 1))
+_addresses_structs = tuple(struct.Struct(">" + "Qx" * count) for count in range(MAX_SENSORS_PER_TRUNK + 1))
+
+# flag byte equal to 1 is set, anything else is clear
+_FLAGS_TABLE = bytes(int(value == 1) for value in range(256))
+
+_dtypes = dict()
+
+
+def require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("numpy is required for this functionality, install it with 'pip install vrc_t70[numpy]'")
+
+    return numpy
+
+
+def numpy_dtype(fields):
+    res = _dtypes.get(fields)
+    if res is None:
+        res = require_numpy().dtype(list(fields))
+        _dtypes[fields] = res
+
+    return res
+
+
+def __getattr__(name):
+    fields = _LAZY_DTYPES.get(name)
+    if fields is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    return numpy_dtype(fields)
+
+
+def unpack_temperatures(data, count):
+    # returns tuple of temperatures of count records
+    return _temperatures_structs[count].unpack_from(data, 1)
+
+
+def unpack_addresses(data, count):
+    # returns tuple of ROM addresses of count records as big-endian ints
+    return _addresses_structs[count].unpack_from(data, 1)
+
+
+def unpack_flags(data, offset, record_size, count):
+    # returns flags (0 or 1) of count records, flag of first record is at offset
+    return data[offset: offset + count * record_size: record_size].translate(_FLAGS_TABLE)
+
+
+def temperature_records_to_numpy(data, count):
+    np = require_numpy()
+    return np.frombuffer(data, dtype=numpy_dtype(TRUNK_TEMPERATURES_FIELDS), count=count, offset=1)
+
+
+def address_records_to_numpy(data, count):
+    np = require_numpy()
+    return np.frombuffer(data, dtype=numpy_dtype(TRUNK_ADDRESSES_FIELDS), count=count, offset=1)
+
+
+def stack_trunks_temperatures(responses, width=MAX_SENSORS_PER_TRUNK, use_numpy=True):
+    # Stacks TemperatureOnTrunkResponse objects into one fleet matrix with row per response
+    # and column per sensor index. Missing sensors are filled with NaN and marked as disconnected.
+    # With use_numpy=False flat (row-major) array("f") and array("B") are returned.
+    responses = list(responses)
+    rows = [(item.address, item.trunk_number()) for item in responses]
+
+    if use_numpy:
+        np = require_numpy()
+
+        temperatures = np.full((len(responses), width), np.nan, dtype=np.float32)
+        connected = np.zeros((len(responses), width), dtype=bool)
+
+        for row, item in enumerate(responses):
+            records = item.to_numpy()[:width]
+            temperatures[row, :len(records)] = records["temperature"]
+            connected[row, :len(records)] = records["connected"] == 1
+
+        temperatures[~connected] = np.nan
+        return FleetTemperatures(rows=rows, temperatures=temperatures, connected=connected)
+
+    temperatures = array("f", [math.nan]) * (len(responses) * width)
+    connected = array("B", [0]) * (len(responses) * width)
+
+    for row, item in enumerate(responses):
+        offset = row * width
+        count = min(item.temperatures_count(), width)
+
+        row_connected = item.connected_mask()[:count]
+        row_temperatures = item.temperatures()[:count]
+
+        connected[offset: offset + count] = row_connected
+        for index in range(count):
+            if row_connected[index]:
+                temperatures[offset + index] = row_temperatures[index]
+
+    return FleetTemperatures(rows=rows, temperatures=temperatures, connected=connected)
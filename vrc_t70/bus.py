@@ -0,0 +1,43 @@
+import time
+
+from .base_bus import VrcT70BusBase
+from .defaults import DEFAULT_PROBE_TIMEOUT, DEFAULT_RESPONSE_TIMEOUT
+
+
+class VrcT70Bus(VrcT70BusBase):
+    # RS-485 line on top of blocking serial port (pyserial or compatible object). Timeout
+    # configured for serial port is used as max timeout, read timeout of each request is applied
+    # to the port.
+    def __init__(
+            self,
+            serial,
+            track_sequence_ids=True,
+            adaptive_timeouts=True,
+            initial_probe_timeout=DEFAULT_PROBE_TIMEOUT,
+            metrics=None,
+            sensor_index=None
+    ):
+        self.serial = serial
+
+        super().__init__(
+            port_name=getattr(serial, "port", None) or "",
+            track_sequence_ids=track_sequence_ids,
+            adaptive_timeouts=adaptive_timeouts,
+            initial_probe_timeout=initial_probe_timeout,
+            max_timeout=getattr(serial, "timeout", None) or DEFAULT_RESPONSE_TIMEOUT,
+            metrics=metrics,
+            sensor_index=sensor_index
+        )
+
+    @property
+    def baudrate(self):
+        return getattr(self.serial, "baudrate", None)
+
+    def make_delay_before_request(self):
+        delay = self.delay_before_request()
+        if delay > 0:
+            time.sleep(delay)
+
+    def apply_timeout(self, timeout):
+        if getattr(self.serial, "timeout", None) != timeout:
+            self.serial.timeout = timeout
@@ -0,0 +1,190 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from .bus import VrcT70Bus
+from .command_set import VrcT70CommandSet
+from .communicator import VrcT70Communicator
+from .defaults import DEFAULT_CONTROLLER_ADDRESS
+from .exceptions import DeadlineExceeded
+from .scheduler import PRIORITY_NORMAL, PriorityScheduler
+
+
+class VrcT70BusOwner(object):
+    # Single owner of one bus. Requests from any thread are queued and sent one by one by worker
+    # thread, so frames of different callers never interleave on half-duplex line. Each submitted
+    # request returns concurrent.futures.Future. Order of requests is decided by scheduler:
+    # PriorityScheduler (default) serves priorities strictly, ClassScheduler shares bus time
+    # between traffic classes (integer priorities are mapped to classes). Requests which missed
+    # deadline of their traffic class fail with DeadlineExceeded without being sent.
+    # Requests submitted from worker thread itself (from function passed to run()) are executed
+    # immediately, so nested calls don't deadlock.
+    def __init__(self, bus, retry_policy=None, name=None, scheduler=None):
+        if not isinstance(bus, VrcT70Bus):
+            bus = VrcT70Bus(bus)
+
+        self.bus = bus
+        self.retry_policy = retry_policy
+        self.name = name or "vrc-t70-bus-{}".format(bus.port_name)
+
+        # jobs are (future, func, args, kwargs) tuples
+        self.scheduler = scheduler if scheduler is not None else PriorityScheduler()
+        # {controller address: VrcT70Communicator}, used only by worker thread
+        self._communicators = dict()
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._is_stopping = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def serial(self):
+        return self.bus.serial
+
+    @property
+    def is_running(self):
+        return (self._thread is not None) and self._thread.is_alive()
+
+    @property
+    def pending_count(self):
+        return len(self.scheduler)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._is_stopping = False
+            self.scheduler.open()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, cancel_pending=False):
+        # pending requests are completed before worker stops, unless cancel_pending is set
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+
+            self._is_stopping = True
+            if cancel_pending:
+                for job in self.scheduler.drain():
+                    job[0].cancel()
+
+            self.scheduler.close()
+
+        if thread is not threading.current_thread():
+            thread.join()
+
+        with self._lock:
+            self._thread = None
+
+    def submit(self, request, response_type=None, priority=PRIORITY_NORMAL, retries_count=None, timeout=None):
+        return self._submit(priority, self._send, (request, response_type, retries_count, timeout), {})
+
+    def run(self, func, *args, priority=PRIORITY_NORMAL, **kwargs):
+        # func(*args, **kwargs) is executed by worker with exclusive access to bus, for sequences
+        # of commands which must not be interleaved with other requests. Whole function is one
+        # scheduling unit, long sequences should be submitted as separate requests instead
+        return self._submit(priority, func, args, kwargs)
+
+    def communicator(self, controller_address=DEFAULT_CONTROLLER_ADDRESS, priority=PRIORITY_NORMAL, blocking=False):
+        return VrcT70SharedCommunicator(self, controller_address, priority, blocking)
+
+    def controller_communicator(self, controller_address):
+        # communicator used by worker, must be used only inside functions passed to run()
+        res = self._communicators.get(controller_address)
+        if res is None:
+            res = VrcT70Communicator(self.bus, controller_address, self.retry_policy)
+            self._communicators[controller_address] = res
+
+        return res
+
+    def _submit(self, priority, func, args, kwargs):
+        future = Future()
+
+        if threading.current_thread() is self._thread:
+            future.set_running_or_notify_cancel()
+            _complete(future, func, args, kwargs)
+            return future
+
+        with self._lock:
+            if (self._thread is None) or self._is_stopping:
+                raise RuntimeError("bus owner {} is not running".format(self.name))
+
+            self.scheduler.put((future, func, args, kwargs), priority)
+
+        return future
+
+    def _send(self, request, response_type, retries_count, timeout):
+        communicator = self.controller_communicator(request.controller_address)
+        res = communicator.send_command(request, retries_count=retries_count, timeout=timeout)
+
+        if (response_type is None) or isinstance(res, response_type):
+            return res
+
+        return response_type(res)
+
+    def _run(self):
+        while True:
+            job = self.scheduler.get(self._expire)
+            if job is None:
+                return
+
+            future, func, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                self.scheduler.complete(job, 0.0)
+                continue
+
+            begin = time.monotonic()
+            _complete(future, func, args, kwargs)
+            self.scheduler.complete(job, time.monotonic() - begin)
+
+    def _expire(self, job):
+        future = job[0]
+        if future.set_running_or_notify_cancel():
+            future.set_exception(DeadlineExceeded("request was not sent before deadline on {}".format(self.name)))
+
+
+class VrcT70SharedCommunicator(VrcT70CommandSet):
+    # Commands set on top of bus owner, can be used from many threads. Commands return futures,
+    # with blocking=True they wait for response and return it like VrcT70Communicator.
+    def __init__(self, owner, controller_address=DEFAULT_CONTROLLER_ADDRESS, priority=PRIORITY_NORMAL, blocking=False):
+        self.owner = owner
+        self.controller_address = controller_address
+        self.priority = priority
+        self.blocking = blocking
+
+    @property
+    def bus(self):
+        return self.owner.bus
+
+    def _execute(self, request, response_type=None):
+        return self._result(self.owner.submit(request, response_type, self.priority))
+
+    def probe(self):
+        address = self.controller_address
+        return self._result(
+            self.owner.run(lambda: self.owner.controller_communicator(address).probe(), priority=self.priority)
+        )
+
+    def send_command(self, cmd, retries_count=None, timeout=None):
+        return self._result(self.owner.submit(cmd, None, self.priority, retries_count, timeout))
+
+    def _result(self, future):
+        return future.result() if self.blocking else future
+
+
+def _complete(future, func, args, kwargs):
+    try:
+        res = func(*args, **kwargs)
+    except Exception as e:
+        future.set_exception(e)
+    else:
+        future.set_result(res)
@@ -1,11 +1,72 @@
+import importlib
+import time
+
 import click
 
-from vrc_t70.cli_tools.list_ports import list_ports
+# {command name: (module, command object, short help)}. Modules are imported only when
+# command is invoked, so startup cost of the tool doesn't depend on amount of commands.
+COMMANDS = {
+    "daemon": ("vrc_t70.cli_tools.daemon", "daemon", "Poll ports continuously and serve readings."),
+    "discover": ("vrc_t70.cli_tools.discover", "discover", "Scan ports for controllers in parallel."),
+    "find-devices": ("vrc_t70.cli_tools.find_devices", "find_devices", "Search controllers on one port."),
+    "get-temperatures": (
+        "vrc_t70.cli_tools.get_temperatures",
+        "get_temperatures",
+        "Read all sensors of one controller."
+    ),
+    "list-ports": ("vrc_t70.cli_tools.list_ports", "list_ports", "List available COM ports."),
+    "simulate": ("vrc_t70.cli_tools.simulate", "simulate", "Run virtual controllers on pseudo-terminal."),
+}
+
+
+class LazyGroup(click.Group):
+    # Group with commands imported on first use. Help for commands list is taken from
+    # the table, so "--help" doesn't import commands too.
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+        # {command name: seconds spent on import}
+        self.import_times = dict()
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        command = super().get_command(ctx, cmd_name)
+        if (command is not None) or (cmd_name not in self.lazy_commands):
+            return command
+
+        module_name, command_name, _ = self.lazy_commands[cmd_name]
+
+        started_at = time.perf_counter()
+        command = getattr(importlib.import_module(module_name), command_name)
+        self.import_times[cmd_name] = time.perf_counter() - started_at
+
+        self.add_command(command, cmd_name)
+        return command
+
+    def format_commands(self, ctx, formatter):
+        rows = []
+        for name in self.list_commands(ctx):
+            command = self.commands.get(name)
+            if command is not None:
+                short_help = command.get_short_help_str(formatter.width)
+            else:
+                short_help = self.lazy_commands[name][2]
+
+            rows.append((name, short_help))
 
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
 
-@click.group()
-def cli():
-    pass
 
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
+@click.option("--import-time", is_flag=True, help="report time spent on import of invoked command")
+@click.pass_context
+def cli(ctx, import_time):
+    if not import_time:
+        return
 
-cli.add_command(list_ports)
+    for name, seconds in ctx.command.import_times.items():
+        click.echo(f"{name} imported in {seconds * 1000.0:.1f} ms", err=True)
@@ -0,0 +1,132 @@
+import os
+import signal
+import threading
+
+import click
+
+from loguru import logger
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.bus_owner import VrcT70BusOwner
+from vrc_t70.command_line.shared import resolve_uart_speed
+from vrc_t70.daemon.collector import Collector, PortCollector, ReadingsStore
+from vrc_t70.daemon.server import DEFAULT_HTTP_HOST, DEFAULT_HTTP_PORT, QueryHTTPServer, QueryUnixServer
+from vrc_t70.defaults import DEFAULT_CONTROLLER_ADDRESS, SENSORS_REFRESH_PERIOD
+from vrc_t70.metrics import MetricsRegistry
+from vrc_t70.recorder import TimeSeriesRecorder
+from vrc_t70.scheduler import ClassScheduler
+from vrc_t70.sensor_index import SensorIndex
+from vrc_t70.serial_port import open_serial
+
+UNIX_SOCKET_PREFIX = "unix:"
+
+
+def make_server(listen_address, collector, metrics):
+    if listen_address.startswith(UNIX_SOCKET_PREFIX):
+        return QueryUnixServer(listen_address[len(UNIX_SOCKET_PREFIX):], collector, metrics)
+
+    host, _, port = listen_address.rpartition(":")
+    return QueryHTTPServer((host or DEFAULT_HTTP_HOST, int(port)), collector, metrics)
+
+
+def shutdown(servers, collector):
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+    collector.stop()
+
+    for item in collector.port_collectors:
+        if item.recorder is not None:
+            item.recorder.close()
+
+        item.bus.stop(cancel_pending=True)
+        item.bus.serial.close()
+
+
+@click.command(name="daemon")
+@click.option("-p", "--port", "ports", multiple=True, required=True, help="port to poll, can be repeated")
+@click.option("-s", "--speed", type=int, default=None, help="uart speed (default: detect automatically)")
+@click.option(
+    "-a",
+    "--address",
+    "addresses",
+    multiple=True,
+    type=int,
+    default=[DEFAULT_CONTROLLER_ADDRESS],
+    show_default=True,
+    help="controller address, can be repeated"
+)
+@click.option(
+    "-r",
+    "--refresh-period",
+    type=float,
+    default=SENSORS_REFRESH_PERIOD,
+    show_default=True,
+    help="min period between polls of the same trunk"
+)
+@click.option(
+    "-l",
+    "--listen",
+    "listen_addresses",
+    multiple=True,
+    default=["{}:{}".format(DEFAULT_HTTP_HOST, DEFAULT_HTTP_PORT)],
+    show_default=True,
+    help="HOST:PORT for HTTP or unix:PATH for Unix socket, can be repeated"
+)
+@click.option("--record", "record_directory", default=None, help="record readings into directory")
+def daemon(ports, speed, addresses, refresh_period, listen_addresses, record_directory):
+    store = ReadingsStore()
+    metrics = MetricsRegistry()
+    sensor_index = SensorIndex()
+
+    port_collectors = []
+    for port_name in ports:
+        baudrate = resolve_uart_speed(port_name, speed, addresses, logger)
+        # poller, rescans and on-demand reads share port, bus time is divided by traffic classes
+        bus = VrcT70BusOwner(
+            VrcT70Bus(open_serial(port_name, baudrate=baudrate), metrics=metrics, sensor_index=sensor_index),
+            scheduler=ClassScheduler()
+        )
+
+        recorder = None
+        if record_directory is not None:
+            # recorder is not thread-safe, so each port has own segments directory
+            recorder = TimeSeriesRecorder(os.path.join(record_directory, os.path.basename(port_name)))
+
+        port_collectors.append(
+            PortCollector(
+                port_name,
+                bus,
+                addresses,
+                store,
+                refresh_period=refresh_period,
+                recorder=recorder,
+                sensor_index=sensor_index
+            )
+        )
+
+    collector = Collector(port_collectors, store, sensor_index)
+    servers = [make_server(item, collector, metrics) for item in listen_addresses]
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop_event.set())
+
+    for item in port_collectors:
+        item.bus.start()
+
+    collector.start()
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info(f"Listening on {server.server_address}")
+
+    logger.info(f"Polling {len(port_collectors)} port(s): {', '.join(ports)}")
+
+    try:
+        while not stop_event.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+
+    logger.info("Stopping...")
+    shutdown(servers, collector)
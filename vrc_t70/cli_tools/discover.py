@@ -0,0 +1,113 @@
+import json
+import sys
+
+import click
+
+from loguru import logger
+
+import terminaltables
+
+from vrc_t70.defaults import DEFAULT_BAUDRATE, DEFAULT_PROBE_TIMEOUT, MAX_CONTROLLER_ADDRESS, MIN_CONTROLLER_ADDRESS
+from vrc_t70.discovery import list_port_names, make_inventory, scan_ports
+
+
+@click.command(name="discover")
+@click.option("-p", "--port", "ports", multiple=True, help="port to scan, can be repeated (default: all ports)")
+@click.option("-g", "--glob", "pattern", default=None, help="scan only ports matching glob pattern")
+@click.option(
+    "-s",
+    "--speed",
+    "speeds",
+    multiple=True,
+    type=int,
+    default=[DEFAULT_BAUDRATE],
+    show_default=True,
+    help="uart speed, can be repeated"
+)
+@click.option(
+    "-m",
+    "--min",
+    "min_address",
+    type=int,
+    default=MIN_CONTROLLER_ADDRESS,
+    show_default=True,
+    help="min address for search"
+)
+@click.option(
+    "-x",
+    "--max",
+    "max_address",
+    type=int,
+    default=MAX_CONTROLLER_ADDRESS,
+    show_default=True,
+    help="max address for search"
+)
+@click.option(
+    "-d",
+    "--delay",
+    "wait_delay",
+    type=float,
+    default=DEFAULT_PROBE_TIMEOUT,
+    show_default=True,
+    help="max wait delay for response"
+)
+@click.option("-j", "--json", "json_path", default=None, help="write JSON inventory to file ('-' for stdout)")
+def discover(ports, pattern, speeds, min_address, max_address, wait_delay, json_path):
+    port_names = list(ports) if ports else list_port_names(pattern)
+    if not port_names:
+        logger.warning("No COM ports has been found")
+        return
+
+    logger.info(f"Scanning {len(port_names)} port(s) in parallel: {', '.join(port_names)}")
+    results = scan_ports(
+        port_names,
+        baudrates=speeds,
+        min_address=min_address,
+        max_address=max_address,
+        timeout=wait_delay
+    )
+
+    data = [("Port", "Speed", "Devices count", "Device addresses", "Spent time")]
+    is_failed = False
+    for item in results:
+        if item.error is not None:
+            is_failed = True
+            logger.error(f"Can't scan {item.port_name} at {item.baudrate}: {item.error}")
+
+        for address, error in sorted(item.failures.items()):
+            is_failed = True
+            logger.warning(
+                f"Controller {address} [0x{address:02x}] on {item.port_name} at {item.baudrate} failed: {error}"
+            )
+
+        data.append(
+            [
+                item.port_name,
+                item.baudrate,
+                len(item.addresses),
+                ", ".join("{0} [0x{0:02x}]".format(address) for address in item.addresses),
+                round(item.seconds_elapsed, 2)
+            ]
+        )
+
+    table = terminaltables.AsciiTable(data)
+    logger.info(f"Found devices:\n{table.table}")
+
+    if json_path is not None:
+        save_inventory(results, json_path)
+
+    # inventory is incomplete when some port or controller failed
+    if is_failed:
+        sys.exit(1)
+
+
+def save_inventory(results, json_path):
+    inventory = json.dumps(make_inventory(results), indent=4, sort_keys=True)
+    if json_path == "-":
+        click.echo(inventory)
+        return
+
+    with open(json_path, "w") as f:
+        f.write(inventory)
+
+    logger.info(f"Inventory saved to {json_path}")
@@ -0,0 +1,14 @@
+import click
+
+from vrc_t70.command_line.find_devices import main
+
+
+@click.command(
+    name="find-devices",
+    context_settings=dict(ignore_unknown_options=True, allow_extra_args=True),
+    add_help_option=False,
+)
+@click.pass_context
+def find_devices(ctx):
+    # arguments are parsed by find_devices tool itself
+    main(ctx.args, prog="vrc-t70 find-devices")
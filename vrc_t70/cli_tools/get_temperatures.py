@@ -0,0 +1,14 @@
+import click
+
+from vrc_t70.command_line.get_temperatures import main
+
+
+@click.command(
+    name="get-temperatures",
+    context_settings=dict(ignore_unknown_options=True, allow_extra_args=True),
+    add_help_option=False,
+)
+@click.pass_context
+def get_temperatures(ctx):
+    # arguments are parsed by get_temperatures tool itself
+    main(ctx.args, prog="vrc-t70 get-temperatures")
@@ -0,0 +1,74 @@
+import click
+
+from loguru import logger
+
+from vrc_t70.defaults import DEFAULT_BAUDRATE, DEFAULT_CONTROLLER_ADDRESS
+from vrc_t70.simulator import PtySimulator, VirtualBus, VirtualController
+
+
+def parse_sensors_per_trunk(ctx, param, value):
+    try:
+        return [int(item) for item in value.split(",")]
+    except ValueError:
+        raise click.BadParameter("expected comma separated sensors counts, for example 1,0,3")
+
+
+@click.command(name="simulate")
+@click.option(
+    "-a",
+    "--address",
+    "addresses",
+    multiple=True,
+    type=int,
+    default=[DEFAULT_CONTROLLER_ADDRESS],
+    show_default=True,
+    help="address of virtual controller, can be repeated"
+)
+@click.option(
+    "-n",
+    "--sensors",
+    "sensors_per_trunk",
+    default="1",
+    show_default=True,
+    callback=parse_sensors_per_trunk,
+    help="comma separated sensors count for each trunk"
+)
+@click.option(
+    "-s",
+    "--speed",
+    "baudrate",
+    type=int,
+    default=DEFAULT_BAUDRATE,
+    show_default=True,
+    help="simulated uart speed used for responses pacing (0 - no pacing)"
+)
+@click.option("-l", "--latency", type=float, default=0.0, show_default=True, help="controller response latency")
+@click.option("--drops", "drop_rate", type=float, default=0.0, show_default=True, help="dropped responses rate")
+@click.option("--crc-errors", "crc_error_rate", type=float, default=0.0, show_default=True, help="bad CRC rate")
+@click.option("--busy", "busy_rate", type=float, default=0.0, show_default=True, help="sensor busy answers rate")
+@click.option("--seed", type=int, default=None, help="random seed for faults injection")
+def simulate(addresses, sensors_per_trunk, baudrate, latency, drop_rate, crc_error_rate, busy_rate, seed):
+    bus = VirtualBus(
+        [VirtualController(address, sensors_per_trunk) for address in addresses],
+        baudrate=baudrate or None,
+        latency=latency,
+        drop_rate=drop_rate,
+        crc_error_rate=crc_error_rate,
+        busy_rate=busy_rate,
+        seed=seed
+    )
+
+    simulator = PtySimulator(bus)
+
+    controllers = ", ".join("{0} [0x{0:02x}]".format(address) for address in sorted(bus.controllers))
+    logger.info(f"Simulating controller(s) {controllers} on {simulator.port_name}, press Ctrl+C to stop")
+
+    try:
+        simulator.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+    logger.info(
+        f"Requests: {bus.requests_count}, responses: {bus.responses_count}, dropped: {bus.dropped_count}, "
+        f"bad CRC: {bus.corrupted_count}, busy: {bus.busy_count}"
+    )
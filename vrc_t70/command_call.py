@@ -0,0 +1,160 @@
+import time
+
+from .exceptions import (BadCrc, NoAnswerFromController, ProcessingError, SensorBusy, SensorError, WrongBytesCount,
+                         WrongControllerAddress, WrongEventId)
+from .frame import MIN_FRAME_SIZE
+from .metrics import attempt_error_kind, error_kind, parser_counters
+from .response import VrcT70Response
+from .retry_policy import FailureClass, check_processing_result
+
+# errors of single attempt, retry policy decides whether call is retried
+ATTEMPT_ERRORS = (WrongBytesCount, BadCrc, WrongEventId, WrongControllerAddress, ProcessingError)
+
+
+def no_response_error(parser):
+    # error for response which was not received (completely) in time
+    return WrongBytesCount(
+        "Can't read response. read_bytes_count = {} expected_bytes_count = {}".format(
+            len(parser),
+            len(parser) + parser.bytes_needed()
+        )
+    )
+
+
+class CommandCall(object):
+    # Protocol part of one command call (all attempts of one request) shared by sync and asyncio
+    # communicators: sequence ids, timeouts, response matching and validation, retry decisions,
+    # round trip time and metrics. Communicators only write frames, read frames and sleep:
+    #
+    #     while True:
+    #         frame, timeout = call.begin_attempt()
+    #         try:
+    #             write(frame)
+    #             res = None
+    #             while res is None:
+    #                 res = call.response(read_frame(timeout))
+    #             return call.complete(res)
+    #         except ATTEMPT_ERRORS as e:
+    #             sleep(call.attempt_failed(e))
+    def __init__(self, bus, controller_address, cmd, retry_policy, retries_count=None, timeout=None):
+        if cmd.sequence_id is None:
+            cmd.sequence_id = 0x0000
+
+        self.bus = bus
+        self.controller_address = controller_address
+        self.cmd = cmd
+        self.timeout = timeout
+        self.request_size = len(cmd)
+
+        self.retry_state = retry_policy.start_call(max_attempts=retries_count)
+        self.metrics = bus.metrics.command(bus.port_name, controller_address, cmd.command)
+        self.metrics.record_call()
+
+        self._call_begin = None
+        self._attempt_begin = None
+        self._parser_counters = None
+
+    def begin_attempt(self):
+        # returns (request frame, response timeout), timeout is None when port timeout is kept
+        self.retry_state.begin_attempt()
+
+        if self.bus.track_sequence_ids:
+            self.cmd.sequence_id = self.bus.next_sequence_id()
+
+        timeout = self._attempt_timeout()
+
+        self._attempt_begin = time.monotonic()
+        if self._call_begin is None:
+            self._call_begin = self._attempt_begin
+
+        self.metrics.record_attempt(self.request_size)
+        self._parser_counters = parser_counters(self.bus.parser)
+
+        return self.bus.encoder.encode_request(self.cmd), timeout
+
+    def response(self, frame):
+        # response for received frame or None for late response to one of previous requests,
+        # in this case next frame must be read
+        res = VrcT70Response.from_frame(frame)
+        cmd = self.cmd
+
+        if self.bus.track_sequence_ids and not self.bus.is_expected_response(
+                res,
+                self.controller_address,
+                cmd.command,
+                cmd.sequence_id
+        ):
+            self.bus.stale_frames_count += 1
+            return None
+
+        if res.id_event != cmd.command:
+            raise WrongEventId(
+                "expected_event_id = {}, received event id = {}".format(
+                    cmd.command,
+                    res.id_event
+                )
+            )
+
+        if res.address != self.controller_address:
+            raise WrongControllerAddress(
+                "expected controller address = {} received controller address = {}".format(
+                    self.controller_address,
+                    res.address
+                )
+            )
+
+        return res
+
+    def complete(self, res):
+        # returns response when controller processed request, raises ProcessingError otherwise
+        self.bus.last_request_time = time.time()
+
+        end = time.monotonic()
+        response_size = MIN_FRAME_SIZE + (len(res.data) if res.data else 0)
+        self.bus.register_round_trip(self.cmd.command, end - self._attempt_begin, self.request_size, response_size)
+
+        check_processing_result(res)
+        self.metrics.record_success(end - self._call_begin, response_size)
+        self.bus.update_sensor_index(self.controller_address, res)
+
+        return res
+
+    def attempt_failed(self, error):
+        # returns delay before next attempt, raises when call can't be retried
+        if isinstance(error, ProcessingError) and not isinstance(error, (SensorBusy, SensorError)):
+            self.metrics.record_error(error_kind(error))
+            self.metrics.record_failure(is_timeout=False)
+            raise error
+
+        self.metrics.record_error(attempt_error_kind(error, self.bus.parser, self._parser_counters))
+
+        # unread bytes are kept by parser, it will resynchronize on next valid frame
+        delay = self.retry_state.next_delay(error)
+        if delay is None:
+            self._raise_call_failure()
+
+        return delay
+
+    def _attempt_timeout(self):
+        timeout = self.timeout
+        if (timeout is None) and self.bus.adaptive_timeouts:
+            timeout = self.bus.response_timeout(self.cmd.command, self.request_size)
+
+        remaining_time = self.retry_state.remaining_time()
+        if remaining_time is not None:
+            timeout = min(timeout or self.bus.max_timeout, remaining_time)
+
+        return timeout
+
+    def _raise_call_failure(self):
+        if self.retry_state.last_failure_class == FailureClass.DEVICE:
+            self.metrics.record_failure(is_timeout=False)
+            raise self.retry_state.last_error
+
+        self.metrics.record_failure(is_timeout=True)
+        raise NoAnswerFromController(
+            "No answer from controller 0x{:02x}, retries count {}".format(
+                self.controller_address,
+                self.retry_state.attempts_count
+            )
+        )
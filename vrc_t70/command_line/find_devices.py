@@ -7,46 +7,52 @@ from terminaltables import AsciiTable
 
 from tools_shared.cmd_line_parser import get_scaner_args
 
-from tqdm import tqdm, trange
+from tqdm import tqdm
 
+from vrc_t70.bus import VrcT70Bus
 from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.defaults import MAX_BAUDRATE_DETECTION_ADDRESSES
 
-from .shared import init_logger
+from .shared import init_logger, resolve_uart_speed
 
 
 FoundDeviceData = namedtuple("FoundDeviceData", ["seconds_elapsed", "device_address"])
 
 
-def main():
-    args = get_scaner_args()
+def main(args=None, prog=None):
+    args = get_scaner_args(args, prog)
     logger = init_logger("temp reader")
 
-    uart = init_serial(args.uart_name, args.uart_speed, args.wait_delay)
+    addresses = range(args.min_address, args.max_address + 1)
+    uart_speed = resolve_uart_speed(
+        args.uart_name,
+        args.uart_speed,
+        addresses[:MAX_BAUDRATE_DETECTION_ADDRESSES],
+        logger
+    )
+    uart = init_serial(args.uart_name, uart_speed, args.wait_delay)
 
-    total_devices_count = 0
     logger.info("Searching...")
-    communicator = VrcT70Communicator(uart)
+    bus = VrcT70Bus(uart, initial_probe_timeout=args.wait_delay)
+    communicator = VrcT70Communicator(bus)
 
     found_devices = list()
     tm_begin = time.time()
 
-    with trange(args.min_address, args.max_address + 1, postfix=[dict(devices=0)], unit="rqs") as targets_range:
+    with tqdm(addresses, postfix=[dict(devices=0)], unit="rqs") as targets_range:
         for device_address in targets_range:
             communicator.controller_address = device_address
-            try:
-                communicator.ping()
-                tqdm.write("\tfound device with address 0x{:02x}".format(device_address))
-                found_device_data = FoundDeviceData(
-                    seconds_elapsed=time.time() - tm_begin,
-                    device_address=device_address
-                )
-                found_devices.append(found_device_data)
-                targets_range.postfix[0]["devices"] = len(found_devices)
-                targets_range.update()
-
-            except BaseException as e:
-                # DO NOT ADD nothing here, we suppressing exceptions for pretty output
-                pass
+            if not communicator.probe():
+                continue
+
+            tqdm.write("\tfound device with address 0x{:02x}".format(device_address))
+            found_device_data = FoundDeviceData(
+                seconds_elapsed=time.time() - tm_begin,
+                device_address=device_address
+            )
+            found_devices.append(found_device_data)
+            targets_range.postfix[0]["devices"] = len(found_devices)
+            targets_range.update()
 
     found_devices = sorted(found_devices, key=(lambda x: x.device_address))
     result_table_data = [["Timestamp found", "Device Address"]]
@@ -61,7 +67,7 @@ def main():
     table = AsciiTable(result_table_data)
     logger.info(":\n{}".format(table.table))
     seconds_elapsed = round(time.time() - tm_begin, 2)
-    logger.info("Done. Total_devices_count = {} (Spent time: {})".format(total_devices_count, seconds_elapsed))
+    logger.info("Done. Total_devices_count = {} (Spent time: {})".format(len(found_devices), seconds_elapsed))
 
     uart.close()
     return 0
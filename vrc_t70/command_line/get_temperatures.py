@@ -1,6 +1,5 @@
 import binascii
-import random
-from collections import defaultdict, namedtuple
+import time
 
 import serial
 
@@ -11,15 +10,12 @@ from tools_shared.cmd_line_parser import get_args
 from tqdm import tqdm
 
 from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.fleet_snapshot import FleetSnapshot
 from vrc_t70.limitations import MAX_TRUNKS_COUNT
+from vrc_t70.sensor_index import format_rom_address
+from vrc_t70.topology_cache import TopologyCache, load_topology
 
-from .shared import init_logger
-
-
-SensorTemperatureData = namedtuple(
-    typename="SensorData",
-    field_names=["sensor_address", "temperature", "trunk_number", "sensor_index"]
-)
+from .shared import init_logger, resolve_uart_speed
 
 
 def print_sensors_per_trunk_count(sensors_count_per_trunk, logger, skip_empty_trunks = True):
@@ -55,22 +51,17 @@ def print_sensors_per_trunk_count_protocol_data(sensors_count_per_trunk, logger,
     logger.info("sensors per trunks:\n{}\n".format(table.table))
 
 
-def print_sensors_data(sensors_data, logger):
-    sensors_per_trunk = defaultdict(list)
-    for item in sensors_data:
-        sensors_per_trunk[item.trunk_number].append(item)
-
-    for trunk_number in sorted(sensors_per_trunk.keys()):
-        sensors_on_trunk = sensors_per_trunk[trunk_number]
-        sensors_on_trunk = sorted(sensors_on_trunk, key=(lambda x: x.sensor_index))
+def print_sensors_data(snapshot, logger):
+    snapshot = snapshot.sorted_by("trunk", "index")
 
+    for trunk_number in sorted(set(snapshot.trunks)):
         table_data = [["Index", "Temperature", "Address"]]
-        for sensor_data in sensors_on_trunk:
+        for sensor_data in snapshot.select(trunk=trunk_number):
             table_data.append(
                 [
-                    sensor_data.sensor_index,
+                    sensor_data.index,
                     round(sensor_data.temperature, 2),
-                    my_hexlify(sensor_data.sensor_address)
+                    format_rom_address(sensor_data.address)
                 ]
             )
 
@@ -78,34 +69,38 @@ def print_sensors_data(sensors_data, logger):
         logger.info("data for Trunk-{}:\n{}\n".format(trunk_number, table.table))
 
 
-def main():
-    args = get_args()
+def main(args=None, prog=None):
+    args = get_args(args, prog)
     logger = init_logger("temp reader")
     logger.debug("app started")
 
-    uart = init_serial(args.uart_name, args.uart_speed)
+    uart_speed = resolve_uart_speed(args.uart_name, args.uart_speed, [args.device_address], logger)
+    uart = init_serial(args.uart_name, uart_speed)
     communicator = VrcT70Communicator(uart, controller_address=args.device_address)
 
     logger.info("initializing communication with device {0} [0x{0:02x}]...".format(args.device_address))
     logger.info("\tping")
     communicator.ping()
 
-    new_session_id = random_byte_array(4)
-    logger.debug("\tinitializing session id with {}".format(my_hexlify(new_session_id)))
-    r = communicator.set_session_id(new_session_id)
+    topology, is_cached = load_topology(
+        communicator,
+        args.uart_name,
+        TopologyCache(),
+        force_rescan=args.force_rescan
+    )
 
-    assert r.session_id() == new_session_id
+    if is_cached:
+        logger.info("session id matches cached topology, trunks rescan skipped")
+    else:
+        logger.info("trunks rescanned")
 
-    r = communicator.get_session_id()
-    logger.debug("\tsession_id = {}".format(my_hexlify(r.session_id())))
-    assert r.session_id() == new_session_id
+    logger.debug("\tsession_id = {}".format(my_hexlify(topology.session_id)))
 
-    logger.debug("scanning for sensors on trunks...")
-    sensors_count_per_trunk = rescan_devices_on_all_trunks(communicator, logger)
+    sensors_count_per_trunk = topology.sensors_count_per_trunk()
     print_sensors_per_trunk_count(sensors_count_per_trunk, logger)
 
     logger.info("bulk data processing commands")
-    sensors_data = list()
+    sensors_data = FleetSnapshot(time.time(), args.uart_name)
     for trunk_number, sensors_count in enumerate(tqdm(sensors_count_per_trunk, unit="trunks"), 1):
         temperatures = communicator.get_temperature_on_trunk(trunk_number)
         assert temperatures.temperatures_count() == sensors_count
@@ -122,19 +117,12 @@ def main():
             assert not addresses.is_error_detected(sensor_index)
             unique_address = addresses.sensor_unique_address(sensor_index)
 
-            sensor_data = SensorTemperatureData(
-                sensor_address=unique_address,
-                temperature=temperature,
-                trunk_number=trunk_number,
-                sensor_index=sensor_index
-            )
-
-            sensors_data.append(sensor_data)
+            sensors_data.append(args.device_address, trunk_number, sensor_index, unique_address, temperature)
 
     print_sensors_data(sensors_data, logger)
 
     logger.info("simple data processing commands")
-    sensors_data = list()
+    sensors_data = FleetSnapshot(time.time(), args.uart_name)
     for trunk_number, sensors_count in enumerate(tqdm(sensors_count_per_trunk, unit="trunk"), 1):
         for sensor_index in range(sensors_count):
             r = communicator.get_temperature_on_sensor_on_trunk(trunk_number, sensor_index)
@@ -143,14 +131,7 @@ def main():
             r = communicator.get_sensor_unique_address_on_trunk(trunk_number, sensor_index)
             unique_address = r.unique_address()
 
-            sensor_data = SensorTemperatureData(
-                sensor_address=unique_address,
-                temperature=temperature,
-                trunk_number=trunk_number,
-                sensor_index=sensor_index
-            )
-
-            sensors_data.append(sensor_data)
+            sensors_data.append(args.device_address, trunk_number, sensor_index, unique_address, temperature)
 
     print_sensors_data(sensors_data, logger)
 
@@ -167,18 +148,6 @@ def main():
     return 0
 
 
-def rescan_devices_on_all_trunks(communicator, logger):
-    res = []
-
-    logger.info("Rescanning devices on trunks")
-
-    for trunk_number in tqdm(range(1, MAX_TRUNKS_COUNT + 1), unit="trunsk"):
-        r = communicator.rescan_sensors_on_trunk(trunk_number)
-        res.append(r.sensors_count())
-
-    return res
-
-
 def init_serial(uart_name, uart_speed):
     return serial.Serial(
         uart_name,
@@ -194,10 +163,6 @@ def my_hexlify(data):
     return binascii.hexlify(data).decode("ascii")
 
 
-def random_byte_array(length):
-    return bytearray((random.getrandbits(8) for _ in range(length)))
-
-
 if __name__ == "__main__":
     res = main()
     exit(res)
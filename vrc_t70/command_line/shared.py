@@ -1,5 +1,8 @@
 import logging
 
+from vrc_t70.baudrate import BaudrateCache, detect_baudrate
+from vrc_t70.defaults import DEFAULT_BAUDRATE
+
 
 def init_logger(logger_name=__name__, log_level=logging.DEBUG):
     formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
@@ -14,3 +17,18 @@ def init_logger(logger_name=__name__, log_level=logging.DEBUG):
     logger.addHandler(ch)
 
     return logger
+
+
+def resolve_uart_speed(uart_name, uart_speed, addresses, logger):
+    if uart_speed is not None:
+        return uart_speed
+
+    logger.info("detecting uart speed for {}...".format(uart_name))
+    uart_speed = detect_baudrate(uart_name, addresses=addresses, cache=BaudrateCache())
+
+    if uart_speed is None:
+        logger.warning("can't detect uart speed, using default {}".format(DEFAULT_BAUDRATE))
+        return DEFAULT_BAUDRATE
+
+    logger.info("uart speed is {}".format(uart_speed))
+    return uart_speed
@@ -0,0 +1,123 @@
+from .commands import VrcT70Commands
+from .request import VrcT70Request
+from .response import (ControllerNewAddressResponse, SensorUniqueAddressOnTrunkResponse, SensorUniqueIdResponse,
+                       SessionIdResponse, TemperatureOnSensorResponse, TemperatureOnTrunkResponse,
+                       TrunkSensortsCountResponse)
+
+
+class VrcT70CommandSet(object):
+    # Requests building for all supported commands. Actual transport is implemented
+    # in _execute(), so same commands set can be used by sync and asyncio communicators.
+    def execute(self, request, response_type=None):
+        # sends already built request, response is converted to response_type when specified
+        return self._execute(request, response_type)
+
+    def _execute(self, request, response_type=None):
+        raise NotImplementedError()
+
+    def ping(self, sequence_id=None):
+        return self._execute(
+            VrcT70Request(
+                self.controller_address,
+                VrcT70Commands.PING,
+                sequence_id
+            )
+        )
+
+    def rescan_sensors_on_trunk(self, trunk_number, sequence_id=None):
+        return self._execute(
+            VrcT70Request(
+                self.controller_address,
+                VrcT70Commands.RESCAN_SENSORS_ON_TRUNK,
+                sequence_id,
+                bytearray([trunk_number & 0xff])
+            ),
+            TrunkSensortsCountResponse
+        )
+
+    def get_temperature_on_sensor_on_trunk(self, trunk_number, sensor_index, sequence_id=None):
+        return self._execute(
+            VrcT70Request(
+                self.controller_address,
+                VrcT70Commands.GET_TEMPERATURE_OF_SENSOR_ON_TRUNK,
+                sequence_id,
+                bytearray([trunk_number & 0xff, sensor_index & 0xff])
+            ),
+            TemperatureOnSensorResponse
+        )
+
+    def get_sensor_unique_address_on_trunk(self, trunk_number, sensor_index, sequence_id=None):
+        return self._execute(
+            VrcT70Request(
+                self.controller_address,
+                VrcT70Commands.GET_SENSOR_UNIQUE_ADDRESS_ON_TRUNK,
+                sequence_id,
+                bytearray([trunk_number & 0xff, sensor_index & 0xff])
+            ),
+            SensorUniqueIdResponse
+        )
+
+    def get_temperature_on_trunk(self, trunk_number, sequence_id=None):
+        return self._execute(
+            VrcT70Request(
+                self.controller_address,
+                VrcT70Commands.GET_TEMPERATURES_ON_TRUNK,
+                sequence_id,
+                bytearray([trunk_number & 0xff])
+            ),
+            TemperatureOnTrunkResponse
+        )
+
+    def get_sensors_unique_addresses_on_trunk(self, trunk_number, sequence_id=None):
+        return self._execute(
+            VrcT70Request(
+                self.controller_address,
+                VrcT70Commands.GET_SENSORS_UNIQUE_ADDRESSES_ON_TRUNK,
+                sequence_id,
+                bytearray([trunk_number & 0xff])
+            ),
+            SensorUniqueAddressOnTrunkResponse
+        )
+
+    def get_session_id(self, sequence_id=None):
+        return self._execute(
+            VrcT70Request(
+                self.controller_address,
+                VrcT70Commands.GET_SESSION_ID,
+                sequence_id
+            ),
+            SessionIdResponse
+        )
+
+    def set_session_id(self, session_id, sequence_id=None):
+        return self._execute(
+            VrcT70Request(
+                self.controller_address,
+                VrcT70Commands.SET_SESSION_ID,
+                sequence_id,
+                session_id[0: 4]
+            ),
+            SessionIdResponse
+        )
+
+    def get_sensors_count_on_trunk(self, trunk_number, sequence_id=None):
+        return self._execute(
+            VrcT70Request(
+                self.controller_address,
+                VrcT70Commands.GET_SENSORS_COUNT_ON_TRUNK,
+                sequence_id,
+                bytearray([trunk_number])
+            ),
+            TrunkSensortsCountResponse
+        )
+
+    def set_new_controller_address(self, new_address, sequence_id=None):
+        return self._execute(
+            VrcT70Request(
+                self.controller_address,
+                VrcT70Commands.SET_CONTROLLER_NEW_ADDRESS,
+                sequence_id,
+                bytearray([new_address])
+            ),
+            ControllerNewAddressResponse
+        )
@@ -1,127 +1,30 @@
 from .base_communicator import VrcT70CommunicatorBase
+from .command_set import VrcT70CommandSet
 from .commands import VrcT70Commands
+from .exceptions import NoAnswerFromController
 from .request import VrcT70Request
-from .response import (ControllerNewAddressResponse, SensorUniqueAddressOnTrunkResponse, SensorUniqueIdResponse,
-                       SessionIdResponse, TemperatureOnSensorResponse, TemperatureOnTrunkResponse,
-                       TrunkSensortsCountResponse)
 
 
-class VrcT70Communicator(VrcT70CommunicatorBase):
-    def __init__(self, serial, controller_address=0x01):
-        super().__init__(serial, controller_address)
+class VrcT70Communicator(VrcT70CommunicatorBase, VrcT70CommandSet):
+    def __init__(self, serial, controller_address=0x01, retry_policy=None):
+        super().__init__(serial, controller_address, retry_policy)
 
-    def ping(self, sequence_id=0x0000):
-        return self.send_command(
-            VrcT70Request(
-                self.controller_address,
-                VrcT70Commands.PING,
-                sequence_id
-            )
-        )
+    def _execute(self, request, response_type=None):
+        res = self.send_command(request)
 
-    def rescan_sensors_on_trunk(self, trunk_number, sequence_id=0x0000):
-        res = self.send_command(
-            VrcT70Request(
-                self.controller_address,
-                VrcT70Commands.RESCAN_SENSORS_ON_TRUNK,
-                sequence_id,
-                bytearray([trunk_number & 0xff])
-            )
-        )
+        if (response_type is None) or isinstance(res, response_type):
+            return res
 
-        return TrunkSensortsCountResponse(res)
+        return response_type(res)
 
-    def get_temperature_on_sensor_on_trunk(self, trunk_number, sensor_index, sequence_id=0x0000):
-        res = self.send_command(
-            VrcT70Request(
-                self.controller_address,
-                VrcT70Commands.GET_TEMPERATURE_OF_SENSOR_ON_TRUNK,
-                sequence_id,
-                bytearray([trunk_number & 0xff, sensor_index & 0xff])
-            )
-        )
+    def probe(self):
+        # fast check that controller is online (used for devices discovery): single ping attempt
+        # without retries and with short timeout
+        request = VrcT70Request(self.controller_address, VrcT70Commands.PING, None)
 
-        return TemperatureOnSensorResponse(res)
+        try:
+            self.send_command(request, retries_count=1, timeout=self._bus.probe_timeout(len(request)))
+        except NoAnswerFromController:
+            return False
 
-    def get_sensor_unique_address_on_trunk(self, trunk_number, sensor_index, sequence_id=0x0000):
-        res = self.send_command(
-            VrcT70Request(
-                self.controller_address,
-                VrcT70Commands.GET_SENSOR_UNIQUE_ADDRESS_ON_TRUNK,
-                sequence_id,
-                bytearray([trunk_number & 0xff, sensor_index & 0xff])
-            )
-        )
-
-        return SensorUniqueIdResponse(res)
-
-    def get_temperature_on_trunk(self, trunk_number, sequence_id=0x0000):
-        res = self.send_command(
-            VrcT70Request(
-                self.controller_address,
-                VrcT70Commands.GET_TEMPERATURES_ON_TRUNK,
-                sequence_id,
-                bytearray([trunk_number & 0xff])
-            )
-        )
-
-        return TemperatureOnTrunkResponse(res)
-
-    def get_sensors_unique_addresses_on_trunk(self, trunk_number, sequence_id=0x0000):
-        res = self.send_command(
-            VrcT70Request(
-                self.controller_address,
-                VrcT70Commands.GET_SENSORS_UNIQUE_ADDRESSES_ON_TRUNK,
-                sequence_id,
-                bytearray([trunk_number & 0xff])
-            )
-        )
-
-        return SensorUniqueAddressOnTrunkResponse(res)
-
-    def get_session_id(self, sequence_id=0x0000):
-        res = self.send_command(
-            VrcT70Request(
-                self.controller_address,
-                VrcT70Commands.GET_SESSION_ID,
-                sequence_id
-            )
-        )
-
-        return SessionIdResponse(res)
-
-    def set_session_id(self, session_id, sequence_id=0x0000):
-        res = self.send_command(
-            VrcT70Request(
-                self.controller_address,
-                VrcT70Commands.SET_SESSION_ID,
-                sequence_id,
-                session_id[0: 4]
-            )
-        )
-
-        return SessionIdResponse(res)
-
-    def get_sensors_count_on_trunk(self, trunk_number, sequence_id=0x0000):
-        res = self.send_command(
-            VrcT70Request(
-                self.controller_address,
-                VrcT70Commands.GET_SENSORS_COUNT_ON_TRUNK,
-                sequence_id,
-                bytearray([trunk_number])
-            )
-        )
-
-        return TrunkSensortsCountResponse(res)
-
-    def set_new_controller_address(self, new_address, sequence_id=0x0000):
-        res = self.send_command(
-            VrcT70Request(
-                self.controller_address,
-                VrcT70Commands.SET_CONTROLLER_NEW_ADDRESS,
-                sequence_id,
-                bytearray([new_address])
-            )
-        )
-
-        return ControllerNewAddressResponse(res)
+        return True
@@ -0,0 +1,33 @@
+# CRC-8 DVB-S2 (poly 0xD5, init 0x00, not reflected, no final xor)
+CRC8_POLY = 0xD5
+CRC8_INIT = 0x00
+
+
+def _make_crc8_table(poly):
+    table = bytearray(256)
+
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 0x80:
+                crc = ((crc << 1) ^ poly) & 0xff
+            else:
+                crc = (crc << 1) & 0xff
+
+        table[byte] = crc
+
+    return bytes(table)
+
+
+CRC8_TABLE = _make_crc8_table(CRC8_POLY)
+
+
+def crc8(data, crc=CRC8_INIT):
+    # data - any iterable of ints in range 0..255 (bytes, bytearray, memoryview, tuple),
+    # pass previous result as crc to continue calculation over next chunk
+    table = CRC8_TABLE
+
+    for byte in data:
+        crc = table[crc ^ byte]
+
+    return crc
@@ -0,0 +1,382 @@
+import threading
+import time
+from collections import namedtuple
+
+from vrc_t70.bus import VrcT70Bus
+from vrc_t70.bus_owner import VrcT70BusOwner
+from vrc_t70.communicator import VrcT70Communicator
+from vrc_t70.defaults import SENSORS_REFRESH_PERIOD
+from vrc_t70.exceptions import NoAnswerFromController, ProcessingError
+from vrc_t70.poller import VrcT70Poller
+from vrc_t70.scheduler import TrafficClass
+from vrc_t70.topology_cache import TopologyCache, load_topology
+
+# delay before next attempt to start polling after port failure or when no controllers answered
+RESTART_DELAY = 1.0
+
+# how often session ids of controllers are checked, changed session id means that controller was
+# restarted (or rescanned by somebody else), so sensors topology must be loaded again
+SESSION_CHECK_PERIOD = 60.0
+
+TrunkState = namedtuple(
+    typename="TrunkState",
+    field_names=[
+        "port_name",
+        "controller_address",
+        "trunk_number",
+        "timestamp",
+        "temperatures",
+        "connected",
+        "addresses",
+        "error"
+    ]
+)
+
+PortHealth = namedtuple(
+    typename="PortHealth",
+    field_names=[
+        "port_name",
+        "is_running",
+        "controllers",
+        "trunks_count",
+        "cycles_count",
+        "last_cycle_timestamp",
+        "cycle_period",
+        "bus_utilization",
+        "failed_trunks_count",
+        "last_error"
+    ]
+)
+
+
+class ReadingsStore(object):
+    # Latest state of each trunk. States are immutable tuples replaced under lock, so readers
+    # always see consistent trunk data.
+    def __init__(self):
+        self._trunks = dict()
+        self._lock = threading.Lock()
+
+    def update_trunk(self, state):
+        key = (state.port_name, state.controller_address, state.trunk_number)
+
+        with self._lock:
+            previous = self._trunks.get(key)
+            if (state.error is not None) and (previous is not None):
+                # keeping last known values, only error is updated
+                state = previous._replace(error=state.error)
+
+            self._trunks[key] = state
+
+    def trunks(self, port_name=None, controller_address=None, trunk_number=None):
+        with self._lock:
+            items = sorted(self._trunks.items())
+
+        return [
+            state for key, state in items
+            if _is_matched(key, (port_name, controller_address, trunk_number))
+        ]
+
+    def readings(self, port_name=None, controller_address=None, trunk_number=None):
+        res = []
+        for state in self.trunks(port_name, controller_address, trunk_number):
+            for index, temperature in enumerate(state.temperatures):
+                res.append(
+                    {
+                        "port": state.port_name,
+                        "controller": state.controller_address,
+                        "trunk": state.trunk_number,
+                        "index": index,
+                        "address": state.addresses[index] if index < len(state.addresses) else None,
+                        "temperature": temperature if state.connected[index] else None,
+                        "connected": bool(state.connected[index]),
+                        "timestamp": state.timestamp,
+                    }
+                )
+
+        return res
+
+
+class PortCollector(object):
+    # Owns one serial port: discovers trunks of controllers and polls them continuously
+    # in background thread, latest values are published into ReadingsStore. Trunks are
+    # discovered again when no controllers answered, when all trunks failed in poll cycle
+    # and when session id of some controller was changed.
+    def __init__(
+            self,
+            port_name,
+            bus,
+            controller_addresses,
+            store,
+            refresh_period=SENSORS_REFRESH_PERIOD,
+            topology_cache=None,
+            recorder=None,
+            sensor_index=None,
+            session_check_period=SESSION_CHECK_PERIOD
+    ):
+        # bus can be VrcT70BusOwner shared with other users of the port
+        if not isinstance(bus, (VrcT70Bus, VrcT70BusOwner)):
+            bus = VrcT70Bus(bus)
+
+        self.port_name = port_name
+        self.bus = bus
+        self.controller_addresses = sorted(set(controller_addresses))
+        self.store = store
+        self.refresh_period = refresh_period
+        self.topology_cache = topology_cache
+        self.recorder = recorder
+        self.sensor_index = sensor_index
+        self.session_check_period = session_check_period
+
+        self.poller = None
+        self.online_addresses = []
+        # {controller address: session id of loaded topology}
+        self.session_ids = dict()
+        self.discoveries_count = 0
+        # {(controller address, trunk number): list of sensors ROM addresses as hex strings}
+        self.sensors_addresses = dict()
+
+        self.cycles_count = 0
+        self.last_snapshot = None
+        self.last_error = None
+
+        self._last_session_check = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        return (self._thread is not None) and self._thread.is_alive()
+
+    def discover(self):
+        cache = self.topology_cache if self.topology_cache is not None else TopologyCache()
+
+        online_addresses = []
+        trunks = []
+        sensors_addresses = dict()
+        session_ids = dict()
+
+        for address in self.controller_addresses:
+            communicator = self._communicator(address, TrafficClass.RESCAN)
+            try:
+                topology, _ = load_topology(communicator, self.port_name, cache, sensor_index=self.sensor_index)
+            except (NoAnswerFromController, ProcessingError) as e:
+                self.last_error = "controller 0x{:02x}: {}".format(address, e)
+                continue
+
+            online_addresses.append(address)
+            session_ids[address] = topology.session_id
+
+            for trunk_number, addresses in enumerate(topology.sensors_addresses, start=1):
+                if not addresses:
+                    continue
+
+                trunks.append((address, trunk_number))
+                sensors_addresses[(address, trunk_number)] = [item.hex() for item in addresses]
+
+        self.poller = VrcT70Poller(self.bus, online_addresses, refresh_period=self.refresh_period)
+        self.poller.trunks = trunks
+        self.online_addresses = online_addresses
+        self.sensors_addresses = sensors_addresses
+        self.session_ids = session_ids
+        self.discoveries_count += 1
+        self._last_session_check = time.monotonic()
+
+        return trunks
+
+    def is_session_changed(self):
+        # True when some online controller has other session id than its loaded topology
+        for address, session_id in sorted(self.session_ids.items()):
+            try:
+                r = self._communicator(address, TrafficClass.BACKGROUND).get_session_id()
+            except (NoAnswerFromController, ProcessingError):
+                # offline controllers are reported by poll errors
+                continue
+
+            if bytes(r.session_id()) != session_id:
+                return True
+
+        return False
+
+    def poll_once(self):
+        if self.poller is None:
+            self.discover()
+
+        snapshot = self.poller.poll_once()
+        self.publish(snapshot)
+
+        return snapshot
+
+    def publish(self, snapshot):
+        for (address, trunk_number), response in snapshot.trunks.items():
+            self.store.update_trunk(
+                TrunkState(
+                    port_name=self.port_name,
+                    controller_address=address,
+                    trunk_number=trunk_number,
+                    timestamp=snapshot.timestamp,
+                    temperatures=tuple(response.temperatures()),
+                    connected=tuple(response.connected_mask()),
+                    addresses=tuple(self.sensors_addresses.get((address, trunk_number), ())),
+                    error=None
+                )
+            )
+
+        for (address, trunk_number), error in snapshot.errors.items():
+            self.store.update_trunk(
+                TrunkState(
+                    port_name=self.port_name,
+                    controller_address=address,
+                    trunk_number=trunk_number,
+                    timestamp=snapshot.timestamp,
+                    temperatures=(),
+                    connected=(),
+                    addresses=tuple(self.sensors_addresses.get((address, trunk_number), ())),
+                    error=str(error)
+                )
+            )
+
+        if self.recorder is not None:
+            self.recorder.record_snapshot(snapshot)
+
+        self.cycles_count += 1
+        self.last_snapshot = snapshot
+
+    def read_trunk(self, controller_address, trunk_number, timeout=None):
+        # on-demand read between poller requests, available only when port is shared through bus owner
+        if not isinstance(self.bus, VrcT70BusOwner):
+            raise RuntimeError("port {} is not shared, on-demand reads are not available".format(self.port_name))
+
+        communicator = self.bus.communicator(controller_address, TrafficClass.INTERACTIVE)
+        return communicator.get_temperature_on_trunk(trunk_number).result(timeout)
+
+    def health(self):
+        snapshot = self.last_snapshot
+
+        return PortHealth(
+            port_name=self.port_name,
+            is_running=self.is_running,
+            controllers=list(self.online_addresses),
+            trunks_count=len(self.poller.trunks) if self.poller else 0,
+            cycles_count=self.cycles_count,
+            last_cycle_timestamp=snapshot.timestamp if snapshot else None,
+            cycle_period=snapshot.cycle_period if snapshot else None,
+            bus_utilization=snapshot.bus_utilization if snapshot else None,
+            failed_trunks_count=len(snapshot.errors) if snapshot else 0,
+            last_error=self.last_error
+        )
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="vrc-t70-collector-{}".format(self.port_name),
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                if self.poller is None:
+                    self.discover()
+
+                if not self.online_addresses:
+                    self.last_error = self.last_error or "no controllers answered"
+                    self.poller = None
+                    self._stop_event.wait(RESTART_DELAY)
+                    continue
+
+                self._poll()
+            except Exception as e:
+                # port was disconnected or failed, trying again with rediscovery
+                self.last_error = "{}: {}".format(type(e).__name__, e)
+                self.poller = None
+                self._stop_event.wait(RESTART_DELAY)
+
+    def _poll(self):
+        # polls until stop or until trunks must be discovered again
+        for snapshot in self.poller.snapshots():
+            self.publish(snapshot)
+
+            if self._stop_event.is_set():
+                return
+
+            if self._is_rediscovery_needed(snapshot):
+                self.poller = None
+                return
+
+    def _is_rediscovery_needed(self, snapshot):
+        if snapshot.errors and not snapshot.trunks:
+            return True
+
+        if time.monotonic() - self._last_session_check < self.session_check_period:
+            return False
+
+        self._last_session_check = time.monotonic()
+        return self.is_session_changed()
+
+    def _communicator(self, controller_address, traffic_class):
+        if isinstance(self.bus, VrcT70BusOwner):
+            return self.bus.communicator(controller_address, traffic_class, blocking=True)
+
+        return VrcT70Communicator(self.bus, controller_address)
+
+
+class Collector(object):
+    # all port collectors of the daemon with shared readings store, sensors index and topology cache
+    def __init__(self, port_collectors, store, sensor_index=None, topology_cache=None):
+        self.port_collectors = list(port_collectors)
+        self.store = store
+        self.sensor_index = sensor_index
+
+        # ports threads update the same cache file, so they share one cache object
+        self.topology_cache = topology_cache if topology_cache is not None else TopologyCache()
+        for item in self.port_collectors:
+            if item.topology_cache is None:
+                item.topology_cache = self.topology_cache
+        self.started_at = None
+
+    def start(self):
+        self.started_at = time.time()
+        for item in self.port_collectors:
+            item.start()
+
+    def stop(self):
+        for item in self.port_collectors:
+            item.stop()
+
+    def port_collector(self, port_name):
+        for item in self.port_collectors:
+            if item.port_name == port_name:
+                return item
+
+        return None
+
+    def health(self):
+        ports = [item.health() for item in self.port_collectors]
+
+        if not ports:
+            status = "down"
+        elif all(item.is_running and item.cycles_count and not item.failed_trunks_count for item in ports):
+            status = "ok"
+        elif any(item.is_running and item.cycles_count for item in ports):
+            status = "degraded"
+        else:
+            status = "down"
+
+        return status, ports
+
+
+def _is_matched(key, expected):
+    return all((value is None) or (item == value) for item, value in zip(key, expected))
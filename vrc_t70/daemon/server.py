@@ -0,0 +1,236 @@
+import concurrent.futures
+import json
+import os
+import socketserver
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from vrc_t70.exceptions import NoAnswerFromController, ProcessingError
+from vrc_t70.sensor_index import format_rom_address, rom_address_to_int
+
+DEFAULT_HTTP_HOST = "127.0.0.1"
+DEFAULT_HTTP_PORT = 8470
+
+# max time to wait for on-demand read
+LIVE_READ_TIMEOUT = 2.0
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    # Read-only JSON API over collector state:
+    # /readings - latest value of each sensor, /trunks - latest state of each trunk,
+    # /sensors - location of each sensor by ROM address (optional address parameter),
+    # /live - on-demand read of trunk (port, controller and trunk parameters are required),
+    # /health - collector and ports status, /metrics - communication metrics in Prometheus format.
+    # /readings and /trunks accept optional port, controller and trunk query parameters.
+    server_version = "vrc-t70-daemon"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        routes = {
+            "/readings": self._readings,
+            "/trunks": self._trunks,
+            "/sensors": self._sensors,
+            "/live": self._live,
+            "/health": self._health,
+            "/metrics": self._metrics,
+        }
+
+        route = routes.get(url.path.rstrip("/") or "/")
+        if route is None:
+            self._send_json({"error": "not found"}, status=404)
+            return
+
+        try:
+            route(parse_qs(url.query))
+        except ValueError as e:
+            self._send_json({"error": str(e)}, status=400)
+
+    def log_message(self, format, *args):
+        # requests are not logged, daemon is queried frequently by dashboards
+        pass
+
+    def _readings(self, query):
+        port_name, controller_address, trunk_number = _filters(query)
+        self._send_json(
+            {"readings": self.server.collector.store.readings(port_name, controller_address, trunk_number)}
+        )
+
+    def _trunks(self, query):
+        port_name, controller_address, trunk_number = _filters(query)
+        trunks = self.server.collector.store.trunks(port_name, controller_address, trunk_number)
+
+        self._send_json(
+            {
+                "trunks": [
+                    {
+                        "port": item.port_name,
+                        "controller": item.controller_address,
+                        "trunk": item.trunk_number,
+                        "timestamp": item.timestamp,
+                        "temperatures": [
+                            value if connected else None for value, connected in zip(item.temperatures, item.connected)
+                        ],
+                        "connected": [bool(value) for value in item.connected],
+                        "addresses": list(item.addresses),
+                        "error": item.error,
+                    }
+                    for item in trunks
+                ]
+            }
+        )
+
+    def _sensors(self, query):
+        sensor_index = self.server.collector.sensor_index
+        if sensor_index is None:
+            self._send_json({"sensors": []})
+            return
+
+        address = _last_value(query, "address")
+        if address is None:
+            items = sorted(sensor_index, key=lambda item: item[1])
+        else:
+            try:
+                address = rom_address_to_int(address)
+            except ValueError:
+                raise ValueError("'address' must be hex string")
+
+            location = sensor_index.location(address)
+            items = [(address, location)] if location is not None else []
+
+        self._send_json(
+            {
+                "sensors": [
+                    {
+                        "address": format_rom_address(address),
+                        "port": location.port_name,
+                        "controller": location.controller_address,
+                        "trunk": location.trunk_number,
+                        "index": location.sensor_index,
+                    }
+                    for address, location in items
+                ]
+            }
+        )
+
+    def _live(self, query):
+        port_name, controller_address, trunk_number = _filters(query)
+        if (port_name is None) or (controller_address is None) or (trunk_number is None):
+            raise ValueError("'port', 'controller' and 'trunk' are required")
+
+        port_collector = self.server.collector.port_collector(port_name)
+        if port_collector is None:
+            self._send_json({"error": "unknown port"}, status=404)
+            return
+
+        try:
+            r = port_collector.read_trunk(controller_address, trunk_number, LIVE_READ_TIMEOUT)
+        except RuntimeError as e:
+            self._send_json({"error": str(e)}, status=503)
+            return
+        except (concurrent.futures.TimeoutError, NoAnswerFromController) as e:
+            self._send_json({"error": "no answer: {}".format(e)}, status=504)
+            return
+        except ProcessingError as e:
+            self._send_json({"error": str(e)}, status=502)
+            return
+
+        connected = r.connected_mask()
+        self._send_json(
+            {
+                "port": port_name,
+                "controller": controller_address,
+                "trunk": trunk_number,
+                "timestamp": time.time(),
+                "temperatures": [
+                    value if is_connected else None for value, is_connected in zip(r.temperatures(), connected)
+                ],
+                "connected": [bool(value) for value in connected],
+            }
+        )
+
+    def _health(self, query):
+        collector = self.server.collector
+        status, ports = collector.health()
+
+        self._send_json(
+            {
+                "status": status,
+                "uptime": (time.time() - collector.started_at) if collector.started_at else None,
+                "ports": [item._asdict() for item in ports],
+            },
+            status=200 if status != "down" else 503
+        )
+
+    def _metrics(self, query):
+        registry = self.server.metrics
+        text = registry.to_prometheus() if registry is not None else ""
+
+        self._send(text.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+
+    def _send_json(self, data, status=200):
+        self._send(json.dumps(data).encode("utf-8"), "application/json", status)
+
+    def _send(self, body, content_type, status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class QueryHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, collector, metrics=None):
+        super().__init__(address, QueryHandler)
+        self.collector = collector
+        self.metrics = metrics
+
+
+class QueryUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    # same HTTP API on Unix socket, access is controlled by socket file permissions
+    daemon_threads = True
+
+    def __init__(self, path, collector, metrics=None):
+        if os.path.exists(path):
+            os.remove(path)
+
+        super().__init__(path, _UnixQueryHandler)
+        self.collector = collector
+        self.metrics = metrics
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+class _UnixQueryHandler(QueryHandler):
+    def address_string(self):
+        # peer address of Unix socket is empty string
+        return "unix"
+
+
+def _filters(query):
+    return (
+        _last_value(query, "port"),
+        _int_value(query, "controller"),
+        _int_value(query, "trunk"),
+    )
+
+
+def _last_value(query, name):
+    values = query.get(name)
+    return values[-1] if values else None
+
+
+def _int_value(query, name):
+    value = _last_value(query, name)
+    if value is None:
+        return None
+
+    try:
+        return int(value, 0)
+    except ValueError:
+        raise ValueError("'{}' must be integer".format(name))
@@ -1,3 +1,19 @@
 MIN_DELAY_BETWEEN_REQUESTS = 0.02
 MAX_RETRIES_FOR_REQUEST = 3
 DEFAULT_CONTROLLER_ADDRESS = 0x01
+DEFAULT_RESPONSE_TIMEOUT = 1.0
+# each sensor on each trunk re-read by controller every 100 ms
+SENSORS_REFRESH_PERIOD = 0.1
+# timeout for discovery probes until round trip time is learned
+DEFAULT_PROBE_TIMEOUT = 0.03
+# lower limit for learned timeouts: controller turnaround, USB-RS485 adapter latency timer
+# (16 ms by default for FTDI chips) and OS scheduling jitter
+MIN_RESPONSE_TIMEOUT = 0.05
+DEFAULT_BAUDRATE = 115200
+MIN_CONTROLLER_ADDRESS = 0x01
+MAX_CONTROLLER_ADDRESS = 0xfe
+# speeds checked when baudrate detection is performed, most probable first
+CANDIDATE_BAUDRATES = (115200, 57600, 38400, 19200, 9600)
+# scan of addresses range detects speed by first addresses of the range only, each silent address
+# costs probe timeout at each candidate speed
+MAX_BAUDRATE_DETECTION_ADDRESSES = 4
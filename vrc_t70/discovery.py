@@ -0,0 +1,110 @@
+import fnmatch
+import glob
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import serial.tools.list_ports
+
+from .bus import VrcT70Bus
+from .communicator import VrcT70Communicator
+from .defaults import DEFAULT_BAUDRATE, DEFAULT_PROBE_TIMEOUT, MAX_CONTROLLER_ADDRESS, MIN_CONTROLLER_ADDRESS
+from .serial_port import open_serial
+
+
+PortScanResult = namedtuple(
+    typename="PortScanResult",
+    field_names=["port_name", "baudrate", "addresses", "seconds_elapsed", "error", "failures"]
+)
+
+
+def list_port_names(pattern=None):
+    # serial ports reported by OS, optionally filtered by glob pattern (matched against device
+    # name). Patterns with path separator are also expanded on file system, so "/dev/ttyUSB*"
+    # works for adapters which are not reported by list_ports
+    port_names = [item.device for item in serial.tools.list_ports.comports()]
+
+    if pattern is None:
+        return sorted(port_names)
+
+    res = {item for item in port_names if fnmatch.fnmatch(item, pattern)}
+    if "/" in pattern:
+        res.update(glob.glob(pattern))
+
+    return sorted(res)
+
+
+def scan_port(
+        port_name,
+        baudrate=DEFAULT_BAUDRATE,
+        min_address=MIN_CONTROLLER_ADDRESS,
+        max_address=MAX_CONTROLLER_ADDRESS,
+        timeout=DEFAULT_PROBE_TIMEOUT,
+        serial_factory=None
+):
+    # error is set when port can't be used, failures has {address: exception} for controllers
+    # which answered, but failed (scan continues with next address)
+    serial_factory = serial_factory or open_serial
+
+    tm_begin = time.time()
+    addresses = []
+    failures = dict()
+
+    try:
+        uart = serial_factory(port_name, baudrate=baudrate, timeout=timeout)
+    except Exception as e:
+        return PortScanResult(port_name, baudrate, addresses, time.time() - tm_begin, e, failures)
+
+    try:
+        communicator = VrcT70Communicator(VrcT70Bus(uart, initial_probe_timeout=timeout))
+        probe_addresses(communicator, range(min_address, max_address + 1), addresses, failures)
+    except Exception as e:
+        return PortScanResult(port_name, baudrate, addresses, time.time() - tm_begin, e, failures)
+    finally:
+        uart.close()
+
+    return PortScanResult(port_name, baudrate, addresses, time.time() - tm_begin, None, failures)
+
+
+def probe_addresses(communicator, device_addresses, addresses, failures):
+    # online addresses are appended to addresses, errors of controllers are collected in failures,
+    # port errors (serial exceptions are OSError too) stop the scan
+    for device_address in device_addresses:
+        communicator.controller_address = device_address
+
+        try:
+            is_online = communicator.probe()
+        except OSError:
+            raise
+        except Exception as e:
+            failures[device_address] = e
+            continue
+
+        if is_online:
+            addresses.append(device_address)
+
+
+def scan_ports(port_names, baudrates=(DEFAULT_BAUDRATE, ), **kwargs):
+    # each port is scanned in own worker thread, speeds for same port are checked one by one
+    port_names = list(port_names)
+    if not port_names:
+        return []
+
+    def scan_all_baudrates(port_name):
+        return [scan_port(port_name, baudrate, **kwargs) for baudrate in baudrates]
+
+    with ThreadPoolExecutor(max_workers=len(port_names)) as executor:
+        results = executor.map(scan_all_baudrates, port_names)
+
+    return [item for port_results in results for item in port_results]
+
+
+def make_inventory(scan_results):
+    # port -> baudrate -> controllers addresses, suitable for JSON serialization
+    inventory = dict()
+
+    for item in scan_results:
+        port_data = inventory.setdefault(item.port_name, dict())
+        port_data[str(item.baudrate)] = list(item.addresses)
+
+    return inventory
@@ -0,0 +1,118 @@
+import struct
+from collections import OrderedDict
+
+from .crc import crc8
+
+# 1 byte - device address
+# 1 byte - command
+# 2 bytes - sequence id
+# 1 byte - data length
+# N bytes - data,
+# 1 bytes - crc 8
+REQUEST_HEADER = struct.Struct(">BBHB")
+REQUEST_HEADER_SIZE = REQUEST_HEADER.size
+REQUEST_CRC_SIZE = 1
+
+SEQUENCE_ID_OFFSET = 2
+SEQUENCE_ID_SIZE = 2
+
+DEFAULT_MAX_CACHED_FRAMES = 256
+
+# {bytes count after sequence id: (crc of high byte, crc of low byte) tables}
+_sequence_crc_tables = dict()
+
+
+def sequence_crc_tables(suffix_length):
+    # CRC-8 used by protocol is linear (zero init, no final xor), so CRC of frame with sequence id
+    # is CRC of the same frame with zero sequence id xor CRC of sequence id bytes followed by
+    # suffix_length zero bytes. The last one is taken from two tables indexed by sequence id bytes.
+    res = _sequence_crc_tables.get(suffix_length)
+    if res is None:
+        zeros = bytes(suffix_length)
+        res = (
+            bytes(crc8(bytes([value, 0x00]) + zeros) for value in range(256)),
+            bytes(crc8(bytes([0x00, value]) + zeros) for value in range(256)),
+        )
+        _sequence_crc_tables[suffix_length] = res
+
+    return res
+
+
+class RequestFrame(object):
+    # Fully built request frame. Only sequence id and CRC are patched for each request,
+    # CRC is updated with two table lookups without walking over frame.
+    __slots__ = ("buffer", "base_crc", "high_crc_table", "low_crc_table")
+
+    def __init__(self, controller_address, command, data=None):
+        data = data or b""
+
+        buffer = bytearray(REQUEST_HEADER_SIZE + len(data) + REQUEST_CRC_SIZE)
+        REQUEST_HEADER.pack_into(buffer, 0, controller_address & 0xff, command & 0xff, 0x0000, len(data) & 0xff)
+        buffer[REQUEST_HEADER_SIZE: -REQUEST_CRC_SIZE] = data
+
+        self.base_crc = crc8(memoryview(buffer)[:-REQUEST_CRC_SIZE])
+        buffer[-1] = self.base_crc
+
+        self.buffer = buffer
+        self.high_crc_table, self.low_crc_table = sequence_crc_tables(
+            len(buffer) - SEQUENCE_ID_OFFSET - SEQUENCE_ID_SIZE - REQUEST_CRC_SIZE
+        )
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def patch(self, sequence_id):
+        high = (sequence_id >> 8) & 0xff
+        low = sequence_id & 0xff
+
+        buffer = self.buffer
+        buffer[SEQUENCE_ID_OFFSET] = high
+        buffer[SEQUENCE_ID_OFFSET + 1] = low
+        buffer[-1] = self.base_crc ^ self.high_crc_table[high] ^ self.low_crc_table[low]
+
+        return buffer
+
+
+class VrcT70RequestEncoder(object):
+    # Cache of request frames by (address, command, data). Poller sends the same few frames
+    # over and over again, so frame is built once and then only sequence id and CRC are patched.
+    # encode() returns cached buffer, it stays valid until next encode() of the same frame,
+    # so it must be written to port before next request with same parameters is encoded.
+    def __init__(self, max_cached_frames=DEFAULT_MAX_CACHED_FRAMES):
+        self.max_cached_frames = max_cached_frames
+        self._frames = OrderedDict()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def frame(self, controller_address, command, data=None):
+        key = (controller_address, command, bytes(data) if data else None)
+
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._frames.move_to_end(key)
+            return frame
+
+        frame = RequestFrame(controller_address, command, data)
+        self._frames[key] = frame
+
+        if len(self._frames) > self.max_cached_frames:
+            self._frames.popitem(last=False)
+
+        return frame
+
+    def encode(self, controller_address, command, sequence_id=0x0000, data=None):
+        return self.frame(controller_address, command, data).patch(sequence_id)
+
+    def encode_into(self, buffer, offset, controller_address, command, sequence_id=0x0000, data=None):
+        # copies frame into caller provided buffer, returns frame size
+        frame = self.encode(controller_address, command, sequence_id, data)
+        buffer[offset: offset + len(frame)] = frame
+
+        return len(frame)
+
+    def encode_request(self, request):
+        return self.encode(request.controller_address, request.command, request.sequence_id or 0x0000, request.data)
+
+    def clear(self):
+        self._frames.clear()
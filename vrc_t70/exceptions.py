@@ -14,5 +14,25 @@ class NoAnswerFromController(Exception):
     pass
 
 
+class DeadlineExceeded(NoAnswerFromController):
+    # request was not sent before deadline of its traffic class
+    pass
+
+
 class WrongBytesCount(Exception):
     pass
+
+
+class ProcessingError(Exception):
+    # controller answered, but reported error in processing result
+    def __init__(self, message, processing_result):
+        super().__init__(message)
+        self.processing_result = processing_result
+
+
+class SensorBusy(ProcessingError):
+    pass
+
+
+class SensorError(ProcessingError):
+    pass
@@ -0,0 +1,257 @@
+import csv
+import json
+import math
+from array import array
+from collections import namedtuple
+
+from .bulk import numpy_dtype, require_numpy
+from .recorder import STATUS_DISCONNECTED, STATUS_ERROR, STATUS_OK
+from .sensor_index import format_rom_address, rom_address_to_int
+
+# (field name, attribute with column, array typecode)
+COLUMNS = (
+    ("controller", "controllers", "B"),
+    ("trunk", "trunks", "B"),
+    ("index", "indexes", "B"),
+    ("address", "addresses", "Q"),
+    ("temperature", "temperatures", "f"),
+    ("status", "statuses", "B"),
+)
+
+FIELD_NAMES = tuple(item[0] for item in COLUMNS)
+_COLUMN_ATTRIBUTES = {name: attribute for name, attribute, _ in COLUMNS}
+
+FLEET_SNAPSHOT_FIELDS = (
+    ("controller", "u1"),
+    ("trunk", "u1"),
+    ("index", "u1"),
+    ("address", "<u8"),
+    ("temperature", "<f4"),
+    ("status", "u1"),
+)
+
+SensorReading = namedtuple("SensorReading", FIELD_NAMES)
+
+SnapshotDiff = namedtuple(
+    typename="SnapshotDiff",
+    field_names=[
+        # rows of new snapshot which are absent in old one
+        "added",
+        # rows of old snapshot which are absent in new one
+        "vanished",
+        # rows of new snapshot with changed status or temperature
+        "changed",
+        # array("f") with temperature change for each changed row
+        "deltas"
+    ]
+)
+
+
+class FleetSnapshot(object):
+    # Readings of one poll cycle stored column-wise in typed arrays, one row per sensor:
+    # 16 bytes per sensor instead of tuple with boxed values. Rows are identified by ROM address,
+    # sensors with unknown address (zero) by (controller, trunk, index).
+    __slots__ = ("timestamp", "port_name") + tuple(item[1] for item in COLUMNS)
+
+    def __init__(self, timestamp=0.0, port_name=None):
+        self.timestamp = timestamp
+        self.port_name = port_name
+
+        for _, attribute, typecode in COLUMNS:
+            setattr(self, attribute, array(typecode))
+
+    @classmethod
+    def from_poll_snapshot(cls, snapshot, addresses=None, port_name=None):
+        # snapshot - PollSnapshot, addresses - {(controller address, trunk number): sensors ROM addresses}.
+        # Sensors of failed trunks are added with STATUS_ERROR when their addresses are known
+        addresses = addresses or dict()
+        res = cls(snapshot.timestamp, port_name)
+
+        for key in sorted(snapshot.trunks):
+            res.append_trunk(snapshot.trunks[key], addresses.get(key))
+
+        for controller_address, trunk_number in sorted(snapshot.errors):
+            for index, address in enumerate(addresses.get((controller_address, trunk_number), ())):
+                res.append(controller_address, trunk_number, index, address, math.nan, STATUS_ERROR)
+
+        return res
+
+    def __len__(self):
+        return len(self.controllers)
+
+    def __iter__(self):
+        columns = [getattr(self, attribute) for _, attribute, _ in COLUMNS]
+        return map(SensorReading._make, zip(*columns))
+
+    def __getitem__(self, row):
+        return SensorReading._make(getattr(self, attribute)[row] for _, attribute, _ in COLUMNS)
+
+    @property
+    def nbytes(self):
+        return sum(
+            getattr(self, attribute).itemsize * len(self) for _, attribute, _ in COLUMNS
+        )
+
+    def column(self, name):
+        return getattr(self, _COLUMN_ATTRIBUTES[name])
+
+    def append(self, controller_address, trunk_number, sensor_index, address, temperature, status=STATUS_OK):
+        self.controllers.append(controller_address)
+        self.trunks.append(trunk_number)
+        self.indexes.append(sensor_index)
+        self.addresses.append(rom_address_to_int(address) if address is not None else 0)
+        self.temperatures.append(temperature)
+        self.statuses.append(status)
+
+    def append_trunk(self, response, addresses=None):
+        # response - TemperatureOnTrunkResponse, addresses - sensors ROM addresses by index
+        temperatures = response.temperatures()
+        connected = response.connected_mask()
+        count = len(temperatures)
+
+        addresses = list(addresses or ())[:count]
+        addresses += [0] * (count - len(addresses))
+
+        self.controllers.extend([response.address] * count)
+        self.trunks.extend([response.trunk_number()] * count)
+        self.indexes.extend(range(count))
+        self.addresses.extend(rom_address_to_int(item) for item in addresses)
+
+        for index in range(count):
+            if not connected[index]:
+                temperatures[index] = math.nan
+
+        self.temperatures.extend(temperatures)
+        self.statuses.extend(STATUS_OK if item else STATUS_DISCONNECTED for item in connected)
+
+    def take(self, rows):
+        # new snapshot with given rows in given order
+        res = FleetSnapshot(self.timestamp, self.port_name)
+
+        rows = list(rows)
+        for _, attribute, _ in COLUMNS:
+            column = getattr(self, attribute)
+            getattr(res, attribute).extend(column[row] for row in rows)
+
+        return res
+
+    def select(self, controller=None, trunk=None, index=None, status=None):
+        # rows matching all specified values
+        conditions = [
+            (self.column(name), value)
+            for name, value in (("controller", controller), ("trunk", trunk), ("index", index), ("status", status))
+            if value is not None
+        ]
+
+        rows = range(len(self))
+        for column, value in conditions:
+            rows = [row for row in rows if column[row] == value]
+
+        return self.take(rows)
+
+    def where(self, predicate):
+        # rows for which predicate(SensorReading) is true
+        return self.take(row for row, item in enumerate(self) if predicate(item))
+
+    def sorted_by(self, *names, reverse=False):
+        # new snapshot sorted by given fields, (controller, trunk, index) by default
+        names = names or ("controller", "trunk", "index")
+        columns = [self.column(name) for name in names]
+
+        if len(columns) == 1:
+            column = columns[0]
+            rows = sorted(range(len(self)), key=column.__getitem__, reverse=reverse)
+        else:
+            keys = list(zip(*columns))
+            rows = sorted(range(len(self)), key=keys.__getitem__, reverse=reverse)
+
+        return self.take(rows)
+
+    def diff(self, previous, threshold=0.0):
+        # changes since previous snapshot, temperature changes not bigger than threshold are ignored
+        previous_rows = previous._rows_by_key()
+        current_rows = self._rows_by_key()
+
+        added = []
+        changed = []
+        deltas = array("f")
+
+        for key, row in current_rows.items():
+            previous_row = previous_rows.get(key)
+            if previous_row is None:
+                added.append(row)
+                continue
+
+            delta = self.temperatures[row] - previous.temperatures[previous_row]
+            if self.statuses[row] != previous.statuses[previous_row]:
+                changed.append(row)
+                deltas.append(delta)
+            elif (not math.isnan(delta)) and (abs(delta) > threshold):
+                changed.append(row)
+                deltas.append(delta)
+
+        vanished = [row for key, row in previous_rows.items() if key not in current_rows]
+
+        return SnapshotDiff(
+            added=self.take(added),
+            vanished=previous.take(vanished),
+            changed=self.take(changed),
+            deltas=deltas
+        )
+
+    def to_numpy(self):
+        # structured array with FLEET_SNAPSHOT_FIELDS
+        np = require_numpy()
+
+        res = np.empty(len(self), dtype=numpy_dtype(FLEET_SNAPSHOT_FIELDS))
+        for name, attribute, _ in COLUMNS:
+            res[name] = getattr(self, attribute)
+
+        return res
+
+    def to_dict(self):
+        # JSON-compatible dict, addresses as hex strings and NaN temperatures as None
+        return {
+            "timestamp": self.timestamp,
+            "port": self.port_name,
+            "readings": [
+                {
+                    "controller": item.controller,
+                    "trunk": item.trunk,
+                    "index": item.index,
+                    "address": format_rom_address(item.address) if item.address else None,
+                    "temperature": None if math.isnan(item.temperature) else item.temperature,
+                    "status": item.status,
+                }
+                for item in self
+            ]
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_csv(self, stream):
+        # one row per sensor with header, stream - text file object
+        writer = csv.writer(stream)
+        writer.writerow(("timestamp", ) + FIELD_NAMES)
+
+        for item in self:
+            writer.writerow(
+                (
+                    self.timestamp,
+                    item.controller,
+                    item.trunk,
+                    item.index,
+                    format_rom_address(item.address) if item.address else "",
+                    "" if math.isnan(item.temperature) else item.temperature,
+                    item.status
+                )
+            )
+
+    def _rows_by_key(self):
+        res = dict()
+        for row, address in enumerate(self.addresses):
+            key = address if address else (self.controllers[row], self.trunks[row], self.indexes[row])
+            res[key] = row
+
+        return res
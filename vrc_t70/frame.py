@@ -0,0 +1,81 @@
+import struct
+
+from .crc import crc8
+from .exceptions import BadCrc, WrongBytesCount
+
+
+# 1 byte - device address
+# 1 byte - id event
+# 2 bytes - sequence id
+# 1 byte - processing result
+# 1 byte - data length
+# N bytes - data,
+# 1 bytes - crc 8
+FRAME_HEADER = struct.Struct(">BBHBB")
+FRAME_HEADER_SIZE = FRAME_HEADER.size
+FRAME_CRC_SIZE = 1
+MIN_FRAME_SIZE = FRAME_HEADER_SIZE + FRAME_CRC_SIZE
+
+DATA_LENGTH_OFFSET = 5
+
+UINT8 = struct.Struct("<B")
+FLOAT = struct.Struct("<f")
+
+
+def frame_size(header):
+    # full frame size by first FRAME_HEADER_SIZE bytes of a frame
+    return FRAME_HEADER_SIZE + header[DATA_LENGTH_OFFSET] + FRAME_CRC_SIZE
+
+
+class VrcT70Frame(object):
+    # Response frame decoded once from a single buffer (bytes of one frame). Header fields are
+    # unpacked in place, typed fields of data segment are unpacked by offset without slicing.
+    __slots__ = ("buffer", "address", "id_event", "sequence_id", "processing_result", "data_length")
+
+    def __init__(self, buffer, validate_crc=True):
+        bytes_count = len(buffer)
+        if bytes_count < MIN_FRAME_SIZE:
+            raise WrongBytesCount(
+                "Can't decode frame. bytes_count = {} min_bytes_count = {}".format(bytes_count, MIN_FRAME_SIZE)
+            )
+
+        (
+            self.address,
+            self.id_event,
+            self.sequence_id,
+            self.processing_result,
+            self.data_length
+        ) = FRAME_HEADER.unpack_from(buffer)
+
+        expected_size = MIN_FRAME_SIZE + self.data_length
+        if bytes_count != expected_size:
+            raise WrongBytesCount(
+                "Can't decode frame. bytes_count = {} expected_bytes_count = {}".format(bytes_count, expected_size)
+            )
+
+        self.buffer = buffer
+
+        # CRC of whole frame including CRC byte is zero for valid frame
+        if validate_crc and crc8(buffer):
+            raise BadCrc()
+
+    @property
+    def data(self):
+        return self.buffer[FRAME_HEADER_SIZE: -FRAME_CRC_SIZE]
+
+    @property
+    def crc(self):
+        return self.buffer[-1]
+
+    def is_crc_valid(self):
+        return crc8(self.buffer) == 0
+
+    def unpack_from(self, field_struct, data_offset=0):
+        # unpacks typed field located at data_offset in data segment
+        return field_struct.unpack_from(self.buffer, FRAME_HEADER_SIZE + data_offset)
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def __bytes__(self):
+        return bytes(self.buffer)
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import threading
+
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "vrc_t70")
+
+# {absolute path: lock}, shared by all cache objects of the same file
+_path_locks = dict()
+_path_locks_lock = threading.Lock()
+
+
+def path_lock(path):
+    path = os.path.abspath(path)
+
+    with _path_locks_lock:
+        res = _path_locks.get(path)
+        if res is None:
+            res = threading.RLock()
+            _path_locks[path] = res
+
+    return res
+
+
+class JsonCacheFile(object):
+    # Dictionary stored in JSON file, broken or missing file is treated as empty cache.
+    # Changes (load, modify and save) must be made under lock, which is shared by all objects
+    # of the same file, so threads don't lose each other's entries.
+    def __init__(self, path):
+        self.path = path
+        self.lock = path_lock(path)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return dict()
+
+        return data if isinstance(data, dict) else dict()
+
+    def save(self, data):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # unique temporary file in the same directory, so replace is atomic and writers don't collide
+        with self.lock:
+            f = tempfile.NamedTemporaryFile(
+                "w",
+                dir=directory or os.curdir,
+                prefix=os.path.basename(self.path) + ".",
+                suffix=".tmp",
+                delete=False
+            )
+
+            try:
+                with f:
+                    json.dump(data, f, indent=4, sort_keys=True)
+
+                os.replace(f.name, self.path)
+            except BaseException:
+                if os.path.exists(f.name):
+                    os.remove(f.name)
+
+                raise
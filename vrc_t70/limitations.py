@@ -1,2 +1,20 @@
+from .commands import VrcT70Commands
+
 MAX_TRUNKS_COUNT = 7
 MAX_SENSORS_PER_TRUNK = 10
+
+MAX_DATA_LENGTH = 0xff
+
+# max length of data segment in response for each command
+MAX_RESPONSE_DATA_LENGTH = {
+    VrcT70Commands.PING: 0,
+    VrcT70Commands.GET_TEMPERATURE_OF_SENSOR_ON_TRUNK: 1 + 1 + 1 + 4,
+    VrcT70Commands.GET_TEMPERATURES_ON_TRUNK: 1 + MAX_SENSORS_PER_TRUNK * (1 + 4),
+    VrcT70Commands.GET_SENSOR_UNIQUE_ADDRESS_ON_TRUNK: 1 + 1 + 8,
+    VrcT70Commands.GET_SENSORS_UNIQUE_ADDRESSES_ON_TRUNK: 1 + MAX_SENSORS_PER_TRUNK * (8 + 1),
+    VrcT70Commands.SET_SESSION_ID: 4,
+    VrcT70Commands.GET_SESSION_ID: 4,
+    VrcT70Commands.SET_CONTROLLER_NEW_ADDRESS: 1,
+    VrcT70Commands.RESCAN_SENSORS_ON_TRUNK: 1 + 1,
+    VrcT70Commands.GET_SENSORS_COUNT_ON_TRUNK: 1 + 1,
+}
@@ -0,0 +1,317 @@
+import bisect
+import threading
+import weakref
+from collections import namedtuple
+
+from .commands import VrcT70Commands
+from .exceptions import (BadCrc, NoAnswerFromController, ProcessingError, SensorBusy, SensorError, WrongBytesCount,
+                         WrongControllerAddress, WrongEventId)
+
+DEFAULT_LATENCY_BUCKETS = (0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+
+COMMAND_NAMES = {
+    value: name.lower() for name, value in vars(VrcT70Commands).items() if name.isupper()
+}
+
+
+class ErrorKind(object):
+    # nothing received before timeout
+    TIMEOUT = "timeout"
+    # incomplete frame received
+    FRAMING = "framing"
+    CRC = "crc"
+    # valid frame, but not for this request
+    PROTOCOL = "protocol"
+    SENSOR_BUSY = "sensor_busy"
+    SENSOR_ERROR = "sensor_error"
+    # other non-zero processing results
+    PROCESSING = "processing"
+
+
+ERROR_KINDS = (
+    ErrorKind.TIMEOUT,
+    ErrorKind.FRAMING,
+    ErrorKind.CRC,
+    ErrorKind.PROTOCOL,
+    ErrorKind.SENSOR_BUSY,
+    ErrorKind.SENSOR_ERROR,
+    ErrorKind.PROCESSING,
+)
+
+CommandStats = namedtuple(
+    typename="CommandStats",
+    field_names=[
+        "calls_count",
+        "failed_calls_count",
+        "timeouts_count",
+        "attempts_count",
+        "retries_count",
+        "errors",
+        "bytes_sent",
+        "bytes_received",
+        "latency_buckets",
+        "latency_counts",
+        "latency_sum",
+        "latency_count",
+    ]
+)
+
+LineStats = namedtuple("LineStats", ["stale_frames_count", "discarded_bytes_count"])
+
+
+def error_kind(error, received_bytes_count=0, crc_errors_count=0):
+    # received_bytes_count and crc_errors_count - parser counters increments during failed attempt,
+    # parser drops frames with bad CRC and waits for next frame, so such attempts end with timeout
+    if isinstance(error, WrongBytesCount):
+        if crc_errors_count:
+            return ErrorKind.CRC
+
+        return ErrorKind.FRAMING if received_bytes_count else ErrorKind.TIMEOUT
+
+    if isinstance(error, BadCrc):
+        return ErrorKind.CRC
+
+    if isinstance(error, (WrongEventId, WrongControllerAddress)):
+        return ErrorKind.PROTOCOL
+
+    if isinstance(error, SensorBusy):
+        return ErrorKind.SENSOR_BUSY
+
+    if isinstance(error, SensorError):
+        return ErrorKind.SENSOR_ERROR
+
+    if isinstance(error, ProcessingError):
+        return ErrorKind.PROCESSING
+
+    if isinstance(error, NoAnswerFromController):
+        return ErrorKind.TIMEOUT
+
+    return None
+
+
+class Histogram(object):
+    # cumulative buckets are calculated only on export, observation costs one bisect
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # last item counts values above the biggest bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class CommandMetrics(object):
+    # Counters for one (port, controller, command). Updated only by thread which owns the bus,
+    # so no locking on hot path.
+    __slots__ = (
+        "calls_count",
+        "failed_calls_count",
+        "timeouts_count",
+        "attempts_count",
+        "errors",
+        "bytes_sent",
+        "bytes_received",
+        "latency",
+    )
+
+    def __init__(self, latency_buckets=DEFAULT_LATENCY_BUCKETS):
+        self.calls_count = 0
+        self.failed_calls_count = 0
+        self.timeouts_count = 0
+        self.attempts_count = 0
+        self.errors = dict.fromkeys(ERROR_KINDS, 0)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = Histogram(latency_buckets)
+
+    def record_call(self):
+        self.calls_count += 1
+
+    def record_attempt(self, request_size):
+        self.attempts_count += 1
+        self.bytes_sent += request_size
+
+    def record_error(self, kind):
+        if kind is not None:
+            self.errors[kind] += 1
+
+    def record_success(self, latency, response_size):
+        self.bytes_received += response_size
+        self.latency.observe(latency)
+
+    def record_failure(self, is_timeout):
+        self.failed_calls_count += 1
+        if is_timeout:
+            self.timeouts_count += 1
+
+    def stats(self):
+        return CommandStats(
+            calls_count=self.calls_count,
+            failed_calls_count=self.failed_calls_count,
+            timeouts_count=self.timeouts_count,
+            attempts_count=self.attempts_count,
+            retries_count=self.attempts_count - self.calls_count,
+            errors=dict(self.errors),
+            bytes_sent=self.bytes_sent,
+            bytes_received=self.bytes_received,
+            latency_buckets=self.latency.buckets,
+            latency_counts=tuple(self.latency.counts),
+            latency_sum=self.latency.sum,
+            latency_count=self.latency.count
+        )
+
+
+class MetricsRegistry(object):
+    # In-process registry of communication metrics for all controllers and commands.
+    # Buses register themselves, so line-level counters (stale frames, discarded garbage bytes)
+    # are read from buses only when snapshot or text dump is requested.
+    def __init__(self, latency_buckets=DEFAULT_LATENCY_BUCKETS):
+        self.latency_buckets = tuple(latency_buckets)
+
+        self._commands = dict()
+        self._lines = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def command(self, port_name, controller_address, command):
+        key = (port_name, controller_address, command)
+
+        res = self._commands.get(key)
+        if res is not None:
+            return res
+
+        with self._lock:
+            return self._commands.setdefault(key, CommandMetrics(self.latency_buckets))
+
+    def register_line(self, port_name, bus):
+        with self._lock:
+            self._lines[port_name] = bus
+
+    def reset(self):
+        with self._lock:
+            self._commands.clear()
+
+    def snapshot(self):
+        # {(port_name, controller_address, command): CommandStats}
+        with self._lock:
+            items = list(self._commands.items())
+
+        return {key: value.stats() for key, value in items}
+
+    def lines_snapshot(self):
+        # {port_name: LineStats}
+        with self._lock:
+            items = list(self._lines.items())
+
+        return {
+            port_name: LineStats(
+                stale_frames_count=bus.stale_frames_count,
+                discarded_bytes_count=bus.parser.discarded_bytes_count
+            )
+            for port_name, bus in items
+        }
+
+    def to_prometheus(self, prefix="vrc_t70"):
+        # text exposition format
+        writer = _PrometheusWriter(prefix)
+        snapshot = sorted(self.snapshot().items())
+
+        counters = (
+            ("calls_total", "Commands calls", "calls_count"),
+            ("failed_calls_total", "Commands calls failed after all retries", "failed_calls_count"),
+            ("timeouts_total", "Commands calls failed without valid answer from controller", "timeouts_count"),
+            ("attempts_total", "Requests sent, including retries", "attempts_count"),
+            ("retries_total", "Repeated requests", "retries_count"),
+            ("bytes_sent_total", "Requests bytes sent", "bytes_sent"),
+            ("bytes_received_total", "Valid responses bytes received", "bytes_received"),
+        )
+
+        for name, description, field in counters:
+            writer.header(name, description, "counter")
+            for key, stats in snapshot:
+                writer.sample(name, _command_labels(key), getattr(stats, field))
+
+        writer.header("errors_total", "Failed attempts by error kind", "counter")
+        for key, stats in snapshot:
+            for kind in ERROR_KINDS:
+                writer.sample("errors_total", _command_labels(key) + (("kind", kind),), stats.errors[kind])
+
+        writer.header("call_latency_seconds", "Successful commands calls latency, including retries", "histogram")
+        for key, stats in snapshot:
+            labels = _command_labels(key)
+
+            total = 0
+            for bucket, count in zip(stats.latency_buckets, stats.latency_counts):
+                total += count
+                writer.sample("call_latency_seconds_bucket", labels + (("le", _format_value(bucket)),), total)
+
+            writer.sample("call_latency_seconds_bucket", labels + (("le", "+Inf"),), stats.latency_count)
+            writer.sample("call_latency_seconds_sum", labels, stats.latency_sum)
+            writer.sample("call_latency_seconds_count", labels, stats.latency_count)
+
+        lines = sorted(self.lines_snapshot().items())
+
+        writer.header("stale_frames_total", "Late responses for previous requests", "counter")
+        for port_name, stats in lines:
+            writer.sample("stale_frames_total", (("port", port_name),), stats.stale_frames_count)
+
+        writer.header("discarded_bytes_total", "Bytes skipped by parser while looking for valid frame", "counter")
+        for port_name, stats in lines:
+            writer.sample("discarded_bytes_total", (("port", port_name),), stats.discarded_bytes_count)
+
+        return writer.text()
+
+
+class _PrometheusWriter(object):
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._lines = []
+
+    def header(self, name, description, metric_type):
+        self._lines.append("# HELP {}_{} {}".format(self.prefix, name, description))
+        self._lines.append("# TYPE {}_{} {}".format(self.prefix, name, metric_type))
+
+    def sample(self, name, labels, value):
+        labels = ",".join('{}="{}"'.format(label, _escape(value)) for label, value in labels)
+        self._lines.append("{}_{}{{{}}} {}".format(self.prefix, name, labels, _format_value(value)))
+
+    def text(self):
+        return "\n".join(self._lines) + "\n"
+
+
+def parser_counters(parser):
+    return parser.received_bytes_count, parser.crc_errors_count
+
+
+def attempt_error_kind(error, parser, counters_before_attempt):
+    received_bytes_count, crc_errors_count = counters_before_attempt
+    return error_kind(
+        error,
+        parser.received_bytes_count - received_bytes_count,
+        parser.crc_errors_count - crc_errors_count
+    )
+
+
+def _command_labels(key):
+    port_name, controller_address, command = key
+    return (
+        ("port", port_name),
+        ("controller", "0x{:02x}".format(controller_address)),
+        ("command", COMMAND_NAMES.get(command, "0x{:02x}".format(command))),
+    )
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+
+    return str(value)
@@ -0,0 +1,172 @@
+import time
+from collections import namedtuple
+
+from .bus import VrcT70Bus
+from .bus_owner import VrcT70BusOwner
+from .commands import VrcT70Commands
+from .communicator import VrcT70Communicator
+from .defaults import MIN_DELAY_BETWEEN_REQUESTS, SENSORS_REFRESH_PERIOD
+from .exceptions import NoAnswerFromController, ProcessingError
+from .frame import MIN_FRAME_SIZE
+from .limitations import MAX_TRUNKS_COUNT
+from .scheduler import TrafficClass
+from .timing import wire_time
+
+
+PollSnapshot = namedtuple(
+    typename="PollSnapshot",
+    field_names=[
+        "timestamp",
+        "cycle_number",
+        "trunks",
+        "errors",
+        "cycle_duration",
+        "cycle_period",
+        "bus_utilization",
+        "wire_utilization"
+    ]
+)
+
+# smoothing factor for round trip time moving average
+RTT_SMOOTHING = 0.125
+
+
+class VrcT70Poller(object):
+    # Round-robin poller of GET_TEMPERATURES_ON_TRUNK for all non-empty trunks of many controllers
+    # on one bus. Controller refreshes sensors data every SENSORS_REFRESH_PERIOD, so polling faster
+    # has no sense; when bus can't fit all requests into this period, cycle period is stretched
+    # to requests count * (MIN_DELAY_BETWEEN_REQUESTS + measured round trip time).
+    # With VrcT70BusOwner instead of bus requests are sent through owner, so the same port
+    # can be used by other threads between poller requests.
+    def __init__(self, bus, controller_addresses, refresh_period=SENSORS_REFRESH_PERIOD):
+        owner = bus if isinstance(bus, VrcT70BusOwner) else None
+        if owner is not None:
+            bus = owner.bus
+        elif not isinstance(bus, VrcT70Bus):
+            bus = VrcT70Bus(bus)
+
+        self._bus = bus
+        self.refresh_period = refresh_period
+
+        self._communicators = dict()
+        for address in sorted(set(controller_addresses)):
+            if owner is not None:
+                self._communicators[address] = owner.communicator(address, TrafficClass.POLL, blocking=True)
+            else:
+                self._communicators[address] = VrcT70Communicator(bus, address)
+
+        self.trunks = None
+        self.round_trip_time = None
+        self.cycle_number = 0
+
+    def discover_trunks(self):
+        trunks = []
+
+        for address, communicator in self._communicators.items():
+            for trunk_number in range(1, MAX_TRUNKS_COUNT + 1):
+                try:
+                    r = communicator.get_sensors_count_on_trunk(trunk_number)
+                except NoAnswerFromController:
+                    break
+                except ProcessingError:
+                    # controller can't report this trunk, other trunks are still checked
+                    continue
+
+                if r.sensors_count():
+                    trunks.append((address, trunk_number))
+
+        self.trunks = trunks
+        return trunks
+
+    def cycle_period(self):
+        if not self.trunks:
+            return self.refresh_period
+
+        round_trip_time = self.round_trip_time or 0.0
+        bus_period = len(self.trunks) * (MIN_DELAY_BETWEEN_REQUESTS + round_trip_time)
+
+        return max(self.refresh_period, bus_period)
+
+    def poll_once(self):
+        if self.trunks is None:
+            self.discover_trunks()
+
+        timestamp = time.time()
+        cycle_begin = time.monotonic()
+
+        trunks = dict()
+        errors = dict()
+        busy_time = 0.0
+        wire_bytes_count = 0
+
+        for address, trunk_number in self.trunks:
+            # delay between requests is made by communicator, it is excluded from round trip time
+            delay = self._bus.delay_before_request()
+
+            request_begin = time.monotonic()
+            try:
+                r = self._communicators[address].get_temperature_on_trunk(trunk_number)
+            except (NoAnswerFromController, ProcessingError) as e:
+                errors[(address, trunk_number)] = e
+                continue
+            finally:
+                request_time = max(time.monotonic() - request_begin - delay, 0.0)
+                busy_time += MIN_DELAY_BETWEEN_REQUESTS + request_time
+
+            trunks[(address, trunk_number)] = r
+            wire_bytes_count += self._request_size(address, trunk_number) + MIN_FRAME_SIZE + len(r.data or b"")
+            self._update_round_trip_time(request_time)
+
+        self.cycle_number += 1
+        cycle_period = self.cycle_period()
+
+        return PollSnapshot(
+            timestamp=timestamp,
+            cycle_number=self.cycle_number,
+            trunks=trunks,
+            errors=errors,
+            cycle_duration=time.monotonic() - cycle_begin,
+            cycle_period=cycle_period,
+            bus_utilization=busy_time / cycle_period,
+            wire_utilization=self._wire_utilization(wire_bytes_count, cycle_period)
+        )
+
+    def snapshots(self, cycles_count=None):
+        next_cycle_time = time.monotonic()
+        polled_cycles_count = 0
+
+        while (cycles_count is None) or (polled_cycles_count < cycles_count):
+            snapshot = self.poll_once()
+            polled_cycles_count += 1
+            yield snapshot
+
+            next_cycle_time += snapshot.cycle_period
+            delay = next_cycle_time - time.monotonic()
+
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # can't keep cadence, starting next cycle immediately
+                next_cycle_time = time.monotonic()
+
+    def run(self, callback, cycles_count=None):
+        for snapshot in self.snapshots(cycles_count):
+            callback(snapshot)
+
+    def _request_size(self, address, trunk_number):
+        # size of request frame sent by bus
+        return len(self._bus.encoder.frame(address, VrcT70Commands.GET_TEMPERATURES_ON_TRUNK, bytes([trunk_number])))
+
+    def _update_round_trip_time(self, request_time):
+        if self.round_trip_time is None:
+            self.round_trip_time = request_time
+            return
+
+        self.round_trip_time += RTT_SMOOTHING * (request_time - self.round_trip_time)
+
+    def _wire_utilization(self, wire_bytes_count, cycle_period):
+        baudrate = getattr(self._bus.serial, "baudrate", None)
+        if not baudrate:
+            return None
+
+        return wire_time(wire_bytes_count, baudrate) / cycle_period
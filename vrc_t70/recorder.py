@@ -0,0 +1,398 @@
+import math
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+from .bulk import numpy_dtype, require_numpy
+
+# Segment file: 16 bytes header followed by fixed width records
+# 8 bytes - magic
+# 2 bytes - format version
+# 2 bytes - record size
+# 4 bytes - reserved
+SEGMENT_MAGIC = b"VRCT70TS"
+SEGMENT_VERSION = 1
+SEGMENT_HEADER = struct.Struct("<8sHH4x")
+SEGMENT_HEADER_SIZE = SEGMENT_HEADER.size
+SEGMENT_FILE_EXTENSION = ".vrcts"
+
+# Record:
+# 8 bytes - timestamp (seconds since epoch, float64)
+# 1 byte - controller address
+# 1 byte - trunk number
+# 1 byte - sensor index
+# 4 bytes - temperature (float32, NaN when sensor is not connected)
+# 1 byte - status
+RECORD = struct.Struct("<dBBBfB")
+RECORD_SIZE = RECORD.size
+TIMESTAMP = struct.Struct("<d")
+
+STATUS_OK = 0x00
+STATUS_DISCONNECTED = 0x01
+STATUS_ERROR = 0x02
+
+DEFAULT_SEGMENT_DURATION = 24 * 60 * 60
+DEFAULT_MAX_SEGMENT_SIZE = 64 * 1024 * 1024
+
+RECORD_FIELDS = (
+    ("timestamp", "<f8"),
+    ("controller", "u1"),
+    ("trunk", "u1"),
+    ("index", "u1"),
+    ("temperature", "<f4"),
+    ("status", "u1"),
+)
+
+Reading = namedtuple("Reading", ["timestamp", "controller", "trunk", "index", "temperature", "status"])
+SegmentInfo = namedtuple("SegmentInfo", ["path", "records_count", "first_timestamp", "last_timestamp"])
+
+
+class TimeSeriesRecorder(object):
+    # Append-only recorder of sensors readings. Records are appended to segment files in
+    # directory, new segment is started when current one becomes older than segment_duration,
+    # bigger than max_segment_size or when timestamp goes back (so every segment is sorted by time).
+    # Closed segments are removed when they are older than retention seconds or when total
+    # size of segments exceeds max_total_size.
+    def __init__(
+            self,
+            directory,
+            segment_duration=DEFAULT_SEGMENT_DURATION,
+            max_segment_size=DEFAULT_MAX_SEGMENT_SIZE,
+            retention=None,
+            max_total_size=None
+    ):
+        self.directory = directory
+        self.segment_duration = segment_duration
+        self.max_segment_size = max_segment_size
+        self.retention = retention
+        self.max_total_size = max_total_size
+
+        self.segment_path = None
+        self.records_count = 0
+
+        self._file = None
+        self._segment_start = None
+        self._segment_size = 0
+        self._last_timestamp = None
+
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def append(self, timestamp, controller, trunk, index, temperature, status=STATUS_OK):
+        self._write(timestamp, RECORD.pack(timestamp, controller, trunk, index, temperature, status))
+
+    def append_many(self, readings):
+        # readings - iterable with (timestamp, controller, trunk, index, temperature, status) items,
+        # items sharing the same timestamp are written with one call
+        batch = bytearray()
+        batch_timestamp = None
+
+        for item in readings:
+            if (batch_timestamp is not None) and (item[0] != batch_timestamp):
+                self._write(batch_timestamp, batch)
+                batch = bytearray()
+
+            batch_timestamp = item[0]
+            batch.extend(RECORD.pack(*item))
+
+        if batch:
+            self._write(batch_timestamp, batch)
+
+    def record_trunk(self, timestamp, response):
+        # stores all temperatures from TemperatureOnTrunkResponse
+        trunk_number = response.trunk_number()
+        temperatures = response.temperatures()
+        connected = response.connected_mask()
+
+        batch = bytearray()
+        for index in range(len(temperatures)):
+            if connected[index]:
+                batch.extend(
+                    RECORD.pack(timestamp, response.address, trunk_number, index, temperatures[index], STATUS_OK)
+                )
+            else:
+                batch.extend(
+                    RECORD.pack(timestamp, response.address, trunk_number, index, math.nan, STATUS_DISCONNECTED)
+                )
+
+        if batch:
+            self._write(timestamp, batch)
+
+    def record_snapshot(self, snapshot):
+        # stores all trunks from PollSnapshot, failed trunks are skipped
+        for key in sorted(snapshot.trunks):
+            self.record_trunk(snapshot.timestamp, snapshot.trunks[key])
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is None:
+            return
+
+        self._file.close()
+        self._file = None
+        self.segment_path = None
+
+    def rotate(self):
+        # next record will be written to new segment
+        self.close()
+
+    def apply_retention(self, now=None):
+        segments = list_segments(self.directory)
+        if self.segment_path is not None:
+            segments = [item for item in segments if item != self.segment_path]
+
+        removed = []
+
+        if self.retention is not None:
+            now = time.time() if now is None else now
+            for path in list(segments):
+                info = segment_info(path)
+                if (info.last_timestamp is None) or (info.last_timestamp < now - self.retention):
+                    os.remove(path)
+                    segments.remove(path)
+                    removed.append(path)
+
+        if self.max_total_size is not None:
+            total_size = sum(os.path.getsize(path) for path in segments)
+            if self.segment_path is not None:
+                total_size += self._segment_size
+
+            while segments and (total_size > self.max_total_size):
+                path = segments.pop(0)
+                total_size -= os.path.getsize(path)
+                os.remove(path)
+                removed.append(path)
+
+        return removed
+
+    def _write(self, timestamp, data):
+        if self._need_rotation(timestamp, len(data)):
+            self.rotate()
+
+        if self._file is None:
+            self._open_segment(timestamp)
+
+        self._file.write(data)
+
+        self._segment_size += len(data)
+        self.records_count += len(data) // RECORD_SIZE
+        self._last_timestamp = timestamp
+
+    def _need_rotation(self, timestamp, size):
+        if self._file is None:
+            return False
+
+        if timestamp < self._last_timestamp:
+            return True
+
+        if timestamp - self._segment_start >= self.segment_duration:
+            return True
+
+        return self._segment_size + size > self.max_segment_size
+
+    def _open_segment(self, timestamp):
+        # segment name is start time in microseconds, so names are sorted same way as segments
+        name_timestamp = int(timestamp * 1000000)
+        while True:
+            path = os.path.join(self.directory, "{:016d}{}".format(name_timestamp, SEGMENT_FILE_EXTENSION))
+            if not os.path.exists(path):
+                break
+
+            name_timestamp += 1
+
+        self._file = open(path, "wb")
+        self._file.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, RECORD_SIZE))
+
+        self.segment_path = path
+        self._segment_start = timestamp
+        self._segment_size = SEGMENT_HEADER_SIZE
+        self._last_timestamp = timestamp
+
+        self.apply_retention()
+
+
+class TimeSeriesReader(object):
+    # Reader for segments written by TimeSeriesRecorder. Segments are memory-mapped, records for
+    # time range are found with binary search, so only requested part of segment is touched.
+    # Incomplete record at the end of segment (recorder was killed during write) is ignored.
+    def __init__(self, directory):
+        self.directory = directory
+
+    def segments(self):
+        return [segment_info(path) for path in list_segments(self.directory)]
+
+    def read(self, begin=None, end=None, controller=None, trunk=None, index=None):
+        # yields Reading items with begin <= timestamp < end
+        for path in self._segments_in_range(begin, end):
+            with _MappedSegment(path) as segment:
+                first, last = segment.find_range(begin, end)
+
+                for record_index in range(first, last):
+                    item = segment.record(record_index)
+
+                    if (controller is not None) and (item[1] != controller):
+                        continue
+
+                    if (trunk is not None) and (item[2] != trunk):
+                        continue
+
+                    if (index is not None) and (item[3] != index):
+                        continue
+
+                    yield Reading._make(item)
+
+    def read_numpy(self, begin=None, end=None, controller=None, trunk=None, index=None):
+        # same as read(), but returns numpy structured array with RECORD_FIELDS dtype
+        np = require_numpy()
+        record_dtype = numpy_dtype(RECORD_FIELDS)
+
+        chunks = []
+        for path in self._segments_in_range(begin, end):
+            with _MappedSegment(path) as segment:
+                first, last = segment.find_range(begin, end)
+                if first == last:
+                    continue
+
+                records = np.frombuffer(
+                    segment.mapping,
+                    dtype=record_dtype,
+                    count=last - first,
+                    offset=SEGMENT_HEADER_SIZE + first * RECORD_SIZE
+                )
+
+                mask = np.ones(len(records), dtype=bool)
+                if controller is not None:
+                    mask &= records["controller"] == controller
+
+                if trunk is not None:
+                    mask &= records["trunk"] == trunk
+
+                if index is not None:
+                    mask &= records["index"] == index
+
+                # copying, so mapping can be closed
+                chunks.append(records[mask].copy())
+                del records
+
+        if not chunks:
+            return np.empty(0, dtype=record_dtype)
+
+        return np.concatenate(chunks)
+
+    def _segments_in_range(self, begin, end):
+        for info in self.segments():
+            if not info.records_count:
+                continue
+
+            if (begin is not None) and (info.last_timestamp < begin):
+                continue
+
+            if (end is not None) and (info.first_timestamp >= end):
+                continue
+
+            yield info.path
+
+
+class _MappedSegment(object):
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            self.records_count = _records_count(size)
+            self.mapping = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        except BaseException:
+            self._file.close()
+            raise
+
+        if self.mapping is not None:
+            _check_header(self.mapping, path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.mapping is not None:
+            self.mapping.close()
+
+        self._file.close()
+
+    def timestamp(self, record_index):
+        return TIMESTAMP.unpack_from(self.mapping, SEGMENT_HEADER_SIZE + record_index * RECORD_SIZE)[0]
+
+    def find_range(self, begin, end):
+        first = 0 if begin is None else self._lower_bound(begin)
+        last = self.records_count if end is None else self._lower_bound(end)
+
+        return first, max(first, last)
+
+    def record(self, record_index):
+        return RECORD.unpack_from(self.mapping, SEGMENT_HEADER_SIZE + record_index * RECORD_SIZE)
+
+    def _lower_bound(self, timestamp):
+        low = 0
+        high = self.records_count
+
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamp(middle) < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+
+def __getattr__(name):
+    # RECORD_DTYPE is created on first access, so importing recorder doesn't import numpy
+    if name == "RECORD_DTYPE":
+        return numpy_dtype(RECORD_FIELDS)
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def list_segments(directory):
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+
+    return [os.path.join(directory, name) for name in sorted(names) if name.endswith(SEGMENT_FILE_EXTENSION)]
+
+
+def segment_info(path):
+    with _MappedSegment(path) as segment:
+        if not segment.records_count:
+            return SegmentInfo(path=path, records_count=0, first_timestamp=None, last_timestamp=None)
+
+        return SegmentInfo(
+            path=path,
+            records_count=segment.records_count,
+            first_timestamp=segment.timestamp(0),
+            last_timestamp=segment.timestamp(segment.records_count - 1)
+        )
+
+
+def _records_count(file_size):
+    if file_size < SEGMENT_HEADER_SIZE:
+        return 0
+
+    return (file_size - SEGMENT_HEADER_SIZE) // RECORD_SIZE
+
+
+def _check_header(mapping, path):
+    if len(mapping) < SEGMENT_HEADER_SIZE:
+        return
+
+    magic, version, record_size = SEGMENT_HEADER.unpack_from(mapping)
+    if (magic != SEGMENT_MAGIC) or (version != SEGMENT_VERSION) or (record_size != RECORD_SIZE):
+        raise ValueError("'{}' is not a supported readings segment".format(path))
@@ -1,4 +1,4 @@
-import crcmod
+from .crc import crc8
 
 
 class VrcT70Request(object):
@@ -8,8 +8,6 @@ class VrcT70Request(object):
         self.sequence_id = sequence_id
         self.data = data
 
-        self._crc_func = None
-
     def to_bytearray(self):
         data_length = len(self.data) if self.data else 0
 
@@ -26,11 +24,7 @@ class VrcT70Request(object):
         if self.data:
             res.extend(self.data)
 
-        if self._crc_func is None:
-            self._crc_func = crcmod.mkCrcFun(poly=0x1D5, initCrc=0, rev=False, xorOut=0)
-
-        crc = self._crc_func(res)
-        res.append(crc & 0xff)
+        res.append(crc8(res))
 
         return res
 
@@ -1,12 +1,23 @@
-import struct
+from array import array
 
-import crcmod
+from .bulk import (TRUNK_ADDRESS_RECORD_SIZE, TRUNK_TEMPERATURE_RECORD_SIZE, address_records_to_numpy,
+                   temperature_records_to_numpy, unpack_addresses, unpack_flags, unpack_temperatures)
+from .commands import VrcT70Commands
+from .crc import crc8
+from .frame import FLOAT
+
+RESPONSE_FIELDS = ("address", "id_event", "sequence_id", "processing_result", "data", "crc")
 
 
 class VrcT70Response(object):
+    # Responses are slotted and typed responses add no state, so typed view of a response
+    # shares its fields and data segment (bytes) without copying.
+    __slots__ = RESPONSE_FIELDS + ("_typed", )
+
     def __init__(self, other=None):
+        self._typed = None
 
-        if other:
+        if other is not None:
             self._assign_from_other(other)
             return
 
@@ -17,41 +28,71 @@ class VrcT70Response(object):
         self.data = None
         self.crc = None
 
-        self._crc_func = None
+    @classmethod
+    def from_frame(cls, frame):
+        # response takes fields of already validated frame, data segment is sliced once as bytes.
+        # Called on VrcT70Response class, response type is chosen by id_event
+        if cls is VrcT70Response:
+            cls = response_type_for_event(frame.id_event)
 
-    def is_crc_valid(self):
-        if self._crc_func is None:
-            self._crc_func = crcmod.mkCrcFun(poly=0x1D5, initCrc=0, rev=False, xorOut=0)
+        res = cls()
+
+        res.address = frame.address
+        res.id_event = frame.id_event
+        res.sequence_id = frame.sequence_id
+        res.processing_result = frame.processing_result
+        res.data = frame.data if frame.data_length else None
+        res.crc = frame.crc
+
+        return res
 
+    @property
+    def typed(self):
+        # typed view for id_event, created on first access
+        response_type = response_type_for_event(self.id_event)
+        if isinstance(self, response_type):
+            return self
+
+        if self._typed is None:
+            self._typed = response_type(self)
+
+        return self._typed
+
+    def is_crc_valid(self):
         data_length = len(self.data) if self.data else 0
 
-        data = bytearray([
-            self.address & 0xff,
-            self.id_event & 0xff,
-            (self.sequence_id & 0xff00) >> 8,
-            self.sequence_id & 0xff,
-            self.processing_result & 0xff,
-            data_length & 0xff
-        ]
+        crc = crc8(
+            (
+                self.address & 0xff,
+                self.id_event & 0xff,
+                (self.sequence_id & 0xff00) >> 8,
+                self.sequence_id & 0xff,
+                self.processing_result & 0xff,
+                data_length & 0xff
+            )
         )
 
         if self.data:
-            data.extend(self.data)
+            crc = crc8(self.data, crc)
 
-        data.append(self.crc)
+        return crc == self.crc
 
-        return self._crc_func(data) == 0x00
+    def __repr__(self):
+        return "{}(address=0x{:02x}, id_event=0x{:02x}, sequence_id=0x{:04x}, processing_result=0x{:02x})".format(
+            type(self).__name__,
+            self.address or 0,
+            self.id_event or 0,
+            self.sequence_id or 0,
+            self.processing_result or 0
+        )
 
     def _assign_from_other(self, other):
-        d = other.__dict__
-
-        for k, v in d.items():
-            setattr(self, k, v)
+        for name in RESPONSE_FIELDS:
+            setattr(self, name, getattr(other, name))
 
 
 class TrunkSensortsCountResponse(VrcT70Response):
-    def __init__(self, data):
-        super().__init__(data)
+    __slots__ = ()
 
     def trunk_number(self):
         return self.data[0]
@@ -61,8 +102,7 @@ class TrunkSensortsCountResponse(VrcT70Response):
 
 
 class TemperatureOnSensorResponse(VrcT70Response):
-    def __init__(self, data):
-        super().__init__(data)
+    __slots__ = ()
 
     def trunk_number(self):
         return self.data[0]
@@ -74,13 +114,12 @@ class TemperatureOnSensorResponse(VrcT70Response):
         return self.data[2] == 1
 
     def temperature(self):
-        res, = struct.unpack("<f", self.data[3:])
+        res, = FLOAT.unpack_from(self.data, 3)
         return res
 
 
 class SensorUniqueIdResponse(VrcT70Response):
-    def __init__(self, data):
-        super().__init__(data)
+    __slots__ = ()
 
     def trunk_number(self):
         return self.data[0]
@@ -93,33 +132,41 @@ class SensorUniqueIdResponse(VrcT70Response):
 
 
 class TemperatureOnTrunkResponse(VrcT70Response):
-    def __init__(self, data):
-        super().__init__(data)
+    __slots__ = ()
 
     def trunk_number(self):
         return self.data[0]
 
     def temperatures_count(self):
-        return (len(self.data) - 1) // 5
+        return (len(self.data) - 1) // TRUNK_TEMPERATURE_RECORD_SIZE
 
     def is_connected(self, sensor_index):
         return self.data[1 + sensor_index * (1 + 4)] == 1
 
     def temperature(self, sensor_index):
         offset = 1 + sensor_index * (1 + 4) + 1
-        res, = struct.unpack("<f", self.data[offset: offset + 4])
+        res, = FLOAT.unpack_from(self.data, offset)
         return res
 
+    def temperatures(self):
+        return array("f", unpack_temperatures(self.data, self.temperatures_count()))
+
+    def connected_mask(self):
+        return array("B", unpack_flags(self.data, 1, TRUNK_TEMPERATURE_RECORD_SIZE, self.temperatures_count()))
+
+    def to_numpy(self):
+        # structured array with "connected" and "temperature" fields, shares memory with response data
+        return temperature_records_to_numpy(self.data, self.temperatures_count())
+
 
 class SensorUniqueAddressOnTrunkResponse(VrcT70Response):
-    def __init__(self, data):
-        super().__init__(data)
+    __slots__ = ()
 
     def trunk_number(self):
         return self.data[0]
 
     def sensors_count(self):
-        return (len(self.data) - 1) // 9
+        return (len(self.data) - 1) // TRUNK_ADDRESS_RECORD_SIZE
 
     def is_error_detected(self, sensor_index):
         offset = 1 + sensor_index * (8 + 1) + 8
@@ -129,18 +176,44 @@ class SensorUniqueAddressOnTrunkResponse(VrcT70Response):
         offset = 1 + sensor_index * (8 + 1)
         return self.data[offset: offset + 8]
 
+    def unique_addresses(self):
+        # all ROM addresses as 64-bit integers (first byte of address is most significant)
+        return array("Q", unpack_addresses(self.data, self.sensors_count()))
+
+    def errors_mask(self):
+        return array("B", unpack_flags(self.data, 1 + 8, TRUNK_ADDRESS_RECORD_SIZE, self.sensors_count()))
+
+    def to_numpy(self):
+        # structured array with "address" (big-endian uint64) and "error" fields
+        return address_records_to_numpy(self.data, self.sensors_count())
+
 
 class SessionIdResponse(VrcT70Response):
-    def __init__(self, data):
-        super().__init__(data)
+    __slots__ = ()
 
     def session_id(self):
         return self.data
 
 
 class ControllerNewAddressResponse(VrcT70Response):
-    def __init__(self, data):
-        super().__init__(data)
+    __slots__ = ()
 
     def new_address(self):
         return self.data[0]
+
+
+RESPONSE_TYPES = {
+    VrcT70Commands.GET_TEMPERATURE_OF_SENSOR_ON_TRUNK: TemperatureOnSensorResponse,
+    VrcT70Commands.GET_TEMPERATURES_ON_TRUNK: TemperatureOnTrunkResponse,
+    VrcT70Commands.GET_SENSOR_UNIQUE_ADDRESS_ON_TRUNK: SensorUniqueIdResponse,
+    VrcT70Commands.GET_SENSORS_UNIQUE_ADDRESSES_ON_TRUNK: SensorUniqueAddressOnTrunkResponse,
+    VrcT70Commands.SET_SESSION_ID: SessionIdResponse,
+    VrcT70Commands.GET_SESSION_ID: SessionIdResponse,
+    VrcT70Commands.SET_CONTROLLER_NEW_ADDRESS: ControllerNewAddressResponse,
+    VrcT70Commands.RESCAN_SENSORS_ON_TRUNK: TrunkSensortsCountResponse,
+    VrcT70Commands.GET_SENSORS_COUNT_ON_TRUNK: TrunkSensortsCountResponse,
+}
+
+
+def response_type_for_event(id_event):
+    return RESPONSE_TYPES.get(id_event, VrcT70Response)
@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from .bus_owner import VrcT70SharedCommunicator
+from .command_set import VrcT70CommandSet
+from .commands import VrcT70Commands
+
+# controller refreshes temperature of each sensor every 100ms
+DEFAULT_FRESHNESS_WINDOW = 0.1
+DEFAULT_MAX_CACHED_RESPONSES = 256
+
+CACHEABLE_COMMANDS = frozenset(
+    [
+        VrcT70Commands.GET_TEMPERATURE_OF_SENSOR_ON_TRUNK,
+        VrcT70Commands.GET_TEMPERATURES_ON_TRUNK,
+    ]
+)
+
+# commands after which cached temperatures of controller are not valid anymore
+INVALIDATING_COMMANDS = frozenset(
+    [
+        VrcT70Commands.RESCAN_SENSORS_ON_TRUNK,
+        VrcT70Commands.SET_CONTROLLER_NEW_ADDRESS,
+    ]
+)
+
+
+class VrcT70CachingCommunicator(VrcT70CommandSet):
+    # Commands set on top of another communicator which returns responses (VrcT70Communicator or
+    # blocking shared communicator of bus owner). Temperature responses younger than freshness
+    # window are served from cache, concurrent identical requests from many threads are sent once
+    # and all callers get the same response. Cached responses are shared, so callers must not
+    # modify them. Failed requests are not cached. Other commands are passed through, rescan and
+    # address change drop cached responses of controller.
+    # Communicator of bus owner serializes requests itself, requests to other communicators
+    # are sent one by one under lock, so frames of different threads don't interleave on the port.
+    def __init__(
+            self,
+            communicator,
+            freshness_window=DEFAULT_FRESHNESS_WINDOW,
+            max_cached_responses=DEFAULT_MAX_CACHED_RESPONSES,
+            clock=time.monotonic
+    ):
+        if isinstance(communicator, VrcT70SharedCommunicator) and (not communicator.blocking):
+            raise ValueError("shared communicator must be blocking")
+
+        self.communicator = communicator
+        self.freshness_window = freshness_window
+        self.max_cached_responses = max_cached_responses
+        self.clock = clock
+
+        self.hits_count = 0
+        self.misses_count = 0
+        self.coalesced_count = 0
+
+        # {(controller address, command, data): (response, receive time)}
+        self._responses = OrderedDict()
+        # {(controller address, command, data): Future} of requests on the line
+        self._in_flight = dict()
+        self._lock = threading.Lock()
+        self._send_lock = None if isinstance(communicator, VrcT70SharedCommunicator) else threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._responses)
+
+    @property
+    def controller_address(self):
+        return self.communicator.controller_address
+
+    @property
+    def bus(self):
+        return self.communicator.bus
+
+    def probe(self):
+        return self._send(self.communicator.probe)
+
+    def send_command(self, cmd, retries_count=None, timeout=None):
+        # never cached
+        return self._send(self.communicator.send_command, cmd, retries_count=retries_count, timeout=timeout)
+
+    def invalidate(self, controller_address=None):
+        # drops cached responses of controller or all cached responses
+        with self._lock:
+            if controller_address is None:
+                self._responses.clear()
+                return
+
+            for key in [key for key in self._responses if key[0] == controller_address]:
+                del self._responses[key]
+
+    def _execute(self, request, response_type=None):
+        if request.command not in CACHEABLE_COMMANDS:
+            res = self._send(self.communicator.execute, request, response_type)
+
+            if request.command in INVALIDATING_COMMANDS:
+                self.invalidate(request.controller_address)
+
+            return res
+
+        key = (request.controller_address, request.command, bytes(request.data) if request.data else None)
+
+        with self._lock:
+            res = self._fresh_response(key)
+            if res is not None:
+                self.hits_count += 1
+                return res
+
+            future = self._in_flight.get(key)
+            is_sender = future is None
+            if is_sender:
+                self.misses_count += 1
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced_count += 1
+
+        if is_sender:
+            return self._fetch(key, future, request, response_type)
+
+        return future.result()
+
+    def _fetch(self, key, future, request, response_type):
+        try:
+            res = self._send(self.communicator.execute, request, response_type)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            self._store(key, res)
+
+        future.set_result(res)
+        return res
+
+    def _send(self, func, *args, **kwargs):
+        if self._send_lock is None:
+            return func(*args, **kwargs)
+
+        with self._send_lock:
+            return func(*args, **kwargs)
+
+    def _fresh_response(self, key):
+        item = self._responses.get(key)
+        if item is None:
+            return None
+
+        res, received_at = item
+        if self.clock() - received_at > self.freshness_window:
+            del self._responses[key]
+            return None
+
+        self._responses.move_to_end(key)
+        return res
+
+    def _store(self, key, response):
+        self._responses[key] = (response, self.clock())
+        self._responses.move_to_end(key)
+
+        while len(self._responses) > self.max_cached_responses:
+            self._responses.popitem(last=False)
@@ -0,0 +1,147 @@
+import random
+import time
+
+from .defaults import MAX_RETRIES_FOR_REQUEST
+from .error_codes import VrcT70ErrorCodes
+from .exceptions import (BadCrc, ProcessingError, SensorBusy, SensorError, WrongBytesCount, WrongControllerAddress,
+                         WrongEventId)
+
+
+class FailureClass(object):
+    # damaged or missing response (CRC, length, timeout)
+    TRANSPORT = "transport"
+    # valid frame, but not for this request (wrong event id or controller address)
+    PROTOCOL = "protocol"
+    # controller reported that sensor is busy or can't be read
+    DEVICE = "device"
+
+
+FAILURE_CLASSES = (FailureClass.TRANSPORT, FailureClass.PROTOCOL, FailureClass.DEVICE)
+
+
+def classify_failure(error):
+    if isinstance(error, (WrongBytesCount, BadCrc)):
+        return FailureClass.TRANSPORT
+
+    if isinstance(error, (WrongEventId, WrongControllerAddress)):
+        return FailureClass.PROTOCOL
+
+    if isinstance(error, (SensorBusy, SensorError)):
+        return FailureClass.DEVICE
+
+    return None
+
+
+def check_processing_result(response):
+    processing_result = response.processing_result
+    if processing_result == VrcT70ErrorCodes.NO_ERROR:
+        return
+
+    message = "controller 0x{:02x} reported processing result 0x{:02x} for event 0x{:02x}".format(
+        response.address,
+        processing_result,
+        response.id_event
+    )
+
+    if processing_result == VrcT70ErrorCodes.DS18B20_BUSY:
+        raise SensorBusy(message, processing_result)
+
+    if processing_result == VrcT70ErrorCodes.DS18B20_ERROR:
+        raise SensorError(message, processing_result)
+
+    raise ProcessingError(message, processing_result)
+
+
+class RetryPolicy(object):
+    # Retry budget and backoff for each failure class plus optional deadline for whole call.
+    # Backoff for n-th retry of a class is base * multiplier ** (n - 1), limited by max_backoff
+    # and randomized by +/- jitter (fraction of delay).
+    def __init__(
+            self,
+            transport_retries=MAX_RETRIES_FOR_REQUEST - 1,
+            protocol_retries=MAX_RETRIES_FOR_REQUEST - 1,
+            device_retries=2,
+            transport_backoff=0.0,
+            protocol_backoff=0.0,
+            device_backoff=0.1,
+            multiplier=2.0,
+            max_backoff=1.0,
+            jitter=0.2,
+            deadline=None
+    ):
+        self.retries = {
+            FailureClass.TRANSPORT: transport_retries,
+            FailureClass.PROTOCOL: protocol_retries,
+            FailureClass.DEVICE: device_retries,
+        }
+
+        self.backoff = {
+            FailureClass.TRANSPORT: transport_backoff,
+            FailureClass.PROTOCOL: protocol_backoff,
+            FailureClass.DEVICE: device_backoff,
+        }
+
+        self.multiplier = multiplier
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.deadline = deadline
+
+    def start_call(self, max_attempts=None):
+        return RetryState(self, max_attempts)
+
+    def backoff_delay(self, failure_class, failures_count):
+        delay = self.backoff[failure_class] * (self.multiplier ** (failures_count - 1))
+        delay = min(delay, self.max_backoff)
+
+        if delay and self.jitter:
+            delay *= 1.0 + random.uniform(-self.jitter, self.jitter)
+
+        return delay
+
+
+class RetryState(object):
+    # retries accounting for a single call
+    def __init__(self, policy, max_attempts=None):
+        self.policy = policy
+        self.max_attempts = max_attempts
+
+        self.attempts_count = 0
+        self.failures = dict.fromkeys(FAILURE_CLASSES, 0)
+        self.last_error = None
+        self.last_failure_class = None
+
+        self._deadline = None if policy.deadline is None else time.monotonic() + policy.deadline
+
+    def begin_attempt(self):
+        self.attempts_count += 1
+
+    def remaining_time(self):
+        if self._deadline is None:
+            return None
+
+        return max(self._deadline - time.monotonic(), 0.0)
+
+    def next_delay(self, error):
+        # delay before next attempt or None when call must be failed
+        failure_class = classify_failure(error)
+
+        self.last_error = error
+        self.last_failure_class = failure_class
+
+        if failure_class is None:
+            return None
+
+        self.failures[failure_class] += 1
+        if self.failures[failure_class] > self.policy.retries[failure_class]:
+            return None
+
+        if (self.max_attempts is not None) and (self.attempts_count >= self.max_attempts):
+            return None
+
+        delay = self.policy.backoff_delay(failure_class, self.failures[failure_class])
+
+        remaining_time = self.remaining_time()
+        if (remaining_time is not None) and (delay >= remaining_time):
+            return None
+
+        return delay
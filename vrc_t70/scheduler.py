@@ -0,0 +1,306 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque, namedtuple
+
+# lower value is served first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+
+class TrafficClass(object):
+    # on-demand reads requested by operator
+    INTERACTIVE = "interactive"
+    # periodic temperatures polling
+    POLL = "poll"
+    # addresses reads, session id checks and other maintenance
+    BACKGROUND = "background"
+    # trunks rescans
+    RESCAN = "rescan"
+
+
+# in order of preference when classes are equal otherwise
+TRAFFIC_CLASSES = (
+    TrafficClass.INTERACTIVE,
+    TrafficClass.POLL,
+    TrafficClass.BACKGROUND,
+    TrafficClass.RESCAN,
+)
+
+# traffic classes as priorities for PriorityScheduler
+CLASS_PRIORITIES = {
+    TrafficClass.INTERACTIVE: PRIORITY_HIGH,
+    TrafficClass.POLL: PRIORITY_NORMAL,
+    TrafficClass.BACKGROUND: PRIORITY_NORMAL + 5,
+    TrafficClass.RESCAN: PRIORITY_LOW,
+}
+
+# share - part of bus time guaranteed to class when all classes have pending requests,
+# deadline - max time in seconds from submission to start of request, requests which are still
+# queued after deadline are expired without sending (None - no deadline)
+ClassPolicy = namedtuple("ClassPolicy", ["share", "deadline"])
+
+DEFAULT_CLASS_POLICIES = {
+    TrafficClass.INTERACTIVE: ClassPolicy(share=0.4, deadline=1.0),
+    TrafficClass.POLL: ClassPolicy(share=0.4, deadline=2.0),
+    TrafficClass.BACKGROUND: ClassPolicy(share=0.15, deadline=10.0),
+    TrafficClass.RESCAN: ClassPolicy(share=0.05, deadline=60.0),
+}
+
+# request is served out of fair order when its deadline is closer than this margin,
+# covers request which is already on the line and can't be preempted
+DEFAULT_URGENCY_MARGIN = 0.5
+
+ClassStats = namedtuple(
+    typename="ClassStats",
+    field_names=[
+        "submitted_count",
+        "served_count",
+        "pending_count",
+        "busy_time",
+        "max_wait_time",
+        "expired_count"
+    ]
+)
+
+
+def traffic_class_for_priority(priority):
+    # class with the closest priority which is not higher than given one
+    for name in TRAFFIC_CLASSES:
+        if priority <= CLASS_PRIORITIES[name]:
+            return name
+
+    return TRAFFIC_CLASSES[-1]
+
+
+class PriorityScheduler(object):
+    # Strict priorities (lower value first), FIFO for the same priority. Traffic classes
+    # are accepted too and mapped with CLASS_PRIORITIES.
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._is_closed = False
+
+    def __len__(self):
+        with self._condition:
+            return len(self._heap)
+
+    def put(self, job, priority=PRIORITY_NORMAL):
+        priority = CLASS_PRIORITIES.get(priority, priority)
+
+        with self._condition:
+            heapq.heappush(self._heap, (priority, next(self._counter), job))
+            self._condition.notify()
+
+    def get(self, expire=None):
+        # blocks until job is available, returns None when scheduler is closed and empty.
+        # Priorities have no deadlines, so expire is never called
+        with self._condition:
+            while (not self._heap) and (not self._is_closed):
+                self._condition.wait()
+
+            if not self._heap:
+                return None
+
+            return heapq.heappop(self._heap)[2]
+
+    def complete(self, job, duration):
+        pass
+
+    def drain(self):
+        with self._condition:
+            res = [item[2] for item in sorted(self._heap)]
+            self._heap = []
+
+        return res
+
+    def open(self):
+        with self._condition:
+            self._is_closed = False
+
+    def close(self):
+        with self._condition:
+            self._is_closed = True
+            self._condition.notify_all()
+
+
+class ClassScheduler(object):
+    # Bus time scheduler for traffic classes. Each class has FIFO queue and virtual time - bus
+    # time used by class divided by its share; next request is taken from class with the smallest
+    # virtual time, so under contention classes get bus time proportionally to shares and idle
+    # bandwidth is used by anyone (work-conserving). Class which was idle starts from virtual time
+    # of request in service, so it can't save unused bandwidth for later bursts.
+    # Requests with deadline closer than urgency margin are served first (earliest deadline first),
+    # requests still queued after deadline are expired. Integer priorities are mapped to classes.
+    # Decision is made before each request, so long sequences (rescan of all trunks) submitted as
+    # separate requests are preempted at frame boundaries.
+    def __init__(self, policies=None, urgency_margin=DEFAULT_URGENCY_MARGIN, clock=time.monotonic):
+        self.policies = dict(DEFAULT_CLASS_POLICIES)
+        self.policies.update(policies or dict())
+        self.urgency_margin = urgency_margin
+        self.clock = clock
+
+        # {class: deque of (job, submission time, deadline time)}
+        self._queues = {name: deque() for name in self.policies}
+        self._virtual_times = dict.fromkeys(self.policies, 0.0)
+        self._virtual_now = 0.0
+
+        self._stats = {name: _ClassCounters() for name in self.policies}
+        # class of job in service
+        self._current = None
+
+        self._condition = threading.Condition()
+        self._is_closed = False
+
+    def __len__(self):
+        with self._condition:
+            return sum(len(item) for item in self._queues.values())
+
+    def put(self, job, priority=TrafficClass.POLL):
+        traffic_class = priority
+        if (traffic_class not in self.policies) and isinstance(traffic_class, int):
+            traffic_class = traffic_class_for_priority(traffic_class)
+
+        policy = self.policies.get(traffic_class)
+        if policy is None:
+            raise ValueError("unknown traffic class {!r}".format(traffic_class))
+
+        now = self.clock()
+        deadline = (now + policy.deadline) if policy.deadline is not None else None
+
+        with self._condition:
+            queue = self._queues[traffic_class]
+            if not queue:
+                self._virtual_times[traffic_class] = max(self._virtual_times[traffic_class], self._virtual_now)
+
+            queue.append((job, now, deadline))
+            self._stats[traffic_class].submitted_count += 1
+            self._condition.notify()
+
+    def get(self, expire=None):
+        # blocks until job is available, returns None when scheduler is closed and empty.
+        # Jobs which missed deadline are removed and passed to expire(job) (outside of lock)
+        while True:
+            with self._condition:
+                while (not self._has_jobs()) and (not self._is_closed):
+                    self._condition.wait()
+
+                if not self._has_jobs():
+                    return None
+
+                now = self.clock()
+                expired = self._pop_expired(now) if expire is not None else []
+                if not expired:
+                    return self._pop_next(now)
+
+            for job in expired:
+                expire(job)
+
+    def complete(self, job, duration):
+        with self._condition:
+            if self._current is None:
+                return
+
+            traffic_class = self._current
+            self._current = None
+
+            self._virtual_times[traffic_class] += duration / self.policies[traffic_class].share
+
+            counters = self._stats[traffic_class]
+            counters.served_count += 1
+            counters.busy_time += duration
+
+    def drain(self):
+        with self._condition:
+            res = []
+            for name in self._class_order():
+                res.extend(item[0] for item in self._queues[name])
+                self._queues[name].clear()
+
+        return res
+
+    def open(self):
+        with self._condition:
+            self._is_closed = False
+
+    def close(self):
+        with self._condition:
+            self._is_closed = True
+            self._condition.notify_all()
+
+    def stats(self):
+        # {class: ClassStats}
+        with self._condition:
+            return {
+                name: ClassStats(
+                    submitted_count=counters.submitted_count,
+                    served_count=counters.served_count,
+                    pending_count=len(self._queues[name]),
+                    busy_time=counters.busy_time,
+                    max_wait_time=counters.max_wait_time,
+                    expired_count=counters.expired_count
+                )
+                for name, counters in self._stats.items()
+            }
+
+    def _pop_next(self, now):
+        traffic_class = self._next_class(now)
+
+        job, submitted_at, _ = self._queues[traffic_class].popleft()
+        self._virtual_now = self._virtual_times[traffic_class]
+        self._current = traffic_class
+
+        counters = self._stats[traffic_class]
+        counters.max_wait_time = max(counters.max_wait_time, now - submitted_at)
+
+        return job
+
+    def _pop_expired(self, now):
+        # deadline is the same for all requests of class, so expired requests are at queue head
+        res = []
+        for name, queue in self._queues.items():
+            while queue and (queue[0][2] is not None) and (queue[0][2] < now):
+                res.append(queue.popleft()[0])
+                self._stats[name].expired_count += 1
+
+        return res
+
+    def _has_jobs(self):
+        return any(self._queues.values())
+
+    def _next_class(self, now):
+        active = [name for name in self._class_order() if self._queues[name]]
+
+        urgent = [
+            name for name in active
+            if (self._queues[name][0][2] is not None) and (self._queues[name][0][2] - now <= self.urgency_margin)
+        ]
+        if urgent:
+            return min(urgent, key=lambda name: self._queues[name][0][2])
+
+        return min(active, key=lambda name: self._virtual_times[name])
+
+    def _class_order(self):
+        return [name for name in TRAFFIC_CLASSES if name in self._queues] + sorted(
+            name for name in self._queues if name not in TRAFFIC_CLASSES
+        )
+
+
+class _ClassCounters(object):
+    __slots__ = (
+        "submitted_count",
+        "served_count",
+        "busy_time",
+        "max_wait_time",
+        "expired_count"
+    )
+
+    def __init__(self):
+        self.submitted_count = 0
+        self.served_count = 0
+        self.busy_time = 0.0
+        self.max_wait_time = 0.0
+        self.expired_count = 0
@@ -0,0 +1,184 @@
+import threading
+from collections import namedtuple
+
+SensorLocation = namedtuple(
+    typename="SensorLocation",
+    field_names=[
+        "port_name",
+        "controller_address",
+        "trunk_number",
+        "sensor_index"
+    ]
+)
+
+SensorMove = namedtuple("SensorMove", ["address", "old_location", "new_location"])
+
+
+class IndexChanges(namedtuple("IndexChanges", ["added", "moved", "vanished"])):
+    # added and vanished - lists of (address, location), moved - list of SensorMove
+    __slots__ = ()
+
+    def __bool__(self):
+        return bool(self.added or self.moved or self.vanished)
+
+    def merge(self, other):
+        return IndexChanges(
+            added=self.added + other.added,
+            moved=self.moved + other.moved,
+            vanished=self.vanished + other.vanished
+        )
+
+
+def no_changes():
+    return IndexChanges(added=[], moved=[], vanished=[])
+
+
+def rom_address_to_int(address):
+    # ROM address as 64-bit integer, first byte of address is most significant.
+    # Accepts bytes-like objects, hex strings and integers
+    if isinstance(address, int):
+        return address
+
+    if isinstance(address, str):
+        return int(address, 16)
+
+    return int.from_bytes(bytes(address), "big")
+
+
+def format_rom_address(address):
+    return "{:016x}".format(address)
+
+
+class SensorIndex(object):
+    # Fleet-wide index of sensors by ROM address (64-bit integer) and by physical position
+    # (port, controller, trunk, index). Positions change after rescan of trunk, so index is updated
+    # per trunk with addresses read from controller and reports which sensors were added, moved
+    # (to other index, trunk, controller or port) or vanished.
+    # Sensor moved between trunks is reported as moved when its new trunk is updated first,
+    # otherwise as vanished and then added.
+    # Bus created with sensor_index keeps index updated from traffic of all its communicators:
+    # addresses read from trunk update it, rescan of trunk with sensors marks trunk positions
+    # as unknown until addresses of trunk are read again (sensors keep previous locations, so
+    # moves are still detected). on_changes(changes) is called for each update with changes.
+    def __init__(self, on_changes=None):
+        self.on_changes = on_changes
+
+        # {address: SensorLocation}
+        self._locations = dict()
+        # {(port name, controller address, trunk number): list of addresses by sensor index}
+        self._trunks = dict()
+        # trunks rescanned after addresses were read, positions on them are unknown
+        self._invalidated_trunks = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._locations)
+
+    def __contains__(self, address):
+        return rom_address_to_int(address) in self._locations
+
+    def __iter__(self):
+        # (address, location) pairs of sensors with known position
+        with self._lock:
+            return iter(
+                [item for item in self._locations.items() if item[1][:3] not in self._invalidated_trunks]
+            )
+
+    def location(self, address):
+        with self._lock:
+            location = self._locations.get(rom_address_to_int(address))
+            if (location is None) or (location[:3] in self._invalidated_trunks):
+                return None
+
+            return location
+
+    def address(self, port_name, controller_address, trunk_number, sensor_index):
+        addresses = self.trunk_addresses(port_name, controller_address, trunk_number)
+        return addresses[sensor_index] if sensor_index < len(addresses) else None
+
+    def trunk_addresses(self, port_name, controller_address, trunk_number):
+        key = (port_name, controller_address, trunk_number)
+        with self._lock:
+            if key in self._invalidated_trunks:
+                return ()
+
+            return tuple(self._trunks.get(key, ()))
+
+    def invalidate_trunk(self, port_name, controller_address, trunk_number):
+        # positions on trunk are unknown (trunk was rescanned) until next update of trunk
+        key = (port_name, controller_address, trunk_number)
+        with self._lock:
+            if key in self._trunks:
+                self._invalidated_trunks.add(key)
+
+    def update_trunk(self, port_name, controller_address, trunk_number, addresses):
+        # addresses - ROM addresses of sensors on trunk by sensor index, None for unknown sensor
+        key = (port_name, controller_address, trunk_number)
+        addresses = [None if item is None else rom_address_to_int(item) for item in addresses]
+        changes = no_changes()
+
+        with self._lock:
+            current = set(addresses)
+            for address in self._trunks.get(key, ()):
+                if (address is not None) and (address not in current):
+                    changes.vanished.append((address, self._locations.pop(address)))
+
+            for index, address in enumerate(addresses):
+                if address is None:
+                    continue
+
+                location = SensorLocation(port_name, controller_address, trunk_number, index)
+                previous = self._locations.get(address)
+
+                if previous is None:
+                    changes.added.append((address, location))
+                elif previous != location:
+                    changes.moved.append(SensorMove(address, previous, location))
+                    self._forget_position(previous, address)
+
+                self._locations[address] = location
+
+            if addresses:
+                self._trunks[key] = addresses
+            else:
+                self._trunks.pop(key, None)
+
+            self._invalidated_trunks.discard(key)
+
+        if changes and (self.on_changes is not None):
+            self.on_changes(changes)
+
+        return changes
+
+    def update_from_response(self, port_name, controller_address, response):
+        # response - SensorUniqueAddressOnTrunkResponse, sensors with detected errors are not indexed
+        addresses = [
+            None if is_error else address
+            for address, is_error in zip(response.unique_addresses(), response.errors_mask())
+        ]
+
+        return self.update_trunk(port_name, controller_address, response.trunk_number(), addresses)
+
+    def update_topology(self, port_name, controller_address, topology):
+        changes = no_changes()
+        for trunk_number, addresses in enumerate(topology.sensors_addresses, start=1):
+            changes = changes.merge(self.update_trunk(port_name, controller_address, trunk_number, addresses))
+
+        return changes
+
+    def remove_controller(self, port_name, controller_address):
+        with self._lock:
+            trunk_numbers = [
+                key[2] for key in self._trunks if (key[0] == port_name) and (key[1] == controller_address)
+            ]
+
+        changes = no_changes()
+        for trunk_number in sorted(trunk_numbers):
+            changes = changes.merge(self.update_trunk(port_name, controller_address, trunk_number, []))
+
+        return changes
+
+    def _forget_position(self, location, address):
+        addresses = self._trunks.get(location[:3])
+        if addresses and (location.sensor_index < len(addresses)) and (addresses[location.sensor_index] == address):
+            addresses[location.sensor_index] = None
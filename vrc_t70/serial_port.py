@@ -0,0 +1,14 @@
+import serial
+
+from .defaults import DEFAULT_BAUDRATE, DEFAULT_RESPONSE_TIMEOUT
+
+
+def open_serial(port_name, baudrate=DEFAULT_BAUDRATE, timeout=DEFAULT_RESPONSE_TIMEOUT):
+    return serial.Serial(
+        port_name,
+        baudrate=baudrate,
+        bytesize=serial.EIGHTBITS,
+        timeout=timeout,
+        parity=serial.PARITY_NONE,
+        stopbits=serial.STOPBITS_ONE
+    )
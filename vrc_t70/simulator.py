@@ -0,0 +1,422 @@
+import math
+import os
+import random
+import select
+import threading
+import time
+
+from .commands import VrcT70Commands
+from .crc import crc8
+from .defaults import DEFAULT_RESPONSE_TIMEOUT
+from .encoder import REQUEST_CRC_SIZE, REQUEST_HEADER, REQUEST_HEADER_SIZE
+from .error_codes import VrcT70ErrorCodes
+from .frame import FLOAT, FRAME_HEADER
+from .limitations import MAX_SENSORS_PER_TRUNK, MAX_TRUNKS_COUNT
+from .timing import wire_time
+
+MIN_REQUEST_SIZE = REQUEST_HEADER_SIZE + REQUEST_CRC_SIZE
+
+# ROM address family code of DS18B20 sensors
+DS18B20_FAMILY_CODE = 0x28
+
+# commands which read sensors, only these commands are answered with busy code by fault injection
+SENSOR_COMMANDS = (
+    VrcT70Commands.GET_TEMPERATURE_OF_SENSOR_ON_TRUNK,
+    VrcT70Commands.GET_TEMPERATURES_ON_TRUNK,
+)
+
+
+def default_temperature(controller_address, trunk_number, sensor_index, timestamp):
+    # slow wave around value unique for each sensor, so sensors can be distinguished in results
+    base = 20.0 + controller_address + trunk_number / 10.0 + sensor_index / 100.0
+    return base + math.sin(timestamp / 60.0)
+
+
+def make_response_frame(address, id_event, sequence_id, processing_result=VrcT70ErrorCodes.NO_ERROR, data=None):
+    data = data or b""
+
+    frame = bytearray(FRAME_HEADER.pack(address, id_event, sequence_id, processing_result, len(data)))
+    frame.extend(data)
+    frame.append(crc8(frame))
+
+    return bytes(frame)
+
+
+class VirtualController(object):
+    # Controller model which implements all commands from VrcT70Commands. Sensors have
+    # deterministic ROM addresses, temperatures are produced by temperature function
+    # (controller_address, trunk_number, sensor_index, timestamp) -> float.
+    def __init__(self, address, sensors_per_trunk=None, temperature_func=default_temperature):
+        sensors_per_trunk = list(sensors_per_trunk or [1])
+        if len(sensors_per_trunk) > MAX_TRUNKS_COUNT:
+            raise ValueError("controller can't have more than {} trunks".format(MAX_TRUNKS_COUNT))
+
+        if any(not (0 <= count <= MAX_SENSORS_PER_TRUNK) for count in sensors_per_trunk):
+            raise ValueError("sensors count on trunk must be in [0, {}]".format(MAX_SENSORS_PER_TRUNK))
+
+        sensors_per_trunk.extend([0] * (MAX_TRUNKS_COUNT - len(sensors_per_trunk)))
+
+        self.address = address
+        self.sensors_per_trunk = sensors_per_trunk
+        self.temperature_func = temperature_func
+
+        # controller starts with zero session id and scans trunks on power on
+        self.session_id = bytes(4)
+        self.detected_sensors = list(sensors_per_trunk)
+
+        self.commands_count = 0
+
+    def sensor_address(self, trunk_number, sensor_index):
+        rom = bytes([DS18B20_FAMILY_CODE, self.address, trunk_number, sensor_index, 0x00, 0x00, 0x00])
+        return rom + bytes([crc8(rom)])
+
+    def handle(self, command, data):
+        # returns (processing_result, response data)
+        self.commands_count += 1
+
+        handler = self._handlers().get(command)
+        if handler is None:
+            return VrcT70ErrorCodes.UNKNOWN_COMMAND, b""
+
+        try:
+            return handler(bytes(data))
+        except (IndexError, ValueError):
+            return VrcT70ErrorCodes.INCORRECT_VALUE, b""
+
+    def _handlers(self):
+        return {
+            VrcT70Commands.PING: self._ping,
+            VrcT70Commands.GET_TEMPERATURE_OF_SENSOR_ON_TRUNK: self._get_temperature_of_sensor,
+            VrcT70Commands.GET_TEMPERATURES_ON_TRUNK: self._get_temperatures_on_trunk,
+            VrcT70Commands.GET_SENSOR_UNIQUE_ADDRESS_ON_TRUNK: self._get_sensor_address,
+            VrcT70Commands.GET_SENSORS_UNIQUE_ADDRESSES_ON_TRUNK: self._get_sensors_addresses,
+            VrcT70Commands.SET_SESSION_ID: self._set_session_id,
+            VrcT70Commands.GET_SESSION_ID: self._get_session_id,
+            VrcT70Commands.SET_CONTROLLER_NEW_ADDRESS: self._set_new_address,
+            VrcT70Commands.RESCAN_SENSORS_ON_TRUNK: self._rescan_sensors,
+            VrcT70Commands.GET_SENSORS_COUNT_ON_TRUNK: self._get_sensors_count,
+        }
+
+    def _trunk_number(self, data):
+        trunk_number = data[0]
+        if not (1 <= trunk_number <= MAX_TRUNKS_COUNT):
+            raise ValueError()
+
+        return trunk_number
+
+    def _sensor_index(self, trunk_number, data):
+        sensor_index = data[1]
+        if sensor_index >= self.detected_sensors[trunk_number - 1]:
+            raise ValueError()
+
+        return sensor_index
+
+    def _temperature(self, trunk_number, sensor_index):
+        return self.temperature_func(self.address, trunk_number, sensor_index, time.time())
+
+    def _ping(self, data):
+        return VrcT70ErrorCodes.NO_ERROR, b""
+
+    def _get_temperature_of_sensor(self, data):
+        trunk_number = self._trunk_number(data)
+        sensor_index = self._sensor_index(trunk_number, data)
+
+        res = bytes([trunk_number, sensor_index, 0x01]) + FLOAT.pack(self._temperature(trunk_number, sensor_index))
+        return VrcT70ErrorCodes.NO_ERROR, res
+
+    def _get_temperatures_on_trunk(self, data):
+        trunk_number = self._trunk_number(data)
+
+        res = bytearray([trunk_number])
+        for sensor_index in range(self.detected_sensors[trunk_number - 1]):
+            res.append(0x01)
+            res.extend(FLOAT.pack(self._temperature(trunk_number, sensor_index)))
+
+        return VrcT70ErrorCodes.NO_ERROR, res
+
+    def _get_sensor_address(self, data):
+        trunk_number = self._trunk_number(data)
+        sensor_index = self._sensor_index(trunk_number, data)
+
+        return VrcT70ErrorCodes.NO_ERROR, bytes([trunk_number, sensor_index]) + self.sensor_address(
+            trunk_number,
+            sensor_index
+        )
+
+    def _get_sensors_addresses(self, data):
+        trunk_number = self._trunk_number(data)
+
+        res = bytearray([trunk_number])
+        for sensor_index in range(self.detected_sensors[trunk_number - 1]):
+            res.extend(self.sensor_address(trunk_number, sensor_index))
+            res.append(0x00)
+
+        return VrcT70ErrorCodes.NO_ERROR, res
+
+    def _set_session_id(self, data):
+        if len(data) != len(self.session_id):
+            raise ValueError()
+
+        self.session_id = data
+        return VrcT70ErrorCodes.NO_ERROR, self.session_id
+
+    def _get_session_id(self, data):
+        return VrcT70ErrorCodes.NO_ERROR, self.session_id
+
+    def _set_new_address(self, data):
+        # answer is sent from old address, new address is used starting from next request
+        self.address = data[0]
+        return VrcT70ErrorCodes.NO_ERROR, bytes([self.address])
+
+    def _rescan_sensors(self, data):
+        trunk_number = self._trunk_number(data)
+        self.detected_sensors[trunk_number - 1] = self.sensors_per_trunk[trunk_number - 1]
+
+        return VrcT70ErrorCodes.NO_ERROR, bytes([trunk_number, self.detected_sensors[trunk_number - 1]])
+
+    def _get_sensors_count(self, data):
+        trunk_number = self._trunk_number(data)
+        return VrcT70ErrorCodes.NO_ERROR, bytes([trunk_number, self.detected_sensors[trunk_number - 1]])
+
+
+class VirtualBus(object):
+    # RS-485 line with many virtual controllers. Requests with bad CRC or for unknown address
+    # are silently ignored like real controllers do. Faults are injected with given probabilities:
+    # response is dropped, response CRC is damaged or sensor command is answered with busy code.
+    # Every response has delay = latency + wire time of request and response at baudrate.
+    def __init__(
+            self,
+            controllers=(),
+            baudrate=None,
+            latency=0.0,
+            drop_rate=0.0,
+            crc_error_rate=0.0,
+            busy_rate=0.0,
+            seed=None
+    ):
+        self.controllers = dict()
+        for controller in controllers:
+            self.add_controller(controller)
+
+        self.baudrate = baudrate
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.crc_error_rate = crc_error_rate
+        self.busy_rate = busy_rate
+
+        self.requests_count = 0
+        self.responses_count = 0
+        self.dropped_count = 0
+        self.corrupted_count = 0
+        self.busy_count = 0
+
+        self._random = random.Random(seed)
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+
+    def add_controller(self, controller):
+        self.controllers[controller.address] = controller
+        return controller
+
+    def feed(self, data):
+        # returns list of (delay, response frame) for all complete requests in data
+        with self._lock:
+            self._buffer.extend(data)
+            return list(self._process_buffer())
+
+    def reset(self):
+        with self._lock:
+            self._buffer.clear()
+
+    def response_delay(self, request_size, response_size):
+        delay = self.latency
+        if self.baudrate:
+            delay += wire_time(request_size + response_size, self.baudrate)
+
+        return delay
+
+    def _process_buffer(self):
+        while len(self._buffer) >= MIN_REQUEST_SIZE:
+            address, command, sequence_id, data_length = REQUEST_HEADER.unpack_from(self._buffer)
+
+            request_size = MIN_REQUEST_SIZE + data_length
+            if len(self._buffer) < request_size:
+                return
+
+            if crc8(self._buffer[:request_size - 1]) != self._buffer[request_size - 1]:
+                # looking for next request start
+                del self._buffer[:1]
+                continue
+
+            data = bytes(self._buffer[REQUEST_HEADER_SIZE: request_size - REQUEST_CRC_SIZE])
+            del self._buffer[:request_size]
+
+            self.requests_count += 1
+            response = self._process_request(address, command, sequence_id, data)
+            if response is None:
+                continue
+
+            self.responses_count += 1
+            yield self.response_delay(request_size, len(response)), response
+
+    def _process_request(self, address, command, sequence_id, data):
+        controller = self.controllers.get(address)
+        if controller is None:
+            return None
+
+        if self._random.random() < self.drop_rate:
+            self.dropped_count += 1
+            return None
+
+        if (command in SENSOR_COMMANDS) and (self._random.random() < self.busy_rate):
+            self.busy_count += 1
+            processing_result, response_data = VrcT70ErrorCodes.DS18B20_BUSY, b""
+        else:
+            processing_result, response_data = controller.handle(command, data)
+
+        if controller.address != address:
+            # controller address was changed by command
+            del self.controllers[address]
+            self.controllers[controller.address] = controller
+
+        response = make_response_frame(address, command, sequence_id, processing_result, response_data)
+
+        if self._random.random() < self.crc_error_rate:
+            self.corrupted_count += 1
+            response = response[:-1] + bytes([response[-1] ^ 0xff])
+
+        return response
+
+
+class LoopbackSerial(object):
+    # In-process serial port connected to VirtualBus. Responses become readable after
+    # delay calculated by the bus, so communicators see the same timing as on real line.
+    def __init__(self, bus, timeout=DEFAULT_RESPONSE_TIMEOUT):
+        self.virtual_bus = bus
+        self.timeout = timeout
+        self.baudrate = bus.baudrate
+        self.is_open = True
+
+        self._pending = []
+        self._input_buffer = bytearray()
+
+    @property
+    def in_waiting(self):
+        self._receive(time.monotonic())
+        return len(self._input_buffer)
+
+    def write(self, data):
+        now = time.monotonic()
+        for delay, response in self.virtual_bus.feed(data):
+            self._pending.append((now + delay, response))
+
+        return len(data)
+
+    def read(self, size=1):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+        while True:
+            now = time.monotonic()
+            self._receive(now)
+
+            if len(self._input_buffer) >= size:
+                break
+
+            wake_up_time = self._pending[0][0] if self._pending else None
+            if deadline is not None:
+                if now >= deadline:
+                    break
+
+                wake_up_time = deadline if wake_up_time is None else min(wake_up_time, deadline)
+
+            if wake_up_time is None:
+                # no timeout and nothing will arrive
+                break
+
+            time.sleep(max(wake_up_time - now, 0.0))
+
+        res = bytes(self._input_buffer[:size])
+        del self._input_buffer[:size]
+
+        return res
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        self._input_buffer.clear()
+
+    def close(self):
+        self.is_open = False
+
+    def _receive(self, now):
+        while self._pending and (self._pending[0][0] <= now):
+            _, response = self._pending.pop(0)
+            self._input_buffer.extend(response)
+
+
+class PtySimulator(object):
+    # Serves VirtualBus on master side of pseudo-terminal, port_name (slave side) can be opened
+    # by any tool as regular serial port. Requests are handled in background thread.
+    def __init__(self, bus):
+        import tty
+
+        self.virtual_bus = bus
+
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._slave_fd)
+        self.port_name = os.ttyname(self._slave_fd)
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._serve, name="vrc-t70-simulator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+        os.close(self._master_fd)
+        os.close(self._slave_fd)
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while self._thread.is_alive():
+                self._thread.join(0.5)
+        finally:
+            self.stop()
+
+    def _serve(self):
+        while not self._stop_event.is_set():
+            ready, _, _ = select.select([self._master_fd], [], [], 0.1)
+            if not ready:
+                continue
+
+            try:
+                data = os.read(self._master_fd, 4096)
+            except OSError:
+                return
+
+            for delay, response in self.virtual_bus.feed(data):
+                if delay:
+                    time.sleep(delay)
+
+                os.write(self._master_fd, response)
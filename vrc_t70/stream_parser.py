@@ -0,0 +1,101 @@
+from .crc import crc8
+from .frame import DATA_LENGTH_OFFSET, FRAME_HEADER_SIZE, MIN_FRAME_SIZE, VrcT70Frame, frame_size
+from .limitations import MAX_RESPONSE_DATA_LENGTH
+
+# compact buffer only when enough consumed bytes collected, so bytes are moved rarely
+COMPACT_THRESHOLD = 4096
+
+
+class VrcT70FrameParser(object):
+    # Streaming parser for responses. Incoming bytes are collected in buffer, parser looks for
+    # position where plausible header (known event id and data length for it), data and CRC line up.
+    # When frame can't be decoded at current position only one byte is discarded and search
+    # continues from next byte, so garbage on the line costs only frames which were damaged.
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+        self.received_bytes_count = 0
+        self.frames_count = 0
+        self.crc_errors_count = 0
+        self.discarded_bytes_count = 0
+
+    def __len__(self):
+        return len(self._buffer) - self._position
+
+    def feed(self, data):
+        self._buffer.extend(data)
+        self.received_bytes_count += len(data)
+
+    def bytes_needed(self):
+        # how many bytes are required to complete frame candidate at current position
+        available = len(self)
+        if available < MIN_FRAME_SIZE:
+            return MIN_FRAME_SIZE - available
+
+        return max(frame_size(self._header()) - available, 1)
+
+    def next_frame(self):
+        while len(self) >= MIN_FRAME_SIZE:
+            header = self._header()
+
+            if not self._is_plausible_header(header):
+                self._discard(1)
+                continue
+
+            size = frame_size(header)
+            if len(self) < size:
+                return None
+
+            begin = self._position
+            end = begin + size
+
+            # CRC of whole valid frame (including CRC byte) is zero, frame bytes are copied once
+            with memoryview(self._buffer) as view:
+                raw = bytes(view[begin: end]) if not crc8(view[begin: end]) else None
+
+            if raw is None:
+                self.crc_errors_count += 1
+                self._discard(1)
+                continue
+
+            frame = VrcT70Frame(raw, validate_crc=False)
+            self._consume(size)
+            self.frames_count += 1
+
+            return frame
+
+        return None
+
+    def frames(self):
+        frame = self.next_frame()
+        while frame is not None:
+            yield frame
+            frame = self.next_frame()
+
+    def reset(self):
+        self._discard(len(self))
+
+    def _header(self):
+        return self._buffer[self._position: self._position + FRAME_HEADER_SIZE]
+
+    def _is_plausible_header(self, header):
+        max_data_length = MAX_RESPONSE_DATA_LENGTH.get(header[1])
+        if max_data_length is None:
+            return False
+
+        return header[DATA_LENGTH_OFFSET] <= max_data_length
+
+    def _discard(self, count):
+        self.discarded_bytes_count += count
+        self._consume(count)
+
+    def _consume(self, count):
+        self._position += count
+
+        if self._position == len(self._buffer):
+            self._buffer.clear()
+            self._position = 0
+        elif self._position >= COMPACT_THRESHOLD:
+            del self._buffer[:self._position]
+            self._position = 0
@@ -0,0 +1,33 @@
+# 8N1 framing: start bit, 8 data bits and stop bit for each byte on the wire
+BITS_PER_BYTE = 10
+
+
+def wire_time(bytes_count, baudrate):
+    return bytes_count * BITS_PER_BYTE / float(baudrate)
+
+
+class RttEstimator(object):
+    # Smoothed round trip time and its variation (Jacobson/Karels algorithm, as in TCP).
+    # Wire time is excluded from samples, so estimation can be used for responses of any length.
+    def __init__(self):
+        self.smoothed_rtt = None
+        self.rtt_variation = None
+        self.samples_count = 0
+
+    def update(self, sample):
+        sample = max(sample, 0.0)
+
+        if self.smoothed_rtt is None:
+            self.smoothed_rtt = sample
+            self.rtt_variation = sample / 2
+        else:
+            self.rtt_variation = 0.75 * self.rtt_variation + 0.25 * abs(self.smoothed_rtt - sample)
+            self.smoothed_rtt = 0.875 * self.smoothed_rtt + 0.125 * sample
+
+        self.samples_count += 1
+
+    def timeout(self):
+        if self.smoothed_rtt is None:
+            return None
+
+        return self.smoothed_rtt + 4 * self.rtt_variation
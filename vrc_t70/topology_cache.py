@@ -0,0 +1,114 @@
+import binascii
+import os
+import random
+from collections import namedtuple
+
+from .json_cache import DEFAULT_CACHE_DIRECTORY, JsonCacheFile
+from .limitations import MAX_TRUNKS_COUNT
+
+
+DEFAULT_TOPOLOGY_CACHE_PATH = os.path.join(DEFAULT_CACHE_DIRECTORY, "topology.json")
+
+SESSION_ID_LENGTH = 4
+
+
+class ControllerTopology(namedtuple("ControllerTopology", ["session_id", "sensors_addresses"])):
+    # sensors_addresses - list with ROM addresses (bytes) of sensors for each trunk (trunk 1 at index 0)
+    __slots__ = ()
+
+    def sensors_count_per_trunk(self):
+        return [len(item) for item in self.sensors_addresses]
+
+
+def random_session_id():
+    # zero session id means that controller was restarted, so it never used as valid session
+    session_id = bytes(SESSION_ID_LENGTH)
+    while not any(session_id):
+        session_id = bytes(random.getrandbits(8) for _ in range(SESSION_ID_LENGTH))
+
+    return session_id
+
+
+class TopologyCache(JsonCacheFile):
+    # topology (session id and sensors addresses per trunk) for each controller on each port
+    def __init__(self, path=DEFAULT_TOPOLOGY_CACHE_PATH):
+        super().__init__(path)
+
+    def get(self, port_name, controller_address):
+        item = self.load().get(port_name, dict()).get(self._controller_key(controller_address))
+        if item is None:
+            return None
+
+        try:
+            return ControllerTopology(
+                session_id=binascii.unhexlify(item["session_id"]),
+                sensors_addresses=[
+                    [binascii.unhexlify(address) for address in trunk] for trunk in item["sensors_addresses"]
+                ]
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def set(self, port_name, controller_address, topology):
+        with self.lock:
+            data = self.load()
+
+            data.setdefault(port_name, dict())[self._controller_key(controller_address)] = {
+                "session_id": binascii.hexlify(topology.session_id).decode("ascii"),
+                "sensors_count": topology.sensors_count_per_trunk(),
+                "sensors_addresses": [
+                    [binascii.hexlify(address).decode("ascii") for address in trunk]
+                    for trunk in topology.sensors_addresses
+                ]
+            }
+
+            self.save(data)
+
+    def remove(self, port_name, controller_address):
+        with self.lock:
+            data = self.load()
+            if data.get(port_name, dict()).pop(self._controller_key(controller_address), None) is not None:
+                self.save(data)
+
+    def _controller_key(self, controller_address):
+        return "0x{:02x}".format(controller_address)
+
+
+def scan_topology(communicator, session_id=None):
+    # starts new session on controller and rescans all trunks
+    session_id = session_id or random_session_id()
+    communicator.set_session_id(bytearray(session_id))
+
+    sensors_addresses = []
+    for trunk_number in range(1, MAX_TRUNKS_COUNT + 1):
+        r = communicator.rescan_sensors_on_trunk(trunk_number)
+        if not r.sensors_count():
+            sensors_addresses.append([])
+            continue
+
+        r = communicator.get_sensors_unique_addresses_on_trunk(trunk_number)
+        sensors_addresses.append([bytes(r.sensor_unique_address(index)) for index in range(r.sensors_count())])
+
+    return ControllerTopology(session_id=bytes(session_id), sensors_addresses=sensors_addresses)
+
+
+def load_topology(communicator, port_name, cache, force_rescan=False, sensor_index=None):
+    # returns (topology, is_loaded_from_cache). Cached topology is used when controller still
+    # has same session id, so sensors indexes and addresses on controller were not changed.
+    # sensor_index (SensorIndex) is updated with loaded topology, so it stays valid after rescan
+    cached = None if force_rescan else cache.get(port_name, communicator.controller_address)
+
+    topology, is_cached = None, False
+    if cached is not None:
+        r = communicator.get_session_id()
+        if bytes(r.session_id()) == cached.session_id:
+            topology, is_cached = cached, True
+
+    if topology is None:
+        topology = scan_topology(communicator)
+        cache.set(port_name, communicator.controller_address, topology)
+
+    if sensor_index is not None:
+        sensor_index.update_topology(port_name, communicator.controller_address, topology)
+
+    return topology, is_cached